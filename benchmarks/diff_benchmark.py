@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark del índice de diferencias entre catálogos
+
+Mide la implementación anterior de find_new_products, la reconstrucción del
+índice y la actualización incremental con las filas de una sincronización. La
+equivalencia con la implementación anterior y entre actualizar y reconstruir
+se comprueba en tests/test_catalog_diff.py.
+
+Uso (con .streamlit/secrets.toml o variables de entorno disponibles):
+    python benchmarks/diff_benchmark.py [productos] [filas modificadas]
+"""
+import os
+import sys
+import time
+import random
+import logging
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import pandas as pd
+from api_connector import build_reference_frame
+from catalog_diff import CatalogDiff, NEW
+from sync_state import merge_products
+from normalizer_benchmark import make_catalog, make_manager
+from streamlit_config import get_config
+
+DEFAULT_SIZE = 50_000
+DEFAULT_CHANGES = 100
+
+def legacy_find_new_products(df_orocolombia: pd.DataFrame, df_grupofelmel) -> pd.DataFrame:
+    """find_new_products tal como estaba antes del índice de diferencias (referencia de tiempo)"""
+    if df_orocolombia.empty:
+        return pd.DataFrame()
+    if isinstance(df_grupofelmel, (set, frozenset)):
+        grupofelmel_skus = df_grupofelmel
+    elif df_grupofelmel.empty:
+        grupofelmel_skus = set()
+    else:
+        grupofelmel_skus = set(df_grupofelmel['sku'].dropna().unique())
+
+    valid_orocolombia = df_orocolombia[
+        (df_orocolombia['sku'].notna()) &
+        (df_orocolombia['sku'] != '') &
+        (~df_orocolombia['sku'].str.startswith('PROD-')) &
+        (~df_orocolombia['sku'].str.startswith('ERROR-')) &
+        (df_orocolombia['price'] > 0) &
+        (df_orocolombia['stock'] > 0)
+    ].copy()
+    new_products = valid_orocolombia[~valid_orocolombia['sku'].isin(grupofelmel_skus)].copy()
+    if not new_products.empty:
+        return new_products.sort_values('date_modified', ascending=False)
+    return pd.DataFrame()
+
+def supplier_catalog(manager, products: list) -> pd.DataFrame:
+    return manager.normalize_catalog(products)
+
+def retailer_products(products: list, rng: random.Random, share: float = 0.7) -> list:
+    """Catálogo propio: parte de los SKUs del proveedor, con precios y stock a veces distintos"""
+    listed = []
+    for product in products:
+        if not product.get('sku') or rng.random() > share:
+            continue
+        price = product.get('price') or product.get('regular_price')
+        if rng.random() < 0.05:
+            price = f"{float(price) * 1.1:.2f}"
+        stock = product.get('stock_quantity')
+        if rng.random() < 0.1:
+            stock = (stock or 0) + 1
+        listed.append({'id': 900_000 + product['id'], 'sku': product['sku'],
+                       'price': price, 'stock_quantity': stock})
+    # SKUs que el proveedor ya no tiene
+    listed.extend({'id': 990_000 + i, 'sku': f"RETIRADO-{i}", 'price': '1000', 'stock_quantity': 1}
+                  for i in range(len(products) // 100))
+    return listed
+
+def make_updates(products: list, listed: list, changes: int, rng: random.Random):
+    """Filas modificadas o nuevas del proveedor y del catálogo propio"""
+    updated = [dict(product) for product in rng.sample(products, changes)]
+    for product in updated:
+        product['stock_quantity'] = rng.choice([0, 5, 9])
+        product['price'] = f"{rng.uniform(10_000, 900_000):.2f}"
+        product['date_modified'] = '2026-01-01T10:00:00'
+    start = len(products)
+    updated.extend(dict(product, id=start + i, sku=f"NUEVO-{i}", stock_quantity=2, price='1000')
+                   for i, product in enumerate(products[:changes // 10]))
+
+    relisted = [dict(product) for product in rng.sample(listed, changes // 2)]
+    for product in relisted:
+        product['stock_quantity'] = (product.get('stock_quantity') or 0) + 3
+    return updated, relisted
+
+def main():
+    logging.disable(logging.INFO)
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE
+    changes = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_CHANGES
+    manager = make_manager(get_config())
+
+    rng = random.Random(5)
+    products = make_catalog(size)
+    listed = retailer_products(products, rng)
+    supplier = supplier_catalog(manager, products)
+    retailer = build_reference_frame(listed)
+
+    updated, relisted = make_updates(products, listed, changes, rng)
+    supplier_changes = supplier_catalog(manager, updated)
+    retailer_changes = build_reference_frame(relisted)
+    supplier_after = merge_products(supplier, supplier_changes)
+    retailer_after = merge_products(retailer, retailer_changes)
+
+    # Incremental frente a descarga completa con los catálogos fusionados
+    incremental = CatalogDiff()
+    incremental.rebuild(supplier, retailer)
+    start = time.perf_counter()
+    incremental.update(supplier_after, retailer_after, supplier_changes, retailer_changes)
+    update_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    incremental.frame(NEW)
+    new_frame_seconds = time.perf_counter() - start
+
+    # Misma sincronización anterior: los cambios de precio y stock son respecto de ella
+    rebuilt = CatalogDiff()
+    rebuilt.rebuild(supplier, retailer)
+    start = time.perf_counter()
+    rebuilt.rebuild(supplier_after, retailer_after)
+    rebuild_seconds = time.perf_counter() - start
+    print(f"Clases: {rebuilt.counts()}")
+
+    start = time.perf_counter()
+    legacy_find_new_products(supplier_after, retailer_after)
+    legacy_seconds = time.perf_counter() - start
+
+    print(f"{size:,} productos, {len(supplier_changes) + len(retailer_changes):,} filas recibidas")
+    print(f"{'find_new_products anterior':<32} {legacy_seconds * 1000:8.1f} ms")
+    print(f"{'reconstruir índice (5 clases)':<32} {rebuild_seconds * 1000:8.1f} ms")
+    print(f"{'actualización incremental':<32} {update_seconds * 1000:8.1f} ms")
+    print(f"{'frame de nuevos tras actualizar':<32} {new_frame_seconds * 1000:8.1f} ms")
+
+if __name__ == '__main__':
+    main()
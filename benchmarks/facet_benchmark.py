@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Benchmark del índice de categorías (facetas)
+
+Arma una columna category_list sintética y mide el armado de CategoryFacets,
+el filtro por categorías y los conteos frente a str.contains, el filtro
+anterior. Que el filtro sea por pertenencia exacta y los conteos coincidan
+con contar fila por fila se prueba en tests/test_category_facets.py.
+
+Uso:
+    python benchmarks/facet_benchmark.py [productos]
+"""
+import os
+import sys
+import time
+import random
+import logging
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import pandas as pd
+from category_facets import CategoryFacets, join_category_list
+
+DEFAULT_SIZE = 100_000
+REPEAT = 20
+CATEGORIES = ['Anillos', 'Anillos de Compromiso', 'Aretes', 'Cadenas', 'Dijes', 'Novedades',
+              'Oro Laminado', 'Plata 925', 'Relojes', 'Sin categoría']
+
+def make_categories(size: int, rng: random.Random) -> pd.Series:
+    values = [join_category_list(rng.sample(CATEGORIES[:-1], rng.randint(1, 3))) if rng.random() > 0.05
+              else 'Sin categoría' for _ in range(size)]
+    values[:3] = [None, '', 'Anillos de Compromiso']
+    return pd.Series(values, dtype='category')
+
+def timed(function) -> float:
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        function()
+    return (time.perf_counter() - start) / REPEAT
+
+def main():
+    logging.disable(logging.INFO)
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE
+    categories = make_categories(size, random.Random(23))
+
+    start = time.perf_counter()
+    facets = CategoryFacets(categories)
+    build_seconds = time.perf_counter() - start
+
+    positions = facets.mask(('Novedades',)).nonzero()[0]
+
+    contains_seconds = timed(lambda: categories.str.contains('Anillos', na=False, regex=False))
+    mask_seconds = timed(lambda: facets.mask(('Anillos', 'Novedades')))
+    counts_seconds = timed(lambda: facets.counts(positions))
+
+    print(f"{size:,} productos, {len(facets.categories)} categorías, índice armado en {build_seconds * 1000:.1f} ms")
+    print(f"{'str.contains (anterior)':<32} {contains_seconds * 1000:8.2f} ms")
+    print(f"{'filtro por dos categorías':<32} {mask_seconds * 1000:8.2f} ms")
+    print(f"{'conteos por categoría':<32} {counts_seconds * 1000:8.2f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark del motor de filtros de las páginas de productos
+
+Compara el camino anterior de cada rerun (copiar el catálogo, recalcular las
+categorías y el precio máximo y filtrar con str.contains) con FilterEngine en
+frío (filtros nuevos sobre una versión con el índice de búsqueda ya armado,
+ver search_benchmark.py) y con el resultado ya cacheado, que es lo que cuesta
+un rerun en el que solo cambió la selección. Que las filas sean las mismas se
+prueba en tests/test_filter_engine.py.
+
+Uso (con .streamlit/secrets.toml o variables de entorno disponibles):
+    python benchmarks/filter_benchmark.py [productos]
+"""
+import os
+import sys
+import time
+import logging
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import pandas as pd
+from filter_engine import FilterEngine, FilterParams
+from normalizer_benchmark import make_catalog, make_manager
+from streamlit_config import get_config
+
+DEFAULT_SIZE = 100_000
+REPEAT = 20
+CATEGORY = 'Anillos'
+PARAMS = FilterParams((CATEGORY,), 400_000.0, 3, 'producto 1')
+
+def copy_and_filter(df: pd.DataFrame, params: FilterParams) -> pd.DataFrame:
+    """El rerun anterior: copia, opciones y filtros en pandas"""
+    df_filtered = df.copy()
+    categories = ['Todas'] + sorted(df_filtered['categories'].unique().tolist())
+    max_price_default = df_filtered['price'].max()
+    df_filtered = df_filtered[df_filtered['categories'].str.contains(CATEGORY, na=False)]
+    if params.max_price is not None and params.max_price < max_price_default:
+        df_filtered = df_filtered[df_filtered['price'] <= params.max_price]
+    df_filtered = df_filtered[df_filtered['stock'] >= params.min_stock]
+    if params.search:
+        df_filtered = df_filtered[
+            df_filtered['name'].str.contains(params.search, case=False, na=False) |
+            df_filtered['sku'].str.contains(params.search, case=False, na=False)
+        ]
+    return df_filtered, categories
+
+def timed(function) -> float:
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        function()
+    return (time.perf_counter() - start) / REPEAT
+
+def main():
+    logging.disable(logging.INFO)
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE
+    df = make_manager(get_config()).normalize_catalog(make_catalog(size))
+
+    engine = FilterEngine()
+    positions = engine.positions('orocolombia', 1, df, PARAMS)
+
+    old_seconds = timed(lambda: copy_and_filter(df, PARAMS))
+
+    def cold():
+        # Filtros nuevos sobre una versión ya vista (opciones e índice de búsqueda armados)
+        engine._results.clear()
+        engine.options('orocolombia', 1, df)
+        engine.positions('orocolombia', 1, df, PARAMS)
+    cold_seconds = timed(cold)
+
+    def cached():
+        engine.options('orocolombia', 1, df)
+        df.iloc[engine.positions('orocolombia', 1, df, PARAMS)[:100]]
+    cached_seconds = timed(cached)
+
+    print(f"{size:,} productos, {len(positions):,} filtrados")
+    print(f"{'copiar y filtrar (anterior)':<32} {old_seconds * 1000:8.1f} ms")
+    print(f"{'motor de filtros (frío)':<32} {cold_seconds * 1000:8.1f} ms")
+    print(f"{'motor de filtros (cache)':<32} {cached_seconds * 1000:8.2f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark del historial versionado del catálogo
+
+Guarda varias versiones diarias de un catálogo sintético y mide la lectura
+completa frente a la proyectada y la filtrada, y la consulta de productos
+nuevos entre fechas en frío frente a la cacheada. La equivalencia con los
+filtros en pandas y con find_new_products se prueba en
+tests/test_catalog_history.py.
+
+Uso (con .streamlit/secrets.toml o variables de entorno disponibles):
+    python benchmarks/history_benchmark.py [productos] [días]
+"""
+import os
+import sys
+import time
+import random
+import logging
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import pandas as pd
+from api_connector import build_reference_frame
+from catalog_history import CatalogHistory, catalog_filter, _read_version
+from category_facets import split_category_list
+from normalizer_benchmark import make_catalog, make_manager
+from diff_benchmark import retailer_products
+from streamlit_config import get_config
+
+DEFAULT_SIZE = 50_000
+DEFAULT_DAYS = 5
+ORO = 'OroColmbia'
+FELMEL = 'GrupoFelmel'
+FILTERS = {'categories': ('Anillos',), 'max_price': 400_000.0, 'min_stock': 3, 'search': 'producto 1'}
+
+def pandas_filter(df: pd.DataFrame) -> pd.DataFrame:
+    """Los filtros de las páginas de productos, en pandas"""
+    df = df[df['category_list'].map(lambda value: set(FILTERS['categories']) <= set(split_category_list(value)))
+            .astype(bool)]
+    df = df[df['price'] <= FILTERS['max_price']]
+    df = df[df['stock'] >= FILTERS['min_stock']]
+    return df[df['name'].str.contains(FILTERS['search'], case=False, regex=False)
+              | df['sku'].str.contains(FILTERS['search'], case=False, regex=False)]
+
+def main():
+    logging.disable(logging.INFO)
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_DAYS
+    rng = random.Random(13)
+    manager = make_manager(get_config())
+
+    with tempfile.TemporaryDirectory() as directory:
+        history = CatalogHistory(directory)
+
+        products = make_catalog(size)
+        start_at = datetime(2026, 3, 1, 8)
+        moments = []
+        for day in range(days):
+            moment = start_at + timedelta(days=day)
+            # Cada día el proveedor publica productos nuevos y la tienda lista algunos
+            products = products + [dict(product, id=len(products) + i, sku=f"DIA{day}-{i}")
+                                   for i, product in enumerate(products[:200])]
+            oro = manager.normalize_catalog(products)
+            listed = [product for product in products if not isinstance(product.get('stock_quantity'), str)]
+            felmel = build_reference_frame(retailer_products(listed, rng, share=0.5))
+            history.append(ORO, oro, moment)
+            history.append(FELMEL, felmel, moment)
+            moments.append(moment)
+
+        since, until = moments[1], moments[-1]
+        version = history.version_at(ORO, until)
+
+        _read_version.cache_clear()
+        start = time.perf_counter()
+        pandas_filter(history.read(version))
+        full_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        history.read(version, ['sku'])
+        sku_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        history.scan(version, ['sku', 'name', 'price', 'stock'], catalog_filter(**FILTERS))
+        scan_seconds = time.perf_counter() - start
+
+        _read_version.cache_clear()
+        history._results.clear()
+        start = time.perf_counter()
+        history.new_products_between(ORO, FELMEL, until, since)
+        cold_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        history.new_products_between(ORO, FELMEL, until, since)
+        cached_seconds = time.perf_counter() - start
+
+        print(f"{size:,} productos, {days} versiones por tienda")
+        print(f"{'leer todo y filtrar en pandas':<32} {full_seconds * 1000:8.1f} ms")
+        print(f"{'leer solo sku':<32} {sku_seconds * 1000:8.1f} ms")
+        print(f"{'scan proyectado y filtrado':<32} {scan_seconds * 1000:8.1f} ms")
+        print(f"{'nuevos entre fechas (frío)':<32} {cold_seconds * 1000:8.1f} ms")
+        print(f"{'nuevos entre fechas (cache)':<32} {cached_seconds * 1000:8.1f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark del kardex (historial de precio y stock por SKU)
+
+Simula varios días de sincronizaciones (una completa por día y varias
+incrementales entre ellas) sobre un catálogo sintético y mide el registro, la
+reconstrucción del inventario, el historial de un SKU y la compactación. La
+exactitud del inventario reconstruido se comprueba en tests/test_kardex_store.py.
+
+Uso:
+    python benchmarks/kardex_benchmark.py [productos] [días]
+"""
+import os
+import sys
+import time
+import random
+import logging
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import pandas as pd
+from kardex_store import KardexStore
+
+DEFAULT_SIZE = 50_000
+DEFAULT_DAYS = 30
+SYNCS_PER_DAY = 4
+CHANGES_PER_SYNC = 200
+SOURCE = 'OroColmbia'
+
+def make_catalog(size: int, rng: random.Random) -> pd.DataFrame:
+    return pd.DataFrame({
+        'id': [str(i) for i in range(size)],
+        'sku': [f"SKU-{i:06d}" for i in range(size)],
+        'price': [round(rng.uniform(10_000, 900_000), 2) for _ in range(size)],
+        'stock': [rng.choice([0, 3, 12]) for _ in range(size)],
+    })
+
+def mutate(catalog: pd.DataFrame, rng: random.Random, next_id: int):
+    """Cambios de una sincronización incremental: precios, stock y productos nuevos"""
+    rows = rng.sample(range(len(catalog)), CHANGES_PER_SYNC)
+    changed = catalog.iloc[rows].copy()
+    changed['stock'] = [rng.choice([0, 1, 5, 20]) for _ in rows]
+    changed.loc[changed.index[::3], 'price'] = [round(rng.uniform(10_000, 900_000), 2)
+                                                  for _ in changed.index[::3]]
+    added = pd.DataFrame({
+        'id': [str(next_id + i) for i in range(10)],
+        'sku': [f"NUEVO-{next_id + i}" for i in range(10)],
+        'price': 1000.0,
+        'stock': 2,
+    })
+    changes = pd.concat([changed, added], ignore_index=True)
+    catalog = pd.concat([catalog[~catalog['id'].isin(changes['id'])], changes], ignore_index=True)
+    return catalog, changes
+
+def main():
+    logging.disable(logging.INFO)
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_DAYS
+    rng = random.Random(11)
+
+    with tempfile.TemporaryDirectory() as directory:
+        kardex = KardexStore(os.path.join(directory, 'kardex.sqlite'))
+        catalog = make_catalog(size, rng)
+        start_at = datetime(2026, 1, 1)
+        next_id = size
+
+        start = time.perf_counter()
+        kardex.record(SOURCE, catalog, start_at, full=True)
+        first_seconds = time.perf_counter() - start
+
+        checkpoints = [start_at]
+        incremental_seconds, full_seconds = [], []
+        moment = start_at
+        for day in range(days):
+            for sync in range(SYNCS_PER_DAY):
+                moment += timedelta(hours=24 / SYNCS_PER_DAY)
+                catalog, changes = mutate(catalog, rng, next_id)
+                next_id += len(changes)
+                if sync == SYNCS_PER_DAY - 1:
+                    # Descarga completa diaria: detecta también los productos retirados
+                    catalog = catalog.drop(index=rng.sample(range(len(catalog)), 20)).reset_index(drop=True)
+                    start = time.perf_counter()
+                    kardex.record(SOURCE, catalog, moment, full=True)
+                    full_seconds.append(time.perf_counter() - start)
+                else:
+                    start = time.perf_counter()
+                    kardex.record(SOURCE, changes, moment, full=False)
+                    incremental_seconds.append(time.perf_counter() - start)
+                checkpoints.append(moment)
+
+        total = len(kardex.movements(limit=None))
+
+        start = time.perf_counter()
+        kardex.inventory_at(SOURCE, checkpoints[len(checkpoints) // 2])
+        inventory_seconds = time.perf_counter() - start
+
+        sku = changes['sku'].iloc[0]
+        start = time.perf_counter()
+        history = kardex.history(SOURCE, sku)
+        history_seconds = time.perf_counter() - start
+
+        retention_days = days / 2
+        start = time.perf_counter()
+        deleted = kardex.compact(retention_days, moment)
+        compact_seconds = time.perf_counter() - start
+        print(f"Compactación: {deleted:,} de {total:,} movimientos borrados")
+
+        print(f"{size:,} productos, {days} días, {SYNCS_PER_DAY} sincronizaciones por día")
+        print(f"{'primer registro (altas)':<32} {first_seconds * 1000:8.1f} ms")
+        print(f"{'registro incremental (medio)':<32} {sum(incremental_seconds) / len(incremental_seconds) * 1000:8.1f} ms")
+        print(f"{'registro completo (medio)':<32} {sum(full_seconds) / len(full_seconds) * 1000:8.1f} ms")
+        print(f"{'inventario a una fecha':<32} {inventory_seconds * 1000:8.1f} ms")
+        print(f"{'historial de un SKU':<32} {history_seconds * 1000:8.1f} ms ({len(history)} movimientos)")
+        print(f"{'compactación':<32} {compact_seconds * 1000:8.1f} ms")
+
+if __name__ == '__main__':
+    main()
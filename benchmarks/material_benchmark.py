@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark del clasificador de material
+
+Compara el tiempo de MaterialClassifier con la detección original de
+process_product (bucle por atributo y búsqueda de cada término en la
+descripción) sobre un catálogo grande con descripciones únicas y con
+descripciones repetidas. Los casos de referencia están en
+tests/test_material_classifier.py.
+
+Uso:
+    python benchmarks/material_benchmark.py [productos]
+"""
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import pandas as pd
+from material_classifier import MaterialClassifier
+
+DEFAULT_SIZE = 200_000
+
+def legacy_material(product: dict) -> str:
+    """Detección de material tal como la hacía process_product"""
+    material = 'N/A'
+    if product.get('attributes') and isinstance(product['attributes'], list):
+        for attr in product['attributes']:
+            name = attr.get('name', '').lower()
+            if any(term in name for term in ['material', 'composición', 'metal', 'tipo']):
+                if attr.get('options'):
+                    material = ', '.join(attr['options'])
+                    break
+
+    if material == 'N/A':
+        description = (product.get('description', '') + product.get('short_description', '')).lower()
+        if 'oro' in description:
+            material = 'Oro'
+        elif 'plata' in description:
+            material = 'Plata'
+        elif 'acero' in description:
+            material = 'Acero Inoxidable'
+        elif 'titanio' in description:
+            material = 'Titanio'
+    return material
+
+def make_products(size: int, unique_descriptions: bool, seed: int = 11) -> list:
+    rng = random.Random(seed)
+    materials = ['oro laminado 18k', 'plata 925', 'acero inoxidable', 'titanio', 'rodio', 'baño de color']
+    products = []
+    for i in range(size):
+        detail = f" referencia {i}" if unique_descriptions else ''
+        product = {
+            'attributes': [{'name': 'Color', 'options': ['Dorado']}, {'name': 'Talla', 'options': ['7']}],
+            'description': (f"<div class=\"product-description\"><p>Pieza de joyería{detail} elaborada en "
+                            f"{rng.choice(materials)}, ideal para regalo. Garantía de 6 meses.</p></div>"),
+            'short_description': f"<p>Colección {rng.choice(['clásica', 'moderna', 'infantil'])}</p>",
+        }
+        if rng.random() > 0.7:
+            product['attributes'].append({'name': 'Material', 'options': ['Oro Laminado']})
+        products.append(product)
+    return products
+
+def run_batch(classifier: MaterialClassifier, products: list) -> list:
+    """Mismo recorrido que normalize_products: atributos por fila y textos por columna"""
+    material = pd.Series([classifier.from_attributes(p.get('attributes')) for p in products], dtype=object)
+    pending = material.isna().to_numpy()
+    texts = pd.Series([p.get('description', '') + p.get('short_description', '') for p in products],
+                      dtype=object)[pending]
+    material[pending] = classifier.classify_texts(texts)
+    return material.tolist()
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE
+    classifier = MaterialClassifier()
+    for unique in (True, False):
+        products = make_products(size, unique)
+
+        start = time.perf_counter()
+        [legacy_material(product) for product in products]
+        legacy_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        run_batch(classifier, products)
+        batch_seconds = time.perf_counter() - start
+
+        label = 'descripciones únicas' if unique else 'descripciones repetidas'
+        print(f"{size:,} productos, {label:<24} | original {legacy_seconds:6.3f} s | "
+              f"clasificador {batch_seconds:6.3f} s | {batch_seconds / legacy_seconds:5.0%} del costo")
+
+if __name__ == '__main__':
+    main()
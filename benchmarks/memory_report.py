@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Informe de memoria: catálogo completo (process_product) frente al esquema compacto
+
+Normaliza un catálogo sintético y compara la memoria de cada columna antes y
+después de to_catalog_schema. memory_usage(deep=True) mide dicts y listas solo
+en su primer nivel, así que el "antes" es una cota inferior; por eso también se
+mide la memoria retenida por cada DataFrame (tracemalloc para los objetos de
+Python más el pool de memoria de Arrow).
+
+Uso (con .streamlit/secrets.toml o variables de entorno disponibles):
+    python benchmarks/memory_report.py [productos]
+"""
+import os
+import sys
+import copy
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import pandas as pd
+import pyarrow as pa
+from normalizer import normalize_products, to_catalog_schema
+from normalizer_benchmark import make_catalog, DISCOUNT_PERCENTAGE
+
+DEFAULT_SIZE = 50_000
+
+def megabytes(value: float) -> str:
+    return f"{value / 1024 / 1024:8.1f} MB"
+
+def retained(build) -> tuple:
+    """Construir un DataFrame y medir la memoria que queda asignada mientras vive"""
+    arrow_before = pa.total_allocated_bytes()
+    tracemalloc.start()
+    df = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return df, current + pa.total_allocated_bytes() - arrow_before
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE
+    products = make_catalog(size)
+
+    # Copia profunda: el catálogo completo retiene los dicts originales de la API
+    full, full_bytes = retained(lambda: normalize_products(copy.deepcopy(products), DISCOUNT_PERCENTAGE))
+    lean, lean_bytes = retained(lambda: to_catalog_schema(
+        normalize_products(copy.deepcopy(products), DISCOUNT_PERCENTAGE)))
+
+    before = full.memory_usage(deep=True, index=False)
+    after = lean.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        'antes': before,
+        'después': after,
+        'tipo antes': full.dtypes.astype(str),
+        'tipo después': lean.dtypes.astype(str),
+    })
+
+    print(f"Catálogo sintético de {size:,} productos\n")
+    print(f"{'columna':<20}{'antes':>12}{'después':>12}  tipo")
+    for column, row in report.iterrows():
+        after_text = megabytes(row['después']) if pd.notna(row['después']) else '   (lateral)'
+        print(f"{column:<20}{megabytes(row['antes']):>12}{after_text:>12}  "
+              f"{row['tipo antes']} → {row['tipo después'] if pd.notna(row['tipo después']) else '-'}")
+
+    print(f"\n{'memory_usage(deep)':<20}{megabytes(before.sum()):>12}{megabytes(after.sum()):>12}")
+    print(f"{'retenida':<20}{megabytes(full_bytes):>12}{megabytes(lean_bytes):>12}")
+    print(f"\nReducción: x{full_bytes / lean_bytes:.1f} (memoria retenida)")
+
+if __name__ == '__main__':
+    main()
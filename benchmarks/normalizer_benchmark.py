@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Benchmark: normalización por fila original frente a normalize_products (en bloque)
+
+Genera catálogos sintéticos con la forma de la API de WooCommerce, comprueba que
+normalize_products da las mismas filas que el process_product original (copiado
+aquí como referencia) y mide el tiempo de cada uno y de la reducción al esquema
+compacto. Los demás benchmarks usan make_catalog y make_manager de este módulo.
+
+Uso:
+    python benchmarks/normalizer_benchmark.py [tamaño ...]
+"""
+import os
+import sys
+import time
+import random
+import logging
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import pandas as pd
+from api_connector import ProductManager
+from category_facets import CATEGORY_SEPARATOR, join_category_list
+from normalizer import normalize_products, to_catalog_schema
+from material_classifier import MaterialClassifier
+from streamlit_config import get_config
+
+DISCOUNT_PERCENTAGE = 35
+DEFAULT_SIZES = [10_000, 100_000]
+
+def make_product(i: int, rng: random.Random) -> dict:
+    """Producto sintético con las variantes que se ven en las tiendas"""
+    price = f"{rng.uniform(10_000, 900_000):.2f}"
+    product = {
+        'id': i,
+        'sku': f"SKU-{i:06d}" if rng.random() > 0.02 else '',
+        'name': f"Producto {i}",
+        'slug': f"producto-{i}",
+        'permalink': f"https://tienda.test/producto-{i}",
+        'categories': [{'id': 1, 'name': 'Anillos'}, {'id': 2, 'name': 'Novedades'}][:rng.randint(0, 2)],
+        'attributes': [],
+        'price': price if rng.random() > 0.1 else '',
+        'regular_price': price,
+        'sale_price': '',
+        'stock_quantity': rng.choice([None, 0, 3, 12]),
+        'status': 'publish',
+        'date_modified': f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T10:{rng.randint(0, 59):02d}:00",
+        'images': [{'src': f"https://tienda.test/img/{i}.jpg"}] if rng.random() > 0.05 else [],
+        'tags': [{'name': 'oferta'}] if rng.random() > 0.7 else [],
+        'type': 'simple',
+        'featured': rng.random() > 0.9,
+        'description': rng.choice(['<p>Anillo en oro 18k</p>', '<p>Cadena de plata</p>',
+                                   '<p>Reloj de acero</p>', '<p>Accesorio</p>']),
+        'short_description': '',
+    }
+    if rng.random() > 0.6:
+        product['attributes'] = [{'name': 'Material', 'options': ['Oro Laminado']}]
+    return product
+
+def make_catalog(size: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    products = [make_product(i, rng) for i in range(size)]
+    # Casos límite que process_product convierte en filas de error o valores por defecto
+    if size >= 4:
+        products[1]['price'] = 'no-es-precio'
+        products[2]['stock_quantity'] = '4.5'
+        products[3]['tags'] = None
+    return products
+
+def make_manager(config) -> ProductManager:
+    """ProductManager solo para normalizar, sin configurar las APIs"""
+    manager = ProductManager.__new__(ProductManager)
+    manager.config = config
+    manager.material_classifier = MaterialClassifier()
+    return manager
+
+def legacy_process_product(product: dict, index: int, discount_percentage: float,
+                           classifier: MaterialClassifier) -> dict:
+    """Normalización de un producto tal como la hacía process_product, fila por fila"""
+    try:
+        price = 0
+        if product.get('price'):
+            price = float(product['price'])
+        elif product.get('regular_price'):
+            price = float(product['regular_price'])
+        elif product.get('sale_price'):
+            price = float(product['sale_price'])
+        discount_price = price * (1 - discount_percentage / 100)
+
+        categories = category_list = 'Sin categoría'
+        if product.get('categories') and isinstance(product['categories'], list):
+            names = [cat.get('name', '') for cat in product['categories']]
+            categories = CATEGORY_SEPARATOR.join(names)
+            category_list = join_category_list(names)
+
+        material = classifier.from_attributes(product.get('attributes'))
+        if material is None:
+            material = classifier.from_text(product.get('description', '') + product.get('short_description', ''))
+
+        stock = 0
+        if product.get('stock_quantity') is not None:
+            stock = int(product['stock_quantity'])
+
+        date_modified = datetime.now()
+        if product.get('date_modified'):
+            try:
+                date_modified = datetime.fromisoformat(product['date_modified'].replace('Z', '+00:00'))
+            except:
+                pass
+
+        image_url = ''
+        if product.get('images') and isinstance(product['images'], list) and len(product['images']) > 0:
+            image_url = product['images'][0].get('src', '')
+
+        sku = product.get('sku', f'PROD-{index}')
+        if not sku or sku == 'None':
+            sku = f'PROD-{index}'
+        name = product.get('name', 'Sin nombre')
+        if not name or name == 'None':
+            name = 'Sin nombre'
+
+        return {
+            'id': product.get('id', f'temp_{index}'),
+            'sku': str(sku),
+            'name': str(name),
+            'slug': product.get('slug', ''),
+            'permalink': product.get('permalink', ''),
+            'categories': categories,
+            'category_list': category_list,
+            'material': material,
+            'price': price,
+            'discount_price': discount_price,
+            'stock': stock,
+            'status': product.get('status', 'draft'),
+            'date_modified': date_modified,
+            'image_url': image_url,
+            'description': product.get('description', ''),
+            'short_description': product.get('short_description', ''),
+            'weight': product.get('weight', ''),
+            'dimensions': product.get('dimensions', {}),
+            'tags': ', '.join([tag.get('name', '') for tag in product.get('tags', [])]),
+            'attributes': product.get('attributes', []),
+            'variations': product.get('variations', []),
+            'type': product.get('type', 'simple'),
+            'featured': product.get('featured', False),
+            'catalog_visibility': product.get('catalog_visibility', 'visible'),
+            'raw_data': product
+        }
+    except Exception:
+        return {'id': f'ERROR-{index}', 'sku': f'ERROR-{index}'}
+
+def per_row(manager: ProductManager, products: list) -> list:
+    return [legacy_process_product(product, i, DISCOUNT_PERCENTAGE, manager.material_classifier)
+            for i, product in enumerate(products)]
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    os.environ.setdefault('DISCOUNT_PERCENTAGE', str(DISCOUNT_PERCENTAGE))
+    logging.disable(logging.ERROR)
+
+    manager = make_manager(get_config())
+
+    for size in sizes:
+        products = make_catalog(size)
+
+        start = time.perf_counter()
+        expected = per_row(manager, products)
+        pd.DataFrame(expected)
+        row_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = normalize_products(products, DISCOUNT_PERCENTAGE, classifier=manager.material_classifier)
+        batch_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        to_catalog_schema(result)
+        schema_seconds = time.perf_counter() - start
+
+        # Mismos productos en error; las demás filas, idénticas
+        assert result['sku'].tolist() == [row['sku'] for row in expected]
+        valid = [not str(row['id']).startswith('ERROR-') for row in expected]
+        pd.testing.assert_frame_equal(result[valid].reset_index(drop=True).infer_objects(),
+                                      pd.DataFrame([row for row, ok in zip(expected, valid) if ok]))
+
+        print(f"{size:>8,} productos | por fila {row_seconds:7.3f} s | en bloque {batch_seconds:7.3f} s | "
+              f"x{row_seconds / batch_seconds:5.1f} | esquema compacto {schema_seconds:7.3f} s")
+
+if __name__ == '__main__':
+    main()
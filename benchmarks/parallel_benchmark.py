@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Benchmark: normalización en un proceso frente al pool de procesos
+
+Para cada número de procesos mide el arranque del pool (primera carga) y una
+carga con el pool ya iniciado. También mide el tiempo de CPU del proceso
+principal, que es el que comparte el GIL con el servidor de Streamlit. La
+igualdad con la normalización en un solo proceso se prueba en
+tests/test_parallel_normalizer.py.
+
+Uso (con .streamlit/secrets.toml o variables de entorno disponibles):
+    python benchmarks/parallel_benchmark.py [productos] [procesos ...]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from normalizer import normalize_products, to_catalog_schema
+from parallel_normalizer import normalize_products_parallel, shutdown_process_pool
+from normalizer_benchmark import make_catalog, make_manager, DISCOUNT_PERCENTAGE
+from streamlit_config import get_config
+
+DEFAULT_SIZE = 200_000
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE
+    cpus = os.cpu_count() or 1
+    worker_counts = [int(arg) for arg in sys.argv[2:]] or sorted({2, 4, cpus} - {1})
+
+    manager = make_manager(get_config())
+    products = make_catalog(size)
+    print(f"{size:,} productos, {cpus} CPU disponibles")
+
+    start, cpu_start = time.perf_counter(), time.process_time()
+    to_catalog_schema(normalize_products(products, DISCOUNT_PERCENTAGE,
+                                         classifier=manager.material_classifier))
+    sequential, sequential_cpu = time.perf_counter() - start, time.process_time() - cpu_start
+    print(f"{'1 proceso':<12} |                    | {sequential:7.3f} s | CPU principal {sequential_cpu:6.3f} s")
+
+    for workers in worker_counts:
+        timings = []
+        for _ in range(2):
+            start, cpu_start = time.perf_counter(), time.process_time()
+            normalize_products_parallel(products, DISCOUNT_PERCENTAGE, workers,
+                                        classifier=manager.material_classifier)
+            timings.append(time.perf_counter() - start)
+        main_cpu = time.process_time() - cpu_start
+
+        print(f"{workers:>2} procesos  | arranque {timings[0]:7.3f} s | {timings[1]:7.3f} s "
+              f"| CPU principal {main_cpu:6.3f} s | x{sequential / timings[1]:4.1f}")
+        shutdown_process_pool()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark del índice de búsqueda por SKU y nombre
+
+Arma un catálogo sintético con nombres con tildes y mide el armado del índice
+y cada búsqueda frente a str.contains sobre name y sku (lo que hacía cada
+rerun de la página). Que las filas sean las de recorrer todo el catálogo se
+prueba en tests/test_search_index.py.
+
+Uso:
+    python benchmarks/search_benchmark.py [productos]
+"""
+import os
+import sys
+import time
+import random
+import logging
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+import pandas as pd
+from search_index import SearchIndex
+
+DEFAULT_SIZE = 100_000
+REPEAT = 5
+PIECES = ['Anillo Solitario', 'Cadena Eslabón', 'Pulsera Tenis', 'Aretes Argolla', 'Dije Corazón',
+          'Reloj Clásico', 'Tobillera', 'Candongas']
+DETAILS = ['Pequeña', 'Mediana', 'Grande', 'Niña', 'Caballero', '']
+MATERIALS = ['Oro Laminado 18k', 'Plata 925', 'Acero Quirúrgico', 'Rodio', 'Oro Rosa']
+QUERIES = ['ANI-000123', 'ani-0001', 'corazon', 'Pequeña', 'oro laminado', '18', 'a', '(', 'zzzz']
+
+def make_catalog(size: int, rng: random.Random) -> pd.DataFrame:
+    names, skus = [], []
+    for i in range(size):
+        piece = rng.choice(PIECES)
+        names.append(f"{piece} {rng.choice(DETAILS)} {rng.choice(MATERIALS)} ref {rng.randint(1, 9999)}")
+        skus.append(f"{piece[:3].upper()}-{i:06d}" if rng.random() > 0.02 else '')
+    # Un nombre que menciona el SKU de otra fila: el SKU exacto va primero igual
+    skus[123] = 'ANI-000123'
+    names[7] = f"Combo con {skus[123]}"
+    return pd.DataFrame({'sku': skus, 'name': names})
+
+def old_search(df: pd.DataFrame, term: str) -> np.ndarray:
+    """La búsqueda anterior (expresión regular, sensible a tildes)"""
+    return np.flatnonzero(df['name'].str.contains(term, case=False, na=False) |
+                          df['sku'].str.contains(term, case=False, na=False))
+
+def timed(function) -> float:
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        function()
+    return (time.perf_counter() - start) / REPEAT
+
+def main():
+    logging.disable(logging.INFO)
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE
+    df = make_catalog(size, random.Random(17))
+
+    start = time.perf_counter()
+    index = SearchIndex.from_frame(df)
+    build_seconds = time.perf_counter() - start
+
+    print(f"{size:,} productos, índice armado en {build_seconds * 1000:.0f} ms")
+    print(f"{'búsqueda':<16} {'filas':>8} {'índice':>10} {'str.contains':>14}")
+    for term in QUERIES:
+        rows = len(index.search(term))
+        index_seconds = timed(lambda: index.search(term))
+        try:
+            old_seconds = timed(lambda: old_search(df, term))
+            old = f"{old_seconds * 1000:11.1f} ms"
+        except Exception:
+            # "(" no es una expresión regular válida
+            old = f"{'error':>14}"
+        print(f"{term!r:<16} {rows:>8,} {index_seconds * 1000:7.2f} ms {old}")
+
+if __name__ == '__main__':
+    main()
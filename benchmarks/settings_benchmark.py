@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: acceso a la configuración durante la normalización de productos
+
+Cuenta las llamadas a get_secret mientras se normaliza un catálogo (con
+process_product y con ProductManager.normalize_catalog) y compara con el costo de
+construir StreamlitConfig por producto, como hacía antes process_product.
+
+Uso (con .streamlit/secrets.toml o variables de entorno disponibles):
+    python benchmarks/settings_benchmark.py [productos]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import streamlit_config
+from normalizer_benchmark import make_catalog, make_manager
+
+DEFAULT_SIZE = 10_000
+
+class SecretCounter:
+    """Envoltorio de get_secret que cuenta las llamadas"""
+
+    def __init__(self, get_secret):
+        self.get_secret = get_secret
+        self.calls = 0
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        return self.get_secret(*args, **kwargs)
+
+def measure(label: str, counter: SecretCounter, func):
+    counter.calls = 0
+    start = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - start
+    print(f"{label:<40} {seconds:7.3f} s | llamadas a get_secret: {counter.calls:,}")
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE
+    products = make_catalog(size)
+
+    counter = SecretCounter(streamlit_config.get_secret)
+    streamlit_config.get_secret = counter
+
+    # Configuración resuelta una vez, como en el arranque de la aplicación
+    config = streamlit_config.get_config()
+    manager = make_manager(config)
+
+    print(f"{size:,} productos")
+    measure("StreamlitConfig() por producto (antes)", counter,
+            lambda: [streamlit_config.StreamlitConfig() for _ in products])
+    measure("process_product por fila", counter,
+            lambda: [manager.process_product(product, i) for i, product in enumerate(products)])
+    measure("normalize_catalog", counter, lambda: manager.normalize_catalog(products))
+
+if __name__ == '__main__':
+    main()
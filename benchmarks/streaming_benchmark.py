@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark: descargar todo y normalizar al final frente a normalizar por página
+
+Simula una tienda con una API sintética (cada página se genera al pedirla, con
+una espera que hace de red) y compara los dos caminos: get_all_products +
+normalize_catalog y iter_pages + StreamingCatalogBuilder. Mide el tiempo total,
+el tiempo hasta la primera fila normalizada y el pico de memoria del proceso
+(cada modo en un subproceso). La igualdad de los catálogos se prueba en
+tests/test_streaming_catalog.py.
+
+Uso (con .streamlit/secrets.toml o variables de entorno disponibles):
+    python benchmarks/streaming_benchmark.py [productos] [segundos por página]
+"""
+import os
+import sys
+import json
+import time
+import random
+import resource
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from api_connector import WooCommerceAPI
+from streaming_catalog import StreamingCatalogBuilder
+from normalizer_benchmark import make_product, make_manager
+from streamlit_config import get_config
+
+DEFAULT_SIZE = 50_000
+DEFAULT_PAGE_DELAY = 0.02
+PER_PAGE = 100
+WORKERS = 4
+
+class SyntheticAPI(WooCommerceAPI):
+    """Tienda sintética: genera cada página al pedirla, sin red"""
+
+    def __init__(self, size: int, page_delay: float):
+        super().__init__('https://tienda.test/wp-json/wc/v3/products', 'ck', 'cs', 'OroColmbia',
+                         max_workers=WORKERS, per_page=PER_PAGE, config=get_config())
+        self.size = size
+        self.page_delay = page_delay
+
+    def get_page(self, page: int = 1, per_page: int = 100, extra_params=None):
+        time.sleep(self.page_delay)
+        rng = random.Random(page)
+        start = (page - 1) * per_page
+        products = [make_product(i, rng) for i in range(start, min(start + per_page, self.size))]
+        return products, -(-self.size // per_page)
+
+def run(mode: str, size: int, page_delay: float) -> dict:
+    """Cargar el catálogo con un modo y devolver los tiempos"""
+    manager = make_manager(get_config())
+    api = SyntheticAPI(size, page_delay)
+    max_pages = -(-size // PER_PAGE)
+    first_row = None
+
+    start = time.perf_counter()
+    if mode == 'collect':
+        products = api.get_all_products(max_pages=max_pages)
+        df = manager.normalize_catalog(products)
+        del products
+    else:
+        def on_chunk(source_name, chunk):
+            nonlocal first_row
+            if first_row is None:
+                first_row = time.perf_counter() - start
+
+        builder = StreamingCatalogBuilder(api.source_name, PER_PAGE, manager.normalize_catalog,
+                                          chunk_callback=on_chunk)
+        for page, products in api.iter_pages(max_pages=max_pages):
+            builder.add_page(page, products)
+        df = builder.build()
+    total = time.perf_counter() - start
+
+    return {'total': total, 'first_row': first_row if first_row is not None else total, 'rows': len(df)}
+
+def peak_memory_mb() -> float:
+    # ru_maxrss está en KB en Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def child(mode: str, size: int, page_delay: float):
+    timings = run(mode, size, page_delay)
+    timings['peak_mb'] = peak_memory_mb()
+    print(json.dumps(timings))
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE
+    page_delay = float(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_PAGE_DELAY
+
+    print(f"{size:,} productos, {PER_PAGE} por página, {WORKERS} workers, {page_delay * 1000:.0f} ms por página")
+    for mode in ('collect', 'stream'):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--child', mode, str(size), str(page_delay)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        timings = json.loads(output.strip().splitlines()[-1])
+        label = 'descargar y normalizar' if mode == 'collect' else 'normalizar por página'
+        print(f"{label:<24} | {timings['rows']:,} filas | total {timings['total']:6.2f} s "
+              f"| primera fila {timings['first_row']:6.2f} s | pico de memoria {timings['peak_mb']:7.1f} MB")
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        child(sys.argv[2], int(sys.argv[3]), float(sys.argv[4]))
+    else:
+        main()
@@ -1,27 +1,94 @@
 """
 Módulo para conectar con las APIs de WooCommerce
 """
+import os
+import asyncio
 import requests
 import time
 import logging
-from typing import List, Dict, Any, Optional
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Tuple, Union, AbstractSet, Iterator
+from requests.adapters import HTTPAdapter
 from datetime import datetime
 import pandas as pd
-from streamlit_config import StreamlitConfig
+from streamlit_config import StreamlitConfig, get_config
+from sync_state import get_sync_state, utc_now
+from normalizer import normalize_product, normalize_products, to_catalog_schema, next_placeholder_index, STRING_DTYPE
+from raw_store import RawProductStore, RAW_STORE_FILE
+from kardex_store import KardexStore, KARDEX_FILE
+from catalog_history import get_catalog_history
+from material_classifier import MaterialClassifier, parse_extra_materials
+from parallel_normalizer import normalize_products_parallel
+from streaming_catalog import StreamingCatalogBuilder, DEFAULT_BATCH_SIZE
+from catalog_diff import CatalogDiff, get_catalog_diff, NEW
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Campos que usa el dashboard (proyección _fields de la API REST).
+# description/short_description se mantienen porque process_product detecta el
+# material en ellas cuando los atributos no lo traen. 'images' no se puede
+# recortar a la primera imagen desde el servidor.
+CATALOG_FIELDS = [
+    'id', 'sku', 'name', 'slug', 'permalink', 'categories', 'attributes',
+    'price', 'regular_price', 'sale_price', 'stock_quantity', 'status',
+    'date_modified', 'images', 'tags', 'type', 'featured',
+    'description', 'short_description'
+]
+
+# Catálogo de referencia (GrupoFelmel): la comparación con OroColmbia solo usa SKUs.
+# El id permite fusionar sincronizaciones incrementales y detectar cambios de SKU.
+SKU_FIELDS = ['id', 'sku']
+
+# Máximo per_page que acepta la API REST de WooCommerce
+MAX_PER_PAGE = 100
+
+# Páginas descargadas que pueden esperar a ser procesadas (por encima frenan la descarga)
+PAGE_QUEUE_SIZE = 8
+
+def build_reference_frame(products: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Construir el catálogo de referencia (id, sku) sin pasar por process_product
+    
+    Args:
+        products: Productos raw proyectados a SKU_FIELDS
+        
+    Returns:
+        DataFrame compacto con las columnas id y sku (SKUs vacíos descartados)
+    """
+    rows = [
+        (product.get('id'), str(product['sku']))
+        for product in products
+        if product.get('sku') and product['sku'] != 'None'
+    ]
+    return pd.DataFrame(rows, columns=['id', 'sku']).astype({'sku': STRING_DTYPE})
+
 class WooCommerceAPI:
     """Clase para conectar con APIs de WooCommerce"""
     
-    def __init__(self, url: str, consumer_key: str, consumer_secret: str, source_name: str):
+    def __init__(self, url: str, consumer_key: str, consumer_secret: str, source_name: str,
+                 max_workers: int = 1, fields: Optional[List[str]] = None,
+                 per_page: Optional[int] = None, config: Optional[StreamlitConfig] = None):
         self.url = url
         self.consumer_key = consumer_key
         self.consumer_secret = consumer_secret
         self.source_name = source_name
+        self.max_workers = max(1, int(max_workers))
+        # Proyección de campos (None = objeto de producto completo)
+        self.fields = list(fields) if fields else None
         self.session = requests.Session()
-        self.config = StreamlitConfig()
+        self.config = config or get_config()
+        self.per_page = int(per_page or self.config.PRODUCTS_PER_PAGE)
+        
+        # False si la última descarga completa perdió páginas por errores
+        self.last_crawl_complete = True
+        
+        # El pool de conexiones debe alcanzar para todos los workers concurrentes
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(10, self.max_workers))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         
         # Configurar autenticación
         self.session.auth = (consumer_key, consumer_secret)
@@ -31,17 +98,37 @@ class WooCommerceAPI:
             'Content-Type': 'application/json'
         })
     
-    def get_products(self, page: int = 1, per_page: int = 100) -> List[Dict[str, Any]]:
+    def get_products(self, page: int = 1, per_page: int = 100,
+                     extra_params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """
         Obtener productos de una página específica
         
         Args:
             page: Número de página
             per_page: Productos por página
+            extra_params: Parámetros adicionales de la consulta (p. ej. modified_after)
             
         Returns:
             Lista de productos
         """
+        return self.get_page(page, per_page, extra_params)[0]
+    
+    def get_page(self, page: int = 1, per_page: int = 100,
+                 extra_params: Optional[Dict[str, Any]] = None) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        Obtener productos de una página junto con el total de páginas
+        
+        El total se devuelve en lugar de guardarse en la instancia: las páginas se
+        piden desde varios hilos a la vez.
+        
+        Args:
+            page: Número de página
+            per_page: Productos por página
+            extra_params: Parámetros adicionales de la consulta (p. ej. modified_after)
+            
+        Returns:
+            Tuple (productos, X-WP-TotalPages o None si la respuesta no lo trae)
+        """
         params = {
             'page': page,
             'per_page': per_page,
@@ -49,6 +136,10 @@ class WooCommerceAPI:
             'order': 'desc',
             'status': 'publish'
         }
+        if self.fields:
+            params['_fields'] = ','.join(self.fields)
+        if extra_params:
+            params.update(extra_params)
         
         try:
             # Log más simple para evitar spam en cloud
@@ -59,11 +150,12 @@ class WooCommerceAPI:
             response.raise_for_status()
             
             products = response.json()
+            total_pages = self._read_total_pages(response)
             
             if page == 1 or page % 5 == 0:  # Solo log cada 5 páginas
                 logger.info(f"{self.source_name} página {page}: {len(products)} productos")
             
-            return products
+            return products, total_pages
             
         except requests.exceptions.RequestException as e:
             logger.error(f"Error consultando {self.source_name} página {page}: {str(e)}")
@@ -71,89 +163,306 @@ class WooCommerceAPI:
             logger.error(f"Response status: {response.status_code if 'response' in locals() else 'No response'}")
             raise
     
-    def get_all_products(self, progress_callback=None, max_pages=None) -> List[Dict[str, Any]]:
+    def _read_total_pages(self, response: requests.Response) -> Optional[int]:
+        """Total de páginas que WooCommerce envía en X-WP-TotalPages (None si falta o no es válido)"""
+        try:
+            if response.headers.get('X-WP-TotalPages') is not None:
+                return int(response.headers['X-WP-TotalPages'])
+        except (TypeError, ValueError):
+            logger.warning(f"{self.source_name}: Cabeceras de paginación inválidas")
+        return None
+    
+    @staticmethod
+    def _expected_pages(total_pages: Optional[int], max_pages: int) -> Optional[int]:
+        """Páginas que tendrá la descarga actual según X-WP-TotalPages (None si no se conoce)"""
+        if total_pages is None:
+            return None
+        return min(total_pages, max_pages)
+    
+    def get_all_products(self, progress_callback=None, max_pages=None,
+                         extra_params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """
         Obtener todos los productos paginando automáticamente
         
+        Si la tienda tiene más de un worker configurado (max_workers > 1) las páginas
+        restantes se descargan en paralelo a partir del total de páginas que informa
+        la primera respuesta.
+        
         Args:
-            progress_callback: Función para reportar progreso
+            progress_callback: Función (source_name, página, productos acumulados,
+                productos de la página, total de páginas o None) llamada por página
             max_pages: Límite máximo de páginas (para evitar timeouts en cloud)
+            extra_params: Parámetros adicionales para todas las páginas
             
         Returns:
-            Lista completa de productos
+            Lista completa de productos, en orden de página
         """
+        pages = dict(self.iter_pages(progress_callback, max_pages, extra_params))
+        
+        # Ensamblar en orden de página para un resultado determinista
         all_products = []
-        page = 1
-        consecutive_errors = 0
-        max_consecutive_errors = 3
+        for page in sorted(pages):
+            all_products.extend(pages[page])
+        return all_products
+    
+    def iter_pages(self, progress_callback=None, max_pages=None,
+                   extra_params: Optional[Dict[str, Any]] = None) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        Descargar el catálogo entregando cada página en cuanto llega
         
+        Con max_workers > 1 las páginas pueden llegar en desorden; quien consume
+        puede procesarlas y soltarlas sin esperar al resto de la descarga.
+        
+        Args:
+            progress_callback: Función de progreso (ver get_all_products)
+            max_pages: Límite máximo de páginas (para evitar timeouts en cloud)
+            extra_params: Parámetros adicionales para todas las páginas
+            
+        Yields:
+            Tuple (número de página, productos de la página)
+        """
         # Límite de páginas para evitar timeouts en Streamlit Cloud
         if max_pages is None:
             max_pages = 50  # Límite por defecto para cloud
         
+        self.last_crawl_complete = True
+        
+        if self.max_workers > 1:
+            yield from self._iter_pages_concurrent(progress_callback, max_pages, extra_params)
+        else:
+            yield from self._iter_pages_sequential(progress_callback, max_pages, extra_params)
+    
+    def _iter_pages_sequential(self, progress_callback, max_pages: int,
+                               extra_params: Optional[Dict[str, Any]] = None,
+                               start_page: int = 1,
+                               fetched_count: int = 0,
+                               total_pages: Optional[int] = None) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        Paginar una página a la vez con pausas entre peticiones
+        
+        Args:
+            progress_callback: Función para reportar progreso
+            max_pages: Límite máximo de páginas
+            extra_params: Parámetros adicionales para todas las páginas
+            start_page: Página desde la que se continúa
+            fetched_count: Productos ya obtenidos (al continuar una descarga)
+            total_pages: X-WP-TotalPages ya conocido (al continuar una descarga)
+            
+        Yields:
+            Tuple (número de página, productos de la página)
+        """
+        page = start_page
+        consecutive_errors = 0
+        max_consecutive_errors = 3
+        
         while consecutive_errors < max_consecutive_errors and page <= max_pages:
             try:
-                products = self.get_products(page=page, per_page=self.config.PRODUCTS_PER_PAGE)
-                
-                if not products:
-                    logger.info(f"{self.source_name}: No hay más productos")
-                    break
-                
-                all_products.extend(products)
-                consecutive_errors = 0  # Reset counter
-                
-                # Callback para progreso
-                if progress_callback:
-                    progress_callback(self.source_name, page, len(all_products), len(products))
-                
-                # Si obtuvimos menos productos que el límite, es la última página
-                if len(products) < self.config.PRODUCTS_PER_PAGE:
-                    logger.info(f"{self.source_name}: Última página alcanzada")
-                    break
-                
-                page += 1
-                
-                # Delay para evitar rate limiting
-                delay = 1.0 if self.source_name == 'GrupoFelmel' else 0.5
-                time.sleep(delay)
-                
+                products, page_total = self.get_page(page=page, per_page=self.per_page,
+                                                     extra_params=extra_params)
             except Exception as e:
                 consecutive_errors += 1
                 logger.warning(f"Error en {self.source_name} página {page} (intento {consecutive_errors}): {str(e)}")
                 
                 if consecutive_errors >= max_consecutive_errors:
                     logger.error(f"Demasiados errores en {self.source_name}. Usando datos parciales.")
+                    self.last_crawl_complete = False
                     break
                 else:
                     # Esperar más tiempo antes del siguiente intento
                     time.sleep(consecutive_errors * 2)
+                continue
+            
+            if not products:
+                logger.info(f"{self.source_name}: No hay más productos")
+                break
+            
+            fetched_count += len(products)
+            consecutive_errors = 0  # Reset counter
+            if page_total is not None:
+                total_pages = page_total
+            
+            # Callback para progreso
+            if progress_callback:
+                progress_callback(self.source_name, page, fetched_count, len(products),
+                                  self._expected_pages(total_pages, max_pages))
+            
+            yield page, products
+            
+            # Si obtuvimos menos productos que el límite, es la última página
+            if len(products) < self.per_page:
+                logger.info(f"{self.source_name}: Última página alcanzada")
+                break
+            
+            page += 1
+            
+            # Delay para evitar rate limiting
+            delay = 1.0 if self.source_name == 'GrupoFelmel' else 0.5
+            time.sleep(delay)
         
         if page > max_pages:
-            logger.warning(f"{self.source_name}: Alcanzado límite de {max_pages} páginas. Productos obtenidos: {len(all_products)}")
+            logger.warning(f"{self.source_name}: Alcanzado límite de {max_pages} páginas. Productos obtenidos: {fetched_count}")
         
-        logger.info(f"{self.source_name}: {len(all_products)} productos obtenidos")
-        return all_products
+        logger.info(f"{self.source_name}: {fetched_count} productos obtenidos")
+    
+    def _get_page_with_retries(self, page: int, per_page: int,
+                               extra_params: Optional[Dict[str, Any]] = None,
+                               max_attempts: int = 3) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        Obtener una página reintentando con espera creciente
+        
+        Args:
+            page: Número de página
+            per_page: Productos por página
+            extra_params: Parámetros adicionales de la consulta
+            max_attempts: Número máximo de intentos
+            
+        Returns:
+            Tuple (productos de la página, X-WP-TotalPages o None)
+        """
+        for attempt in range(1, max_attempts + 1):
+            try:
+                return self.get_page(page=page, per_page=per_page, extra_params=extra_params)
+            except Exception as e:
+                logger.warning(f"Error en {self.source_name} página {page} (intento {attempt}): {str(e)}")
+                if attempt >= max_attempts:
+                    raise
+                time.sleep(attempt * 2)
+    
+    def _iter_pages_concurrent(self, progress_callback, max_pages: int,
+                               extra_params: Optional[Dict[str, Any]] = None
+                               ) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        Paginar en paralelo usando el total de páginas de la primera respuesta
+        
+        Las páginas 2..N se reparten en un pool de max_workers hilos sobre la misma
+        sesión y se entregan en el orden en que terminan. El total de páginas se
+        lee una sola vez, de la primera respuesta; los workers solo reciben su
+        número de página.
+        
+        Args:
+            progress_callback: Función para reportar progreso
+            max_pages: Límite máximo de páginas
+            extra_params: Parámetros adicionales para todas las páginas
+            
+        Yields:
+            Tuple (número de página, productos de la página)
+        """
+        per_page = self.per_page
+        
+        try:
+            first_page, total_pages = self._get_page_with_retries(1, per_page, extra_params)
+        except Exception:
+            logger.error(f"Demasiados errores en {self.source_name}. Usando datos parciales.")
+            self.last_crawl_complete = False
+            return
+        
+        fetched_count = len(first_page)
+        if progress_callback:
+            progress_callback(self.source_name, 1, fetched_count, len(first_page),
+                              self._expected_pages(total_pages, max_pages))
+        
+        yield 1, first_page
+        
+        if len(first_page) < per_page:
+            logger.info(f"{self.source_name}: Última página alcanzada")
+            logger.info(f"{self.source_name}: {fetched_count} productos obtenidos")
+            return
+        
+        if total_pages is None:
+            # Sin cabeceras de paginación no se conoce el total: continuar en secuencia
+            logger.warning(f"{self.source_name}: Sin X-WP-TotalPages, paginando en secuencia")
+            yield from self._iter_pages_sequential(progress_callback, max_pages, extra_params,
+                                                   start_page=2, fetched_count=fetched_count)
+            return
+        
+        last_page = min(total_pages, max_pages)
+        if total_pages > max_pages:
+            logger.warning(f"{self.source_name}: Alcanzado límite de {max_pages} páginas de {total_pages}")
+        
+        fetched_pages = 1
+        executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                      thread_name_prefix=f"woo-{self.source_name}")
+        try:
+            futures = {
+                executor.submit(self._get_page_with_retries, page, per_page, extra_params): page
+                for page in range(2, last_page + 1)
+            }
+            
+            for future in as_completed(futures):
+                page = futures.pop(future)
+                try:
+                    products, _ = future.result()
+                except Exception as e:
+                    logger.error(f"{self.source_name} página {page} descartada: {str(e)}")
+                    self.last_crawl_complete = False
+                    continue
+                
+                fetched_count += len(products)
+                fetched_pages += 1
+                
+                # Callback para progreso (siempre desde el hilo que consume las páginas)
+                if progress_callback:
+                    progress_callback(self.source_name, page, fetched_count, len(products),
+                                      last_page)
+                
+                yield page, products
+        finally:
+            # Si quien consume abandona la descarga, no seguir pidiendo páginas
+            executor.shutdown(wait=True, cancel_futures=True)
+        
+        logger.info(f"{self.source_name}: {fetched_count} productos obtenidos "
+                    f"({fetched_pages}/{last_page} páginas, {self.max_workers} workers)")
 
 class ProductManager:
     """Clase para gestionar productos de ambas APIs"""
     
-    def __init__(self):
-        self.config = StreamlitConfig()
+    def __init__(self, api_client: Optional[str] = None, config: Optional[StreamlitConfig] = None):
+        """
+        Args:
+            api_client: 'sync' (WooCommerceAPI) o 'async' (AsyncWooCommerceAPI);
+                por defecto el valor de API_CLIENT
+            config: Configuración a usar (por defecto la compartida, get_config())
+        """
+        self.config = config or get_config()
         self.config.validate()
+        self.api_client = (api_client or self.config.API_CLIENT).lower()
         
         self.orocolombia_api = WooCommerceAPI(
             url=self.config.OROCOLOMBIA_URL,
             consumer_key=self.config.OROCOLOMBIA_CONSUMER_KEY,
             consumer_secret=self.config.OROCOLOMBIA_CONSUMER_SECRET,
-            source_name='OroColmbia'
+            source_name='OroColmbia',
+            max_workers=self.config.OROCOLOMBIA_MAX_WORKERS,
+            fields=CATALOG_FIELDS if self.config.FIELD_PROJECTION else None,
+            config=self.config
         )
         
         self.grupofelmel_api = WooCommerceAPI(
             url=self.config.GRUPOFELMEL_URL,
             consumer_key=self.config.GRUPOFELMEL_CONSUMER_KEY,
             consumer_secret=self.config.GRUPOFELMEL_CONSUMER_SECRET,
-            source_name='GrupoFelmel'
+            source_name='GrupoFelmel',
+            max_workers=self.config.GRUPOFELMEL_MAX_WORKERS,
+            fields=SKU_FIELDS,
+            per_page=MAX_PER_PAGE,
+            config=self.config
         )
+        
+        # Clasificador de material compilado una vez (con EXTRA_MATERIALS)
+        self.material_classifier = MaterialClassifier(parse_extra_materials(self.config.EXTRA_MATERIALS))
+        
+        # JSON original de cada producto, fuera del catálogo en memoria
+        self.raw_store = RawProductStore(os.path.join(self.config.CACHE_DIR, RAW_STORE_FILE))
+        
+        # Historial de movimientos de precio y stock (kardex)
+        self.kardex = KardexStore(os.path.join(self.config.DATA_DIR, KARDEX_FILE))
+        
+        # Versiones del catálogo procesado para consultas a una fecha
+        self.catalog_history = get_catalog_history(self.config.DATA_DIR)
+        
+        # Filas recibidas por tienda en la última sincronización incremental
+        # (None si la descarga reemplazó el snapshot)
+        self.last_changes: Dict[str, Optional[pd.DataFrame]] = {}
     
     def process_product(self, product: Dict[str, Any], index: int) -> Dict[str, Any]:
         """
@@ -164,139 +473,31 @@ class ProductManager:
             index: Índice del producto
             
         Returns:
-            Producto procesado
+            Producto procesado (ver normalizer.normalize_product)
         """
-        try:
-            # Extraer precio
-            price = 0
-            if product.get('price'):
-                price = float(product['price'])
-            elif product.get('regular_price'):
-                price = float(product['regular_price'])
-            elif product.get('sale_price'):
-                price = float(product['sale_price'])
-            
-            # Calcular precio con descuento
-            config = StreamlitConfig()
-            discount_price = price * (1 - config.DISCOUNT_PERCENTAGE / 100)
-            
-            # Extraer categorías
-            categories = 'Sin categoría'
-            if product.get('categories') and isinstance(product['categories'], list):
-                categories = ', '.join([cat.get('name', '') for cat in product['categories']])
-            
-            # Extraer material de atributos
-            material = 'N/A'
-            if product.get('attributes') and isinstance(product['attributes'], list):
-                for attr in product['attributes']:
-                    name = attr.get('name', '').lower()
-                    if any(term in name for term in ['material', 'composición', 'metal', 'tipo']):
-                        if attr.get('options'):
-                            material = ', '.join(attr['options'])
-                            break
-            
-            # Si no hay material en atributos, buscar en descripción
-            if material == 'N/A':
-                description = (product.get('description', '') + product.get('short_description', '')).lower()
-                if 'oro' in description:
-                    material = 'Oro'
-                elif 'plata' in description:
-                    material = 'Plata'
-                elif 'acero' in description:
-                    material = 'Acero Inoxidable'
-                elif 'titanio' in description:
-                    material = 'Titanio'
-            
-            # Extraer stock
-            stock = 0
-            if product.get('stock_quantity') is not None:
-                stock = int(product['stock_quantity'])
-            
-            # Fecha de modificación
-            date_modified = datetime.now()
-            if product.get('date_modified'):
-                try:
-                    date_modified = datetime.fromisoformat(product['date_modified'].replace('Z', '+00:00'))
-                except:
-                    pass
-            
-            # Imagen principal
-            image_url = ''
-            if product.get('images') and isinstance(product['images'], list) and len(product['images']) > 0:
-                image_url = product['images'][0].get('src', '')
-            
-            # Validar que el SKU no sea None o vacío
-            sku = product.get('sku', f'PROD-{index}')
-            if not sku or sku == 'None':
-                sku = f'PROD-{index}'
-            
-            # Validar que el name no sea None
-            name = product.get('name', 'Sin nombre')
-            if not name or name == 'None':
-                name = 'Sin nombre'
-            
-            return {
-                'id': product.get('id', f'temp_{index}'),
-                'sku': str(sku),  # Asegurar que sea string
-                'name': str(name),  # Asegurar que sea string
-                'slug': product.get('slug', ''),
-                'permalink': product.get('permalink', ''),
-                'categories': categories,
-                'material': material,
-                'price': price,
-                'discount_price': discount_price,
-                'stock': stock,
-                'status': product.get('status', 'draft'),
-                'date_modified': date_modified,
-                'image_url': image_url,
-                'description': product.get('description', ''),
-                'short_description': product.get('short_description', ''),
-                'weight': product.get('weight', ''),
-                'dimensions': product.get('dimensions', {}),
-                'tags': ', '.join([tag.get('name', '') for tag in product.get('tags', [])]),
-                'attributes': product.get('attributes', []),
-                'variations': product.get('variations', []),
-                'type': product.get('type', 'simple'),
-                'featured': product.get('featured', False),
-                'catalog_visibility': product.get('catalog_visibility', 'visible'),
-                'raw_data': product  # Guardar datos originales por si acaso
-            }
-            
-        except Exception as e:
-            logger.error(f"Error procesando producto {index}: {str(e)}")
-            return {
-                'id': f'ERROR-{index}',
-                'sku': f'ERROR-{index}',
-                'name': 'Error al procesar',
-                'slug': '',
-                'permalink': '',
-                'categories': 'Error',
-                'material': 'Error',
-                'price': 0,
-                'discount_price': 0,
-                'stock': 0,
-                'status': 'draft',
-                'date_modified': datetime.now(),
-                'image_url': '',
-                'description': '',
-                'short_description': '',
-                'weight': '',
-                'dimensions': {},
-                'tags': '',
-                'attributes': [],
-                'variations': [],
-                'type': 'simple',
-                'featured': False,
-                'catalog_visibility': 'visible',
-                'raw_data': {}
-            }
+        return normalize_product(product, index, self.config.DISCOUNT_PERCENTAGE, self.material_classifier)
     
-    def fetch_all_products(self, progress_callback=None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    def fetch_all_products(self, progress_callback=None, incremental: Optional[bool] = None,
+                           stage_callback=None, chunk_callback=None) -> tuple[pd.DataFrame, pd.DataFrame]:
         """
         Obtener todos los productos de ambas APIs
         
+        Con sincronización incremental cada tienda pide solo los productos con
+        modified_after posterior a su última sincronización exitosa y los fusiona
+        por id en el snapshot guardado; cada FULL_SYNC_INTERVAL_HOURS (o si no hay
+        snapshot) se hace una descarga completa que elimina los productos borrados.
+        
+        Cada página se normaliza en cuanto llega y su JSON se suelta (ver
+        StreamingCatalogBuilder), así que nunca se tiene el catálogo raw completo
+        en memoria.
+        
         Args:
-            progress_callback: Función para reportar progreso
+            progress_callback: Función para reportar progreso por página
+            incremental: Forzar (True) o desactivar (False) la sincronización
+                incremental; por defecto el valor de INCREMENTAL_SYNC
+            stage_callback: Función (etapa, source_name) llamada al procesar cada tienda
+            chunk_callback: Función (source_name, bloque) llamada con cada bloque de
+                filas normalizadas durante la descarga
             
         Returns:
             Tuple con DataFrames de (OroColmbia, GrupoFelmel)
@@ -310,56 +511,371 @@ class ProductManager:
         
         logger.info(f"Ejecutando en {'Streamlit Cloud' if is_cloud else 'desarrollo local'}")
         
-        # Obtener productos de OroColmbia
-        logger.info("Obteniendo productos de OroColmbia...")
-        orocolombia_products = self.orocolombia_api.get_all_products(progress_callback, max_pages)
-        logger.info(f"Productos obtenidos de OroColmbia: {len(orocolombia_products)}")
+        if incremental is None:
+            incremental = self.config.INCREMENTAL_SYNC
         
-        orocolombia_processed = [
-            self.process_product(product, i) 
-            for i, product in enumerate(orocolombia_products)
-        ]
-        logger.info(f"Productos procesados de OroColmbia: {len(orocolombia_processed)}")
+        # Decidir por tienda entre descarga completa o incremental
+        apis = [self.orocolombia_api, self.grupofelmel_api]
+        started_at = utc_now()
+        full_sync = {}
+        extra_params = {}
+        for api in apis:
+            state = get_sync_state(api.source_name)
+            full_sync[api.source_name] = (
+                not incremental
+                or state.needs_full_sync(started_at, self.config.FULL_SYNC_INTERVAL_HOURS)
+            )
+            if not full_sync[api.source_name]:
+                extra_params[api.source_name] = state.incremental_params()
+                logger.info(f"{api.source_name}: sincronización incremental desde "
+                            f"{extra_params[api.source_name]['modified_after']} UTC")
+            else:
+                logger.info(f"{api.source_name}: descarga completa")
         
-        # Obtener productos de GrupoFelmel
-        logger.info("Obteniendo productos de GrupoFelmel...")
-        grupofelmel_products = self.grupofelmel_api.get_all_products(progress_callback, max_pages)
-        logger.info(f"Productos obtenidos de GrupoFelmel: {len(grupofelmel_products)}")
+        # Una incremental se fusiona con el snapshot: sus PROD-n / temp_n siguen después de los existentes
+        builders = {
+            api.source_name: self._catalog_builder(
+                api, chunk_callback,
+                0 if full_sync[api.source_name] else next_placeholder_index(get_sync_state(api.source_name).products)
+            )
+            for api in apis
+        }
         
-        grupofelmel_processed = [
-            self.process_product(product, i) 
-            for i, product in enumerate(grupofelmel_products)
-        ]
-        logger.info(f"Productos procesados de GrupoFelmel: {len(grupofelmel_processed)}")
+        # Descargar ambas tiendas en paralelo: son hosts independientes
+        if self.api_client == 'async':
+            completed = asyncio.run(self._fetch_stores_async(builders, progress_callback, max_pages, extra_params))
+        else:
+            completed = self._fetch_stores_parallel(apis, builders, progress_callback, max_pages, extra_params)
         
-        # Convertir a DataFrames
-        try:
-            df_orocolombia = pd.DataFrame(orocolombia_processed)
-            df_grupofelmel = pd.DataFrame(grupofelmel_processed)
+        frames = {}
+        for api in apis:
+            complete = completed[api.source_name]
+            if stage_callback:
+                stage_callback('processing', api.source_name)
             
-            # Validar que los DataFrames no estén vacíos
-            if df_orocolombia.empty:
-                logger.warning("DataFrame de OroColmbia está vacío")
-            if df_grupofelmel.empty:
-                logger.warning("DataFrame de GrupoFelmel está vacío")
+            # Unir los bloques e incorporarlos al snapshot de la tienda
+            self.last_changes[api.source_name] = None
+            try:
+                df = builders[api.source_name].build()
+                if api is self.orocolombia_api and full_sync[api.source_name] and complete:
+                    self._retain_raw_products(api.source_name, df['id'] if 'id' in df else [])
+                logger.info(f"Productos procesados de {api.source_name}: {len(df)}")
                 
-            logger.info(f"Productos procesados - OroColmbia: {len(df_orocolombia)}, GrupoFelmel: {len(df_grupofelmel)}")
+                state = get_sync_state(api.source_name)
+                replaces_snapshot = full_sync[api.source_name] and (complete or state.products is None)
+                frames[api.source_name] = state.apply(
+                    df, full_sync[api.source_name], complete, started_at
+                )
+                if not replaces_snapshot:
+                    self.last_changes[api.source_name] = df
+                # Solo una descarga completa sin páginas perdidas puede dar de baja SKUs
+                self._record_movements(
+                    api.source_name, frames[api.source_name] if replaces_snapshot else df,
+                    full_sync[api.source_name] and complete, started_at
+                )
+                self._archive_catalog(api.source_name, frames[api.source_name], started_at)
+            except Exception as e:
+                logger.error(f"Error creando DataFrame de {api.source_name}: {str(e)}")
+                # Retornar DataFrame vacío en caso de error
+                frames[api.source_name] = pd.DataFrame()
+        
+        df_orocolombia = frames[self.orocolombia_api.source_name]
+        df_grupofelmel = frames[self.grupofelmel_api.source_name]
+        
+        # Validar que los DataFrames no estén vacíos
+        if df_orocolombia.empty:
+            logger.warning("DataFrame de OroColmbia está vacío")
+        if df_grupofelmel.empty:
+            logger.warning("DataFrame de GrupoFelmel está vacío")
+        
+        logger.info(f"Productos procesados - OroColmbia: {len(df_orocolombia)}, GrupoFelmel: {len(df_grupofelmel)}")
+        
+        return df_orocolombia, df_grupofelmel
+    
+    def _catalog_builder(self, api: WooCommerceAPI, chunk_callback=None,
+                         start_index: int = 0) -> StreamingCatalogBuilder:
+        """
+        Builder que normaliza las páginas de una tienda a medida que llegan
+        
+        GrupoFelmel solo aporta el catálogo de referencia (build_reference_frame);
+        OroColmbia pasa por normalize_catalog en lotes de páginas y guarda cada
+        página en el almacén de originales. Con NORMALIZE_WORKERS > 1 los lotes son
+        de NORMALIZE_PROCESS_THRESHOLD productos para que valga la pena el pool de procesos.
+        
+        Args:
+            api: Cliente de la tienda
+            chunk_callback: Función (source_name, bloque) por bloque normalizado
+            start_index: Índice del primer producto (para los SKU PROD-n / ids temp_n)
             
-            return df_orocolombia, df_grupofelmel
+        Returns:
+            Builder de la tienda
+        """
+        if api is self.grupofelmel_api:
+            return StreamingCatalogBuilder(api.source_name, api.per_page,
+                                           lambda products, start_index: build_reference_frame(products),
+                                           chunk_callback=chunk_callback)
+        
+        batch_size = DEFAULT_BATCH_SIZE
+        if self.config.NORMALIZE_WORKERS > 1:
+            batch_size = max(batch_size, self.config.NORMALIZE_PROCESS_THRESHOLD)
+        return StreamingCatalogBuilder(api.source_name, api.per_page, self.normalize_catalog,
+                                       batch_size=batch_size,
+                                       page_callback=self._save_raw_products,
+                                       chunk_callback=chunk_callback,
+                                       start_index=start_index)
+    
+    def normalize_catalog(self, products: List[Dict[str, Any]], start_index: int = 0) -> pd.DataFrame:
+        """
+        Normalizar productos raw al catálogo compacto
+        
+        Con NORMALIZE_WORKERS > 1 y al menos NORMALIZE_PROCESS_THRESHOLD productos
+        se reparte el trabajo en un pool de procesos; por debajo del umbral el
+        arranque del pool cuesta más de lo que ahorra.
+        
+        Args:
+            products: Productos raw de la API
+            start_index: Índice del primer producto (para los SKU PROD-n / ids temp_n)
             
+        Returns:
+            Catálogo con el esquema compacto
+        """
+        workers = self.config.NORMALIZE_WORKERS
+        if workers > 1 and len(products) >= self.config.NORMALIZE_PROCESS_THRESHOLD:
+            try:
+                return normalize_products_parallel(
+                    products, self.config.DISCOUNT_PERCENTAGE, workers,
+                    classifier=self.material_classifier,
+                    start_index=start_index
+                )
+            except Exception as e:
+                logger.warning(f"Normalización en procesos falló, se usa un solo proceso: {str(e)}")
+        
+        df = normalize_products(products, self.config.DISCOUNT_PERCENTAGE,
+                                start_index=start_index,
+                                classifier=self.material_classifier)
+        return to_catalog_schema(df)
+    
+    def _save_raw_products(self, source_name: str, products: List[Dict[str, Any]]):
+        """Guardar los productos originales en el almacén lateral sin interrumpir la descarga"""
+        try:
+            self.raw_store.save(source_name, products)
+        except Exception as e:
+            logger.warning(f"No se pudieron guardar los productos originales de {source_name}: {str(e)}")
+    
+    def _retain_raw_products(self, source_name: str, product_ids):
+        """Quitar del almacén lateral los productos que ya no vienen en una descarga completa"""
+        try:
+            self.raw_store.retain(source_name, product_ids)
+        except Exception as e:
+            logger.warning(f"No se pudieron limpiar los productos originales de {source_name}: {str(e)}")
+    
+    def _record_movements(self, source_name: str, df: pd.DataFrame, full: bool, recorded_at):
+        """Registrar en el kardex los cambios de precio y stock sin interrumpir la carga"""
+        try:
+            self.kardex.record(source_name, df, recorded_at, full)
+            self.kardex.compact_if_due(self.config.KARDEX_RETENTION_DAYS,
+                                       self.config.KARDEX_COMPACT_INTERVAL_HOURS, recorded_at)
+        except Exception as e:
+            logger.warning(f"No se pudo registrar el kardex de {source_name}: {str(e)}")
+    
+    def _archive_catalog(self, source_name: str, df: pd.DataFrame, captured_at):
+        """Guardar una versión del catálogo en el historial sin interrumpir la carga"""
+        if df.empty:
+            return
+        try:
+            if self.catalog_history.append(source_name, df, captured_at, self.config.HISTORY_INTERVAL_HOURS):
+                self.catalog_history.prune(source_name, self.config.HISTORY_RETENTION_DAYS, captured_at)
         except Exception as e:
-            logger.error(f"Error creando DataFrames: {str(e)}")
-            # Retornar DataFrames vacíos en caso de error
-            return pd.DataFrame(), pd.DataFrame()
+            logger.warning(f"No se pudo guardar la versión del catálogo de {source_name}: {str(e)}")
     
-    def find_new_products(self, df_orocolombia: pd.DataFrame, df_grupofelmel: pd.DataFrame) -> pd.DataFrame:
+    def _fetch_stores_parallel(self, apis: List[WooCommerceAPI],
+                               builders: Dict[str, StreamingCatalogBuilder],
+                               progress_callback=None, max_pages=None,
+                               extra_params: Optional[Dict[str, Dict[str, Any]]] = None
+                               ) -> Dict[str, bool]:
+        """
+        Descargar varias tiendas al mismo tiempo, una por hilo
+        
+        Los hilos de descarga dejan cada página en una cola acotada y el hilo que
+        llama las entrega a los builders; si el procesamiento se atrasa, la cola
+        llena frena la descarga en lugar de acumular JSON. El progreso también pasa
+        por la cola (Streamlit no permite actualizar widgets desde otros hilos). Si
+        una tienda falla se registra el error sin cancelar las demás; un error del
+        progress_callback solo se registra. Si este hilo deja de consumir la cola
+        (error en un builder), los hilos de descarga se detienen en lugar de
+        quedar bloqueados en la cola llena.
+        
+        Args:
+            apis: Clientes de las tiendas a descargar
+            builders: Builder de cada tienda {source_name: builder}
+            progress_callback: Función para reportar progreso
+            max_pages: Límite máximo de páginas por tienda
+            extra_params: Parámetros adicionales por tienda {source_name: params}
+            
+        Returns:
+            Diccionario {source_name: descarga completa}
+        """
+        extra_params = extra_params or {}
+        events = queue.Queue(maxsize=PAGE_QUEUE_SIZE)
+        stop = threading.Event()
+        
+        def put(event: Tuple[str, Any]) -> bool:
+            """Encolar un evento; False si el consumidor ya no lee la cola"""
+            while not stop.is_set():
+                try:
+                    events.put(event, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        relay = (lambda *args: put(('progress', args))) if progress_callback else None
+        
+        def crawl(api: WooCommerceAPI) -> int:
+            fetched = 0
+            for page, products in api.iter_pages(relay, max_pages, extra_params.get(api.source_name)):
+                if not put(('page', (api.source_name, page, products))):
+                    logger.warning(f"{api.source_name}: descarga detenida")
+                    api.last_crawl_complete = False
+                    break
+                fetched += len(products)
+            return fetched
+        
+        results = {}
+        with ThreadPoolExecutor(max_workers=len(apis), thread_name_prefix="woo-store") as executor:
+            futures = {}
+            for api in apis:
+                logger.info(f"Obteniendo productos de {api.source_name}...")
+                futures[executor.submit(crawl, api)] = api
+            
+            pending = set(futures)
+            try:
+                while pending or not events.empty():
+                    try:
+                        kind, args = events.get(timeout=0.1)
+                    except queue.Empty:
+                        pass
+                    else:
+                        if kind == 'progress':
+                            try:
+                                progress_callback(*args)
+                            except Exception as e:
+                                logger.warning(f"Error reportando progreso de {args[0]}: {str(e)}")
+                        else:
+                            source_name, page, products = args
+                            builders[source_name].add_page(page, products)
+                    
+                    done = {future for future in pending if future.done()}
+                    pending -= done
+                    for future in done:
+                        api = futures[future]
+                        try:
+                            fetched = future.result()
+                            results[api.source_name] = api.last_crawl_complete
+                            logger.info(f"Productos obtenidos de {api.source_name}: {fetched}")
+                        except Exception as e:
+                            logger.error(f"Error obteniendo productos de {api.source_name}: {str(e)}")
+                            results[api.source_name] = False
+            finally:
+                # Liberar a los hilos que esperan en la cola antes de esperar a que terminen
+                stop.set()
+                while True:
+                    try:
+                        events.get_nowait()
+                    except queue.Empty:
+                        break
+        
+        return results
+    
+    async def _fetch_stores_async(self, builders: Dict[str, StreamingCatalogBuilder],
+                                  progress_callback=None, max_pages=None,
+                                  extra_params: Optional[Dict[str, Dict[str, Any]]] = None
+                                  ) -> Dict[str, bool]:
+        """
+        Descargar ambas tiendas con el cliente asyncio
+        
+        Cada página se entrega a su builder en cuanto llega, en un hilo aparte
+        (asyncio.to_thread) para que la normalización no frene el event loop; las
+        páginas de una tienda se siguen procesando de a una. Cada tienda tiene un
+        tiempo máximo (CRAWL_TIMEOUT_SECONDS); al vencerse se cancelan sus
+        peticiones pendientes y se conservan las páginas ya recibidas. El fallo de
+        una tienda no cancela la otra.
+        
+        Args:
+            builders: Builder de cada tienda {source_name: builder}
+            progress_callback: Función para reportar progreso
+            max_pages: Límite máximo de páginas por tienda
+            extra_params: Parámetros adicionales por tienda {source_name: params}
+            
+        Returns:
+            Diccionario {source_name: descarga completa}
+        """
+        from async_api_connector import AsyncWooCommerceAPI
+        
+        apis = [
+            AsyncWooCommerceAPI(
+                url=api.url,
+                consumer_key=api.consumer_key,
+                consumer_secret=api.consumer_secret,
+                source_name=api.source_name,
+                max_workers=api.max_workers,
+                requests_per_second=rate,
+                fields=api.fields,
+                per_page=api.per_page,
+                config=self.config
+            )
+            for api, rate in (
+                (self.orocolombia_api, self.config.OROCOLOMBIA_REQUESTS_PER_SECOND),
+                (self.grupofelmel_api, self.config.GRUPOFELMEL_REQUESTS_PER_SECOND),
+            )
+        ]
+        
+        async def consume(api) -> int:
+            fetched = 0
+            async for page, products in api.iter_pages(progress_callback, max_pages,
+                                                        (extra_params or {}).get(api.source_name)):
+                # Normalizar (CPU) en un hilo para no detener las descargas mientras tanto
+                adding = asyncio.ensure_future(asyncio.to_thread(builders[api.source_name].add_page,
+                                                                 page, products))
+                try:
+                    await asyncio.shield(adding)
+                except asyncio.CancelledError:
+                    # Al vencer el tiempo de la tienda, la página en curso termina antes de cerrar el builder
+                    await adding
+                    raise
+                fetched += len(products)
+            return fetched
+        
+        async def crawl(api):
+            async with api:
+                logger.info(f"Obteniendo productos de {api.source_name}...")
+                return await asyncio.wait_for(consume(api), self.config.CRAWL_TIMEOUT_SECONDS)
+        
+        outcomes = await asyncio.gather(*(crawl(api) for api in apis), return_exceptions=True)
+        
+        results = {}
+        for api, outcome in zip(apis, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.error(f"Error obteniendo productos de {api.source_name}: {str(outcome) or type(outcome).__name__}")
+                results[api.source_name] = False
+            else:
+                logger.info(f"Productos obtenidos de {api.source_name}: {outcome}")
+                results[api.source_name] = api.last_crawl_complete
+        
+        return results
+    
+    def find_new_products(self, df_orocolombia: pd.DataFrame,
+                          df_grupofelmel: Union[pd.DataFrame, AbstractSet[str]]) -> pd.DataFrame:
         """
         Encontrar productos nuevos que están en OroColmbia pero no en GrupoFelmel
         y que tienen stock disponible
         
+        Construye un índice de diferencias propio en cada llamada; la carga del
+        catálogo usa update_catalog_diff, que lo mantiene entre sincronizaciones.
+        
         Args:
             df_orocolombia: DataFrame de productos de OroColmbia
-            df_grupofelmel: DataFrame de productos de GrupoFelmel
+            df_grupofelmel: DataFrame de productos de GrupoFelmel o conjunto de sus SKUs
             
         Returns:
             DataFrame con productos nuevos
@@ -372,35 +888,69 @@ class ProductManager:
                 logger.warning("DataFrame de OroColmbia está vacío")
                 return pd.DataFrame()
             
-            if df_grupofelmel.empty:
+            if isinstance(df_grupofelmel, AbstractSet):
+                if not df_grupofelmel:
+                    logger.warning("Catálogo de GrupoFelmel vacío - todos los productos serán considerados nuevos")
+            elif df_grupofelmel.empty:
                 logger.warning("DataFrame de GrupoFelmel está vacío - todos los productos serán considerados nuevos")
-                grupofelmel_skus = set()
-            else:
-                # SKUs que están en GrupoFelmel (filtrar valores None)
-                grupofelmel_skus = set(df_grupofelmel['sku'].dropna().unique())
-            
-            # Filtrar productos válidos de OroColmbia
-            valid_orocolombia = df_orocolombia[
-                (df_orocolombia['sku'].notna()) &  # SKU no debe ser None
-                (df_orocolombia['sku'] != '') &
-                (~df_orocolombia['sku'].str.startswith('PROD-')) &
-                (~df_orocolombia['sku'].str.startswith('ERROR-')) &
-                (df_orocolombia['price'] > 0) &
-                (df_orocolombia['stock'] > 0)  # Solo productos con stock
-            ].copy()
-            
-            # Productos nuevos: están en OroColmbia pero NO en GrupoFelmel
-            new_products = valid_orocolombia[
-                ~valid_orocolombia['sku'].isin(grupofelmel_skus)
-            ].copy()
             
-            logger.info(f"Productos nuevos encontrados: {len(new_products)}")
+            diff = CatalogDiff()
+            diff.rebuild(df_orocolombia, df_grupofelmel)
+            new_products = diff.frame(NEW)
             
-            if not new_products.empty:
-                return new_products.sort_values('date_modified', ascending=False)
-            else:
-                return pd.DataFrame()
+            logger.info(f"Productos nuevos encontrados: {len(new_products)}")
+            return new_products
                 
         except Exception as e:
             logger.error(f"Error en find_new_products: {str(e)}")
-            return pd.DataFrame()
\ No newline at end of file
+            return pd.DataFrame()
+    
+    def find_new_products_between(self, until: datetime, since: Optional[datetime] = None,
+                                  columns: Optional[List[str]] = None,
+                                  **filters) -> Optional[pd.DataFrame]:
+        """
+        Productos nuevos según las versiones guardadas del catálogo
+        
+        Ver CatalogHistory.new_products_between (OroColmbia frente a GrupoFelmel).
+        
+        Args:
+            until: Momento (UTC) de la comparación
+            since: Momento (UTC) inicial opcional
+            columns: Columnas a devolver (None = todas)
+            **filters: categories (tupla), max_price, min_stock o search (ver catalog_filter)
+            
+        Returns:
+            DataFrame con productos nuevos, o None si no hay versiones hasta until
+        """
+        return self.catalog_history.new_products_between(
+            self.orocolombia_api.source_name, self.grupofelmel_api.source_name,
+            until, since, columns, **filters
+        )
+    
+    def update_catalog_diff(self, df_orocolombia: pd.DataFrame,
+                            df_grupofelmel: pd.DataFrame) -> Optional[CatalogDiff]:
+        """
+        Actualizar el índice de diferencias compartido tras fetch_all_products
+        
+        Si ambas tiendas se sincronizaron de forma incremental solo se reclasifican
+        los SKUs de las filas recibidas; si no, se reconstruye.
+        
+        Args:
+            df_orocolombia: Catálogo completo de OroColmbia
+            df_grupofelmel: Catálogo completo de GrupoFelmel
+            
+        Returns:
+            Índice actualizado, o None si falló (el llamador puede usar find_new_products)
+        """
+        logger.info("Actualizando diferencias entre catálogos...")
+        diff = get_catalog_diff()
+        try:
+            diff.update(df_orocolombia, df_grupofelmel,
+                        self.last_changes.get(self.orocolombia_api.source_name),
+                        self.last_changes.get(self.grupofelmel_api.source_name))
+        except Exception as e:
+            logger.error(f"Error actualizando las diferencias de catálogo: {str(e)}")
+            return None
+        
+        logger.info(f"Diferencias de catálogo: {diff.counts()}")
+        return diff
@@ -0,0 +1,306 @@
+"""
+Cliente asyncio para las APIs de WooCommerce
+"""
+import asyncio
+import time
+import logging
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator
+
+import httpx
+from streamlit_config import StreamlitConfig, get_config
+
+logger = logging.getLogger(__name__)
+
+class AsyncTokenBucket:
+    """Limitador de peticiones tipo token bucket para asyncio"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate: Tokens que se reponen por segundo
+            capacity: Ráfaga máxima permitida (por defecto igual a rate)
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self, tokens: float = 1.0):
+        """Esperar hasta que haya tokens disponibles y consumirlos"""
+        async with self._lock:
+            self._refill()
+            while self._tokens < tokens:
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= tokens
+
+class AsyncWooCommerceAPI:
+    """Clase asyncio para conectar con APIs de WooCommerce (misma interfaz que WooCommerceAPI)"""
+
+    def __init__(self, url: str, consumer_key: str, consumer_secret: str, source_name: str,
+                 max_workers: int = 1, requests_per_second: float = 2.0, timeout: float = 30,
+                 fields: Optional[List[str]] = None, per_page: Optional[int] = None,
+                 config: Optional[StreamlitConfig] = None):
+        self.url = url
+        self.consumer_key = consumer_key
+        self.consumer_secret = consumer_secret
+        self.source_name = source_name
+        self.max_workers = max(1, int(max_workers))
+        # Proyección de campos (None = objeto de producto completo)
+        self.fields = list(fields) if fields else None
+        self.timeout = timeout
+        self.config = config or get_config()
+        self.per_page = int(per_page or self.config.PRODUCTS_PER_PAGE)
+
+        # False si la última descarga completa perdió páginas por errores
+        self.last_crawl_complete = True
+
+        self.throttle = AsyncTokenBucket(requests_per_second, capacity=self.max_workers)
+
+        # Cliente con pool de conexiones keep-alive, autenticación y cabeceras
+        self.session = httpx.AsyncClient(
+            auth=(consumer_key, consumer_secret),
+            headers={
+                'User-Agent': 'GrupoFelmel-Dashboard/1.0',
+                'Accept': 'application/json',
+                'Content-Type': 'application/json'
+            },
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=self.max_workers,
+                                max_keepalive_connections=self.max_workers)
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        """Cerrar el pool de conexiones"""
+        await self.session.aclose()
+
+    async def get_products(self, page: int = 1, per_page: int = 100,
+                           extra_params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Obtener productos de una página específica
+
+        Args:
+            page: Número de página
+            per_page: Productos por página
+            extra_params: Parámetros adicionales de la consulta (p. ej. modified_after)
+
+        Returns:
+            Lista de productos
+        """
+        return (await self.get_page(page, per_page, extra_params))[0]
+
+    async def get_page(self, page: int = 1, per_page: int = 100,
+                       extra_params: Optional[Dict[str, Any]] = None) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        Obtener productos de una página junto con el total de páginas
+
+        El total se devuelve en lugar de guardarse en la instancia: las páginas se
+        piden de forma concurrente.
+
+        Args:
+            page: Número de página
+            per_page: Productos por página
+            extra_params: Parámetros adicionales de la consulta (p. ej. modified_after)
+
+        Returns:
+            Tuple (productos, X-WP-TotalPages o None si la respuesta no lo trae)
+        """
+        params = {
+            'page': page,
+            'per_page': per_page,
+            'orderby': 'modified',
+            'order': 'desc',
+            'status': 'publish'
+        }
+        if self.fields:
+            params['_fields'] = ','.join(self.fields)
+        if extra_params:
+            params.update(extra_params)
+
+        await self.throttle.acquire()
+
+        try:
+            if page == 1 or page % 5 == 0:  # Solo log cada 5 páginas
+                logger.info(f"Consultando {self.source_name} página {page}...")
+
+            # wait_for cancela la petición si el servidor no responde a tiempo
+            response = await asyncio.wait_for(self.session.get(self.url, params=params), self.timeout)
+            response.raise_for_status()
+
+            products = response.json()
+            total_pages = self._read_total_pages(response)
+
+            if page == 1 or page % 5 == 0:  # Solo log cada 5 páginas
+                logger.info(f"{self.source_name} página {page}: {len(products)} productos")
+
+            return products, total_pages
+
+        except (httpx.HTTPError, asyncio.TimeoutError) as e:
+            logger.error(f"Error consultando {self.source_name} página {page}: {str(e) or type(e).__name__}")
+            logger.error(f"URL: {self.url}")
+            raise
+
+    def _read_total_pages(self, response: httpx.Response) -> Optional[int]:
+        """Total de páginas que WooCommerce envía en X-WP-TotalPages (None si falta o no es válido)"""
+        try:
+            if response.headers.get('X-WP-TotalPages') is not None:
+                return int(response.headers['X-WP-TotalPages'])
+        except (TypeError, ValueError):
+            logger.warning(f"{self.source_name}: Cabeceras de paginación inválidas")
+        return None
+
+    @staticmethod
+    def _expected_pages(total_pages: Optional[int], max_pages: int) -> Optional[int]:
+        """Páginas que tendrá la descarga actual según X-WP-TotalPages (None si no se conoce)"""
+        if total_pages is None:
+            return None
+        return min(total_pages, max_pages)
+
+    async def _get_page_with_retries(self, page: int, per_page: int,
+                                     extra_params: Optional[Dict[str, Any]] = None,
+                                     max_attempts: int = 3) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Obtener una página y X-WP-TotalPages reintentando con espera creciente"""
+        for attempt in range(1, max_attempts + 1):
+            try:
+                return await self.get_page(page=page, per_page=per_page, extra_params=extra_params)
+            except Exception as e:
+                logger.warning(f"Error en {self.source_name} página {page} (intento {attempt}): {str(e)}")
+                if attempt >= max_attempts:
+                    raise
+                await asyncio.sleep(attempt * 2)
+
+    async def get_all_products(self, progress_callback=None, max_pages=None,
+                               extra_params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Obtener todos los productos paginando automáticamente
+
+        La primera página informa el total (X-WP-TotalPages), que se lee una sola
+        vez; las demás se piden en paralelo, limitadas por max_workers y por el
+        token bucket de la tienda.
+
+        Args:
+            progress_callback: Función (source_name, página, productos acumulados,
+                productos de la página, total de páginas o None) llamada por página
+            max_pages: Límite máximo de páginas (para evitar timeouts en cloud)
+            extra_params: Parámetros adicionales para todas las páginas
+
+        Returns:
+            Lista completa de productos, en orden de página
+        """
+        pages: Dict[int, List[Dict[str, Any]]] = {}
+        async for page, products in self.iter_pages(progress_callback, max_pages, extra_params):
+            pages[page] = products
+
+        all_products = []
+        for page in sorted(pages):
+            all_products.extend(pages[page])
+        return all_products
+
+    async def iter_pages(self, progress_callback=None, max_pages=None,
+                         extra_params: Optional[Dict[str, Any]] = None
+                         ) -> AsyncIterator[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        Descargar el catálogo entregando cada página en cuanto llega
+
+        Las páginas 2..N pueden llegar en desorden; quien consume puede procesarlas
+        y soltarlas sin esperar al resto de la descarga.
+
+        Args:
+            progress_callback: Función de progreso (ver get_all_products)
+            max_pages: Límite máximo de páginas (para evitar timeouts en cloud)
+            extra_params: Parámetros adicionales para todas las páginas
+
+        Yields:
+            Tuple (número de página, productos de la página)
+        """
+        if max_pages is None:
+            max_pages = 50  # Límite por defecto para cloud
+
+        per_page = self.per_page
+        self.last_crawl_complete = True
+
+        try:
+            first_page, total_pages = await self._get_page_with_retries(1, per_page, extra_params)
+        except Exception:
+            logger.error(f"Demasiados errores en {self.source_name}. Usando datos parciales.")
+            self.last_crawl_complete = False
+            return
+
+        fetched_count = len(first_page)
+        if progress_callback:
+            progress_callback(self.source_name, 1, fetched_count, len(first_page),
+                              self._expected_pages(total_pages, max_pages))
+        yield 1, first_page
+
+        if len(first_page) < per_page:
+            logger.info(f"{self.source_name}: {fetched_count} productos obtenidos")
+            return
+
+        if total_pages is None:
+            # Sin cabeceras de paginación: seguir hasta la primera página incompleta
+            page = 2
+            while page <= max_pages:
+                try:
+                    products, page_total = await self._get_page_with_retries(page, per_page, extra_params)
+                except Exception:
+                    logger.error(f"Demasiados errores en {self.source_name}. Usando datos parciales.")
+                    self.last_crawl_complete = False
+                    break
+                if not products:
+                    break
+                fetched_count += len(products)
+                if page_total is not None:
+                    total_pages = page_total
+                if progress_callback:
+                    progress_callback(self.source_name, page, fetched_count, len(products),
+                                      self._expected_pages(total_pages, max_pages))
+                yield page, products
+                if len(products) < per_page:
+                    break
+                page += 1
+        else:
+            last_page = min(total_pages, max_pages)
+            if total_pages > max_pages:
+                logger.warning(f"{self.source_name}: Alcanzado límite de {max_pages} páginas de {total_pages}")
+
+            semaphore = asyncio.Semaphore(self.max_workers)
+
+            async def fetch(page: int):
+                async with semaphore:
+                    products, _ = await self._get_page_with_retries(page, per_page, extra_params)
+                    return page, products
+
+            tasks = [asyncio.ensure_future(fetch(page)) for page in range(2, last_page + 1)]
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    try:
+                        page, products = await next_done
+                    except Exception as e:
+                        logger.error(f"{self.source_name} página descartada: {str(e)}")
+                        self.last_crawl_complete = False
+                        continue
+
+                    fetched_count += len(products)
+                    if progress_callback:
+                        progress_callback(self.source_name, page, fetched_count, len(products),
+                                          last_page)
+                    yield page, products
+            finally:
+                # Si la descarga se cancela (p. ej. por timeout) no dejar peticiones huérfanas
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+        logger.info(f"{self.source_name}: {fetched_count} productos obtenidos")
@@ -0,0 +1,274 @@
+"""
+Cache del catálogo compartida por todas las sesiones del servidor
+"""
+import threading
+import logging
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional, Tuple
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+class CatalogSnapshot:
+    """Versión inmutable del catálogo: las sesiones solo guardan referencias a ella"""
+
+    def __init__(self, df_orocolombia: pd.DataFrame, df_grupofelmel: pd.DataFrame,
+                 df_new_products: pd.DataFrame, version: int, loaded_at: Optional[datetime] = None):
+        self.df_orocolombia = df_orocolombia
+        self.df_grupofelmel = df_grupofelmel
+        self.df_new_products = df_new_products
+        self.version = version
+        self.loaded_at = loaded_at or datetime.now()
+
+class LoadProgress:
+    """
+    Progreso real de una carga del catálogo, alimentado por los callbacks de la API
+
+    Las páginas descargadas (frente a X-WP-TotalPages) cubren el 80 % de la barra;
+    el procesamiento y el cálculo de productos nuevos, el resto.
+    """
+
+    STAGE_LABELS = {
+        'fetching': 'Descargando',
+        'processing': 'Procesando productos',
+        'diff': 'Detectando productos nuevos',
+        'saving': 'Guardando snapshot',
+        'done': 'Completado'
+    }
+    STAGE_FRACTIONS = {'processing': 0.8, 'diff': 0.9, 'saving': 0.95, 'done': 1.0}
+
+    # Filas del catálogo que se muestran durante la descarga
+    PREVIEW_ROWS = 200
+
+    def __init__(self, expected_sources: int = 2):
+        """
+        Args:
+            expected_sources: Número de tiendas que se descargan
+        """
+        self._lock = threading.Lock()
+        self.expected_sources = expected_sources
+        self.started_at = datetime.now()
+        self.stage = 'fetching'
+        self.stage_source: Optional[str] = None
+        self.pages: Dict[str, Tuple[int, Optional[int]]] = {}
+        self.products: Dict[str, int] = {}
+        self.rows: Dict[str, int] = {}
+        self.preview_source: Optional[str] = None
+        self.preview: Optional[pd.DataFrame] = None
+
+    def on_page(self, source_name: str, page: int, total_products: int,
+                page_products: int, total_pages: Optional[int] = None):
+        """progress_callback para WooCommerceAPI.get_all_products"""
+        with self._lock:
+            done, _ = self.pages.get(source_name, (0, None))
+            self.pages[source_name] = (done + 1, total_pages)
+            self.products[source_name] = total_products
+
+    def on_chunk(self, source_name: str, chunk: pd.DataFrame):
+        """
+        chunk_callback para ProductManager.fetch_all_products
+
+        Cuenta las filas ya normalizadas y guarda las primeras PREVIEW_ROWS del
+        catálogo principal para mostrarlas mientras sigue la descarga.
+        """
+        with self._lock:
+            self.rows[source_name] = self.rows.get(source_name, 0) + len(chunk)
+            if self.preview_source is None and 'name' in chunk:
+                self.preview_source = source_name
+            if source_name == self.preview_source:
+                shown = 0 if self.preview is None else len(self.preview)
+                if shown < self.PREVIEW_ROWS:
+                    head = chunk.head(self.PREVIEW_ROWS - shown)
+                    self.preview = head if self.preview is None else pd.concat([self.preview, head],
+                                                                               ignore_index=True)
+
+    def set_stage(self, stage: str, source_name: Optional[str] = None):
+        """stage_callback para ProductManager.fetch_all_products"""
+        with self._lock:
+            self.stage = stage
+            self.stage_source = source_name
+
+    @property
+    def fraction(self) -> float:
+        """Avance entre 0 y 1"""
+        with self._lock:
+            if self.stage in self.STAGE_FRACTIONS:
+                return self.STAGE_FRACTIONS[self.stage]
+            if not self.pages:
+                return 0.0
+            ratios = [
+                done / total if total else done / (done + 1)
+                for done, total in self.pages.values()
+            ]
+            # Las tiendas que aún no reportan cuentan como 0
+            return 0.8 * sum(ratios) / max(len(ratios), self.expected_sources)
+
+    def describe(self) -> str:
+        """Texto corto del estado actual"""
+        with self._lock:
+            if self.stage != 'fetching':
+                label = self.STAGE_LABELS.get(self.stage, self.stage)
+                return f"{label} {self.stage_source}..." if self.stage_source else f"{label}..."
+            parts = [
+                f"{source}: página {done}/{total if total else '?'} ({self.products.get(source, 0):,} productos"
+                f", {self.rows.get(source, 0):,} procesados)"
+                for source, (done, total) in self.pages.items()
+            ]
+            return " · ".join(parts) if parts else "Conectando con las APIs..."
+
+class CatalogCache:
+    """
+    Catálogo único por proceso con deduplicación de cargas concurrentes
+
+    Si varias sesiones piden una carga al mismo tiempo, solo la primera ejecuta el
+    loader; las demás esperan su resultado (single-flight).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._inflight: Optional[Future] = None
+        self._version = 0
+        self.progress: Optional[LoadProgress] = None
+
+    @property
+    def current(self) -> Optional[CatalogSnapshot]:
+        """Último snapshot cargado (None si todavía no hay datos)"""
+        return self._snapshot
+
+    @property
+    def is_loading(self) -> bool:
+        """Si hay una carga en curso"""
+        return self._inflight is not None
+
+    def publish(self, df_orocolombia: pd.DataFrame, df_grupofelmel: pd.DataFrame,
+                df_new_products: pd.DataFrame, loaded_at: Optional[datetime] = None) -> CatalogSnapshot:
+        """
+        Reemplazar el catálogo actual por uno nuevo
+
+        Args:
+            df_orocolombia: Catálogo de OroColmbia
+            df_grupofelmel: Catálogo de referencia de GrupoFelmel
+            df_new_products: Productos nuevos
+            loaded_at: Momento de carga de los datos (por defecto ahora)
+
+        Returns:
+            Snapshot publicado
+        """
+        with self._lock:
+            self._version += 1
+            self._snapshot = CatalogSnapshot(df_orocolombia, df_grupofelmel, df_new_products,
+                                             self._version, loaded_at)
+            logger.info(f"Catálogo versión {self._version} publicado")
+            return self._snapshot
+
+    def load(self, loader: Callable[[LoadProgress], Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]]) -> CatalogSnapshot:
+        """
+        Cargar el catálogo, uniéndose a una carga en curso si ya existe
+
+        Args:
+            loader: Función que recibe un LoadProgress y devuelve
+                (OroColmbia, GrupoFelmel, productos nuevos)
+
+        Returns:
+            Snapshot resultante de la carga
+        """
+        with self._lock:
+            if self._inflight is not None:
+                future, owner = self._inflight, False
+            else:
+                future, owner = Future(), True
+                self._inflight = future
+                self.progress = LoadProgress()
+
+        if not owner:
+            logger.info("Carga del catálogo ya en curso, esperando su resultado...")
+            return future.result()
+
+        try:
+            snapshot = self.publish(*loader(self.progress))
+            self.progress.set_stage('done')
+        except BaseException as e:
+            with self._lock:
+                self._inflight = None
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._inflight = None
+        future.set_result(snapshot)
+        return snapshot
+
+class CatalogRefresher:
+    """
+    Hilo en segundo plano que reconstruye el catálogo cada cierto intervalo
+
+    Mientras recarga, las sesiones siguen usando el último snapshot bueno; el nuevo
+    se publica de una sola vez al terminar (CatalogCache.publish).
+    """
+
+    def __init__(self, cache: CatalogCache, loader: Callable[[LoadProgress], Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]],
+                 interval_minutes: float, retry_minutes: float = 5):
+        """
+        Args:
+            cache: Cache compartida del catálogo
+            loader: Función que recibe un LoadProgress y devuelve
+                (OroColmbia, GrupoFelmel, productos nuevos)
+            interval_minutes: Antigüedad a partir de la cual se recarga (0 = solo manual)
+            retry_minutes: Espera antes de reintentar tras un error
+        """
+        self.cache = cache
+        self.loader = loader
+        self.interval = timedelta(minutes=interval_minutes) if interval_minutes > 0 else None
+        self.retry = timedelta(minutes=retry_minutes)
+        self.last_error: Optional[str] = None
+        self.last_attempt: Optional[datetime] = None
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'CatalogRefresher':
+        """Arrancar el hilo (idempotente)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="catalog-refresher", daemon=True)
+            self._thread.start()
+        return self
+
+    @property
+    def is_alive(self) -> bool:
+        """Si el hilo de recarga está corriendo"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def trigger(self):
+        """Pedir una recarga inmediata sin esperar a que termine"""
+        self._wake.set()
+
+    def _seconds_until_due(self) -> Optional[float]:
+        """Segundos hasta la próxima recarga programada (None = sin recarga automática)"""
+        now = datetime.now()
+        if self.last_error and self.last_attempt:
+            return max(0.0, (self.last_attempt + self.retry - now).total_seconds())
+
+        snapshot = self.cache.current
+        if snapshot is None:
+            return 0.0
+        if self.interval is None:
+            return None
+        return max(0.0, (snapshot.loaded_at + self.interval - now).total_seconds())
+
+    def _run(self):
+        while True:
+            wait_seconds = self._seconds_until_due()
+            if wait_seconds is None or wait_seconds > 0:
+                if not self._wake.wait(wait_seconds):
+                    # Vencido el plazo: reevaluar, otra sesión pudo haber recargado mientras tanto
+                    continue
+            self._wake.clear()
+
+            self.last_attempt = datetime.now()
+            try:
+                self.cache.load(self.loader)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e) or type(e).__name__
+                logger.error(f"Error recargando el catálogo en segundo plano: {self.last_error}")
@@ -0,0 +1,469 @@
+"""
+Comparación indexada entre el catálogo del proveedor (OroColmbia) y el propio (GrupoFelmel)
+
+Mantiene un índice por SKU de cada tienda y la clase de cada SKU:
+
+- NEW: está en el proveedor con precio y stock, pero no en el catálogo propio
+  (la regla de find_new_products)
+- MISSING: está en el catálogo propio pero el proveedor ya no lo tiene
+- PRICE_CHANGED: está en ambos y el precio de alguna de las dos tiendas cambió
+  desde la sincronización anterior
+- STOCK_CHANGED: está en ambos y el stock de alguna cambió desde la sincronización anterior
+- UNCHANGED: está en ambos sin cambios
+
+Las dos tiendas no se comparan entre sí (GrupoFelmel vende a sus propios
+precios): cada una se compara con el precio y stock por SKU que tenía en la
+sincronización anterior. Ese índice se conserva al reconstruir; sin una
+sincronización anterior, o si una tienda no trae precio o stock (catálogo de
+referencia solo con SKUs), no hay cambios que marcar.
+
+Una descarga completa reconstruye el índice; con las filas recibidas en una
+sincronización incremental solo se reclasifican los SKUs que tocan (y los que
+habían cambiado en la sincronización anterior). Las filas
+actualizadas del proveedor se guardan como parches sobre el catálogo base hasta
+que superan COMPACT_RATIO del base; entonces se reconstruye.
+"""
+import bisect
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+import numpy as np
+import pandas as pd
+
+from normalizer import STRING_DTYPE, to_catalog_schema
+
+logger = logging.getLogger(__name__)
+
+NEW = 'new'
+MISSING = 'missing'
+PRICE_CHANGED = 'price_changed'
+STOCK_CHANGED = 'stock_changed'
+UNCHANGED = 'unchanged'
+
+# Tiendas del índice de la sincronización anterior
+SUPPLIER = 'supplier'
+RETAILER = 'retailer'
+
+DIFF_CLASSES = (NEW, MISSING, PRICE_CHANGED, STOCK_CHANGED, UNCHANGED)
+
+# SKUs generados por process_product para productos sin SKU o con error
+PLACEHOLDER_SKU_PREFIXES = ('PROD-', 'ERROR-')
+
+# Diferencia mínima para considerar que el precio cambió (redondeo a centavos)
+PRICE_TOLERANCE = 0.005
+
+# Filas en parches, relativas al catálogo base, a partir de las que se reconstruye
+COMPACT_RATIO = 0.25
+
+def real_sku_mask(skus: pd.Series) -> np.ndarray:
+    """Filas con un SKU real (no vacío ni generado por process_product)"""
+    mask = skus.notna() & (skus != '')
+    for prefix in PLACEHOLDER_SKU_PREFIXES:
+        mask &= ~skus.str.startswith(prefix)
+    return mask.fillna(False).to_numpy(dtype=bool)
+
+def _numbers(df: pd.DataFrame, column: str, positions: np.ndarray) -> np.ndarray:
+    """Columna numérica en las posiciones dadas (NaN si el catálogo no la tiene)"""
+    if column not in df.columns:
+        return np.full(len(positions), np.nan)
+    values = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+    return values[positions]
+
+class CatalogDiff:
+    """
+    Diferencias por SKU entre el catálogo del proveedor y el propio
+
+    Las filas del proveedor se identifican por su posición: las del catálogo base
+    van de 0 a len(base) - 1 y cada parche continúa la numeración.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # Por tienda, SKU -> (precio, stock) de la sincronización anterior (sobrevive a _reset)
+        self._previous: Dict[str, Dict[str, Tuple[float, float]]] = {SUPPLIER: {}, RETAILER: {}}
+        self._reset()
+
+    def _reset(self):
+        # Catálogo base y parches del proveedor, con la posición de su primera fila
+        # y sus SKUs (None si no es real), precios y stocks por fila
+        self._parts: List[pd.DataFrame] = []
+        self._offsets: List[int] = []
+        self._values: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self._next_position = 0
+
+        # Proveedor: SKU -> posiciones, id -> posición
+        self._supplier_rows: Dict[str, List[int]] = {}
+        self._supplier_position: Dict[str, int] = {}
+
+        # Catálogo propio: SKU -> ids, id -> (sku, precio, stock)
+        self._retailer_ids: Dict[str, List[str]] = {}
+        self._retailer_values: Dict[str, Tuple[str, float, float]] = {}
+
+        self._status: Dict[str, str] = {}
+        self._members: Dict[str, Set[str]] = {kind: set() for kind in DIFF_CLASSES}
+        self._frames: Dict[str, pd.DataFrame] = {}
+
+    @property
+    def is_built(self) -> bool:
+        """Si ya se construyó el índice con un catálogo completo"""
+        return bool(self._parts)
+
+    def rebuild(self, supplier: pd.DataFrame, retailer: Any):
+        """
+        Construir el índice desde los catálogos completos
+
+        Args:
+            supplier: Catálogo del proveedor (OroColmbia)
+            retailer: Catálogo propio (GrupoFelmel) o conjunto de sus SKUs
+        """
+        with self._lock:
+            self._reset()
+            supplier_rows = self._add_part(supplier)
+            retailer_rows = self._index_retailer(self._retailer_frame(retailer))
+
+            # Clasificación en bloque: primera fila de cada SKU en cada tienda
+            new_row = (supplier_rows['price'] > 0) & (supplier_rows['stock'] > 0)
+            first = supplier_rows.drop_duplicates('sku').set_index('sku')
+            first['has_new_row'] = new_row.groupby(supplier_rows['sku'], sort=False).any()
+            listed = retailer_rows.drop_duplicates('sku').set_index('sku')
+            both = first.join(listed, how='outer', rsuffix='_retailer')
+
+            in_supplier = both['price'].index.isin(first.index)
+            in_retailer = both['price'].index.isin(listed.index)
+            price_changed = np.zeros(len(both), dtype=bool)
+            stock_changed = np.zeros(len(both), dtype=bool)
+            for store, suffix in ((SUPPLIER, ''), (RETAILER, '_retailer')):
+                previous = pd.DataFrame.from_dict(self._previous[store], orient='index',
+                                                  columns=['price', 'stock']).reindex(both.index)
+                price_changed |= ((both[f'price{suffix}'] - previous['price']).abs() > PRICE_TOLERANCE).to_numpy()
+                stock_changed |= (previous['stock'].notna() & both[f'stock{suffix}'].notna()
+                                  & (both[f'stock{suffix}'] != previous['stock'])).to_numpy()
+            kinds = np.select(
+                [in_supplier & ~in_retailer & both['has_new_row'].eq(True).to_numpy(),
+                 in_retailer & ~in_supplier,
+                 in_supplier & in_retailer & price_changed,
+                 in_supplier & in_retailer & stock_changed,
+                 in_supplier & in_retailer],
+                [NEW, MISSING, PRICE_CHANGED, STOCK_CHANGED, UNCHANGED],
+                default=''
+            )
+
+            skus = both.index.to_numpy(dtype=object)
+            for kind in DIFF_CLASSES:
+                self._members[kind] = set(skus[kinds == kind].tolist())
+            classified = kinds != ''
+            self._status = dict(zip(skus[classified].tolist(), kinds[classified].tolist()))
+            self._previous = {
+                SUPPLIER: dict(zip(first.index, zip(first['price'].tolist(), first['stock'].tolist()))),
+                RETAILER: dict(zip(listed.index, zip(listed['price'].tolist(), listed['stock'].tolist()))),
+            }
+            logger.info(f"Índice de diferencias reconstruido: {self.counts()}")
+
+    def update(self, supplier: pd.DataFrame, retailer: pd.DataFrame,
+               supplier_changes: Optional[pd.DataFrame] = None,
+               retailer_changes: Optional[pd.DataFrame] = None):
+        """
+        Incorporar un nuevo estado de los catálogos
+
+        Si hay filas recibidas de ambas tiendas (sincronización incremental) y el
+        índice ya existe, solo se reclasifican los SKUs de esas filas; si no (descarga
+        completa) o los parches crecieron demasiado, se reconstruye con los catálogos
+        completos.
+
+        Args:
+            supplier: Catálogo completo del proveedor tras la sincronización
+            retailer: Catálogo propio completo tras la sincronización
+            supplier_changes: Filas del proveedor recibidas (None si se reemplazó el catálogo)
+            retailer_changes: Filas propias recibidas (None si se reemplazó el catálogo)
+        """
+        with self._lock:
+            incremental = (
+                self.is_built
+                and supplier_changes is not None
+                and retailer_changes is not None
+                and (self._next_position - len(self._parts[0]) + len(supplier_changes)
+                     <= COMPACT_RATIO * max(len(self._parts[0]), 1))
+            )
+            if incremental:
+                self.apply_updates(supplier_changes, retailer_changes)
+            else:
+                self.rebuild(supplier, retailer)
+
+    def apply_updates(self, supplier_changes: Optional[pd.DataFrame] = None,
+                      retailer_changes: Optional[pd.DataFrame] = None):
+        """
+        Reclasificar solo los SKUs de las filas recibidas (fusionadas por id)
+
+        Args:
+            supplier_changes: Filas nuevas o modificadas del proveedor
+            retailer_changes: Filas nuevas o modificadas del catálogo propio
+        """
+        with self._lock:
+            if not self.is_built:
+                raise RuntimeError("El índice de diferencias aún no se construyó")
+
+            touched: Set[str] = set()
+            if supplier_changes is not None and not supplier_changes.empty:
+                # Retirar la versión anterior de las filas que llegan de nuevo
+                for product_id in supplier_changes['id'].astype(str):
+                    old = self._supplier_position.pop(product_id, None)
+                    if old is not None:
+                        touched.add(self._remove_supplier_row(old))
+                touched.update(self._add_part(supplier_changes.reset_index(drop=True))['sku'])
+
+            if retailer_changes is not None and not retailer_changes.empty:
+                for product_id in retailer_changes['id'].astype(str):
+                    old = self._retailer_values.pop(product_id, None)
+                    if old is not None:
+                        ids = self._retailer_ids[old[0]]
+                        ids.remove(product_id)
+                        if not ids:
+                            del self._retailer_ids[old[0]]
+                        touched.add(old[0])
+                touched.update(self._index_retailer(retailer_changes)['sku'])
+
+            # Los cambios marcados son respecto de la sincronización anterior: si esta
+            # no toca esos SKUs, vuelven a UNCHANGED
+            touched |= self._members[PRICE_CHANGED] | self._members[STOCK_CHANGED]
+            for sku in touched:
+                self._classify(sku)
+            for sku in touched:
+                self._remember(sku)
+            logger.info(f"Índice de diferencias: {len(touched)} SKUs reclasificados")
+
+    def _retailer_frame(self, retailer: Any) -> pd.DataFrame:
+        if isinstance(retailer, pd.DataFrame):
+            return retailer
+        return pd.DataFrame({'id': list(retailer), 'sku': list(retailer)})
+
+    def _add_part(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Agregar el catálogo base o un parche del proveedor e indexar sus filas con SKU real
+
+        Returns:
+            DataFrame (sku, price, stock) de las filas indexadas, en orden de posición
+        """
+        offset = self._next_position
+        real = real_sku_mask(df['sku']) if len(df) else np.zeros(0, dtype=bool)
+        skus = np.where(real, df['sku'].to_numpy(dtype=object), None) if len(df) else np.empty(0, dtype=object)
+        every_row = np.arange(len(df))
+        prices = _numbers(df, 'price', every_row)
+        stocks = _numbers(df, 'stock', every_row)
+
+        self._parts.append(df)
+        self._offsets.append(offset)
+        self._values.append((skus, prices, stocks))
+        self._next_position += len(df)
+
+        positions = np.flatnonzero(real)
+        real_skus = skus[positions].tolist()
+        for position, sku in zip((positions + offset).tolist(), real_skus):
+            self._supplier_rows.setdefault(sku, []).append(position)
+        if len(positions):
+            ids = df['id'].astype(str).to_numpy(dtype=object)[positions].tolist()
+            self._supplier_position.update(zip(ids, (positions + offset).tolist()))
+
+        return pd.DataFrame({'sku': real_skus, 'price': prices[positions], 'stock': stocks[positions]})
+
+    def _part_of(self, position: int) -> int:
+        return bisect.bisect_right(self._offsets, position) - 1
+
+    def _supplier_value(self, position: int) -> Tuple[str, float, float]:
+        part = self._part_of(position)
+        skus, prices, stocks = self._values[part]
+        row = position - self._offsets[part]
+        return skus[row], prices[row], stocks[row]
+
+    def _remove_supplier_row(self, position: int) -> str:
+        sku = self._supplier_value(position)[0]
+        rows = self._supplier_rows[sku]
+        rows.remove(position)
+        if not rows:
+            del self._supplier_rows[sku]
+        return sku
+
+    def _index_retailer(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Indexar los productos del catálogo propio con SKU (no vacío)
+
+        Returns:
+            DataFrame (sku, price, stock) de las filas indexadas
+        """
+        if df.empty or 'sku' not in df.columns:
+            return pd.DataFrame({'sku': [], 'price': [], 'stock': []})
+        skus = df['sku']
+        positions = np.flatnonzero((skus.notna() & (skus != '')).fillna(False).to_numpy(dtype=bool))
+        sku_values = skus.to_numpy(dtype=object)[positions].tolist()
+        ids = df['id'].astype(str).to_numpy(dtype=object)[positions].tolist()
+        prices = _numbers(df, 'price', positions)
+        stocks = _numbers(df, 'stock', positions)
+
+        for product_id, sku in zip(ids, sku_values):
+            self._retailer_ids.setdefault(sku, []).append(product_id)
+        self._retailer_values.update(zip(ids, zip(sku_values, prices.tolist(), stocks.tolist())))
+        return pd.DataFrame({'sku': sku_values, 'price': prices, 'stock': stocks})
+
+    def _classify(self, sku: str):
+        """Recalcular la clase de un SKU (misma regla que rebuild) y anular los frames afectados"""
+        rows = self._supplier_rows.get(sku)
+        listed = self._retailer_ids.get(sku)
+        kind = None
+
+        if rows and not listed:
+            if any(self._is_new_row(position) for position in rows):
+                kind = NEW
+        elif listed and not rows:
+            kind = MISSING
+        elif rows and listed:
+            price_changed = stock_changed = False
+            for store, (price, stock) in self._current(sku).items():
+                previous = self._previous[store].get(sku)
+                if previous is None:
+                    continue
+                # Con NaN (precio o stock que la tienda no trae) la comparación es falsa
+                price_changed |= abs(price - previous[0]) > PRICE_TOLERANCE
+                stock_changed |= stock != previous[1] and not (np.isnan(stock) or np.isnan(previous[1]))
+            if price_changed:
+                kind = PRICE_CHANGED
+            elif stock_changed:
+                kind = STOCK_CHANGED
+            else:
+                kind = UNCHANGED
+
+        previous = self._status.pop(sku, None)
+        if previous is not None:
+            self._members[previous].discard(sku)
+            self._frames.pop(previous, None)
+        if kind is not None:
+            self._status[sku] = kind
+            self._members[kind].add(sku)
+            self._frames.pop(kind, None)
+
+    def _current(self, sku: str) -> Dict[str, Tuple[float, float]]:
+        """(precio, stock) actuales de un SKU en cada tienda que lo tiene"""
+        current = {}
+        rows = self._supplier_rows.get(sku)
+        if rows:
+            current[SUPPLIER] = tuple(self._supplier_value(self._first_row(rows))[1:])
+        listed = self._retailer_ids.get(sku)
+        if listed:
+            current[RETAILER] = tuple(self._retailer_values[listed[0]][1:])
+        return current
+
+    def _remember(self, sku: str):
+        """Guardar los valores actuales de un SKU como los de la sincronización anterior"""
+        current = self._current(sku)
+        for store, previous in self._previous.items():
+            if store in current:
+                previous[sku] = current[store]
+            else:
+                previous.pop(sku, None)
+
+    def _first_row(self, rows: List[int]) -> int:
+        """
+        Fila que representa a un SKU repetido: la primera del catálogo fusionado
+
+        merge_products pone las filas recibidas antes que las del base, así que es
+        la primera fila del parche más reciente que tenga el SKU (rebuild toma la
+        primera del catálogo completo).
+        """
+        return min(rows, key=lambda position: (-self._part_of(position), position))
+
+    def _is_new_row(self, position: int) -> bool:
+        _, price, stock = self._supplier_value(position)
+        return price > 0 and stock > 0
+
+    def status(self, sku: str) -> Optional[str]:
+        """Clase de un SKU (None si no aplica ninguna)"""
+        with self._lock:
+            return self._status.get(sku)
+
+    def counts(self) -> Dict[str, int]:
+        """Número de SKUs de cada clase"""
+        with self._lock:
+            return {kind: len(self._members[kind]) for kind in DIFF_CLASSES}
+
+    def skus(self, kind: str) -> Set[str]:
+        """SKUs de una clase"""
+        with self._lock:
+            return set(self._members[kind])
+
+    def frame(self, kind: str) -> pd.DataFrame:
+        """
+        Filas de una clase listas para mostrar
+
+        NEW devuelve las filas del proveedor con precio y stock (igual que
+        find_new_products); MISSING las filas del catálogo propio; las demás clases
+        las filas del proveedor con retailer_price y retailer_stock. Todas, salvo
+        MISSING, ordenadas por fecha de modificación descendente. El resultado se
+        guarda hasta que cambia algún SKU de la clase.
+
+        Args:
+            kind: Una de DIFF_CLASSES
+
+        Returns:
+            DataFrame de la clase (vacío y sin columnas si no hay filas)
+        """
+        if kind not in DIFF_CLASSES:
+            raise ValueError(f"Clase de diferencia desconocida: {kind}")
+        with self._lock:
+            if kind not in self._frames:
+                self._frames[kind] = self._build_frame(kind)
+            return self._frames[kind]
+
+    def frames(self) -> Dict[str, pd.DataFrame]:
+        """Frames de todas las clases"""
+        return {kind: self.frame(kind) for kind in DIFF_CLASSES}
+
+    def _build_frame(self, kind: str) -> pd.DataFrame:
+        members = self._members[kind]
+        if not members:
+            return pd.DataFrame()
+
+        if kind == MISSING:
+            rows = [
+                (product_id, *self._retailer_values[product_id])
+                for sku in members for product_id in self._retailer_ids[sku]
+            ]
+            return pd.DataFrame(rows, columns=['id', 'sku', 'price', 'stock']).astype({'sku': STRING_DTYPE})
+
+        positions = [position for sku in members for position in self._supplier_rows[sku]]
+        if kind == NEW:
+            positions = [position for position in positions if self._is_new_row(position)]
+        df = self._take(sorted(positions))
+
+        if kind != NEW:
+            retailer = [self._retailer_values[self._retailer_ids[sku][0]] for sku in df['sku']]
+            df['retailer_price'] = [price for _, price, _ in retailer]
+            df['retailer_stock'] = [stock for _, _, stock in retailer]
+
+        return df.sort_values('date_modified', ascending=False)
+
+    def _take(self, positions: List[int]) -> pd.DataFrame:
+        """Filas del proveedor por posición, en orden (base y parches)"""
+        parts = []
+        start = 0
+        for number, offset in enumerate(self._offsets):
+            end = bisect.bisect_left(positions, self._offsets[number + 1]) \
+                if number + 1 < len(self._offsets) else len(positions)
+            if end > start:
+                parts.append(self._parts[number].take([position - offset for position in positions[start:end]]))
+            start = end
+
+        if len(parts) == 1:
+            return parts[0]
+        if not parts:
+            return self._parts[0].iloc[:0].copy()
+        # Las categorías de cada parte difieren: to_catalog_schema las vuelve a convertir
+        return to_catalog_schema(pd.concat(parts, ignore_index=True))
+
+_catalog_diff: Optional[CatalogDiff] = None
+_catalog_diff_lock = threading.Lock()
+
+def get_catalog_diff() -> CatalogDiff:
+    """Índice de diferencias compartido por el proceso (se mantiene entre sincronizaciones)"""
+    global _catalog_diff
+    with _catalog_diff_lock:
+        if _catalog_diff is None:
+            _catalog_diff = CatalogDiff()
+        return _catalog_diff
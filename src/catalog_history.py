@@ -0,0 +1,383 @@
+"""
+Historial versionado del catálogo procesado (Parquet particionado por tienda y fecha)
+
+Cada versión es un archivo inmutable:
+
+    <root>/source=<tienda>/date=<AAAA-MM-DD>/<HHMMSS>.parquet
+
+Las consultas a una fecha solo listan los directorios de las fechas necesarias
+y leen las columnas pedidas de una única versión. Con scan, los filtros de
+categoría, precio, stock y búsqueda se evalúan en Arrow mientras se lee el
+archivo (pyarrow.dataset), así a pandas solo llegan las filas y columnas que
+se muestran. Como los archivos no cambian, las lecturas y los resultados
+derivados se cachean por ruta.
+"""
+import os
+import re
+import json
+import shutil
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from catalog_diff import CatalogDiff, NEW
+from category_facets import CATEGORY_LIST_SEPARATOR, CATEGORY_SEPARATOR
+from normalizer import to_catalog_schema
+from snapshot_store import encode_frame, decode_frame
+
+logger = logging.getLogger(__name__)
+
+HISTORY_DIR = 'history'
+DATE_FORMAT = '%Y-%m-%d'
+TIME_FORMAT = '%H%M%S'
+READ_CACHE_SIZE = 16
+# Filas por grupo: scan lee y filtra el archivo por bloques de este tamaño
+ROW_GROUP_SIZE = 16_384
+# Metadatos del esquema Parquet con las columnas guardadas como JSON
+JSON_COLUMNS_KEY = b'catalog_history.json_columns'
+
+@lru_cache(maxsize=READ_CACHE_SIZE)
+def _read_version(path: str, columns: Optional[Tuple[str, ...]]) -> pd.DataFrame:
+    """Leer (una vez por proceso) las columnas de una versión; el resultado es compartido"""
+    # ParquetFile lee solo el archivo: read_table agregaría las columnas source y date de la ruta
+    return _to_frame(pq.ParquetFile(path).read(columns=list(columns) if columns is not None else None))
+
+@lru_cache(maxsize=READ_CACHE_SIZE)
+def _schema_names(path: str) -> frozenset:
+    """Columnas guardadas en una versión (solo lee el pie del archivo)"""
+    return frozenset(pq.read_schema(path).names)
+
+def _to_frame(table: pa.Table) -> pd.DataFrame:
+    """Tabla leída de una versión a DataFrame con el esquema compacto"""
+    json_columns = json.loads((table.schema.metadata or {}).get(JSON_COLUMNS_KEY, b'[]'))
+    return to_catalog_schema(decode_frame(table.to_pandas(), json_columns))
+
+def catalog_filter(categories: Optional[Iterable[str]] = None, max_price: Optional[float] = None,
+                   min_stock: Optional[int] = None, search: Optional[str] = None,
+                   skus: Optional[Iterable[str]] = None, available: bool = False,
+                   category_column: str = 'category_list') -> Optional[ds.Expression]:
+    """
+    Filtro de Arrow equivalente a los filtros de las páginas de productos
+
+    Args:
+        categories: Solo filas que tienen todas estas categorías (nombre completo)
+        max_price: Precio máximo
+        min_stock: Stock mínimo
+        search: Texto contenido en el nombre o el SKU (sin distinguir mayúsculas)
+        skus: Solo estos SKUs
+        available: Solo filas con precio y stock (criterio de productos nuevos)
+        category_column: Columna con las categorías de cada fila ('categories' en
+            versiones anteriores a category_list, ver CatalogHistory.category_column)
+
+    Returns:
+        Expresión para scan, o None si no hay filtros
+    """
+    conditions = []
+    separator = re.escape(CATEGORY_LIST_SEPARATOR if category_column == 'category_list' else CATEGORY_SEPARATOR)
+    for category in categories or ():
+        # La columna se guarda como diccionario (dtype category); el nombre debe
+        # ser una de las categorías de la lista, no parte de otra
+        conditions.append(pc.match_substring_regex(ds.field(category_column).cast(pa.string()),
+                                                   f"(^|{separator}){re.escape(category)}({separator}|$)"))
+    if max_price is not None:
+        conditions.append(ds.field('price') <= max_price)
+    if min_stock:
+        conditions.append(ds.field('stock') >= min_stock)
+    if search:
+        conditions.append(pc.match_substring(ds.field('name'), search, ignore_case=True)
+                          | pc.match_substring(ds.field('sku'), search, ignore_case=True))
+    if skus is not None:
+        conditions.append(ds.field('sku').isin(pa.array(list(skus), type=pa.string())))
+    if available:
+        conditions.append((ds.field('price') > 0) & (ds.field('stock') > 0))
+    if not conditions:
+        return None
+    expression = conditions[0]
+    for condition in conditions[1:]:
+        expression = expression & condition
+    return expression
+
+class CatalogVersion:
+    """Versión guardada del catálogo de una tienda"""
+
+    def __init__(self, source_name: str, captured_at: datetime, path: str):
+        self.source_name = source_name
+        self.captured_at = captured_at
+        self.path = path
+
+    def __repr__(self):
+        return f"CatalogVersion({self.source_name!r}, {self.captured_at.isoformat()})"
+
+class CatalogHistory:
+    """Versiones del catálogo por tienda con consultas a una fecha"""
+
+    def __init__(self, root: str, cache_size: int = 32):
+        """
+        Args:
+            root: Directorio del historial (DATA_DIR/history)
+            cache_size: Resultados derivados que se conservan (cached)
+        """
+        self.root = root
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._results: 'OrderedDict[Hashable, Any]' = OrderedDict()
+
+    def _source_dir(self, source_name: str) -> str:
+        return os.path.join(self.root, f"source={source_name}")
+
+    def _dates(self, source_name: str) -> List[str]:
+        """Particiones de fecha de una tienda, de la más reciente a la más antigua"""
+        try:
+            names = os.listdir(self._source_dir(source_name))
+        except OSError:
+            return []
+        return sorted((name[len('date='):] for name in names if name.startswith('date=')), reverse=True)
+
+    def _iter_versions(self, source_name: str, since: Optional[datetime] = None,
+                       until: Optional[datetime] = None) -> Iterator[CatalogVersion]:
+        """Versiones entre since y until, de la más reciente a la más antigua"""
+        for day in self._dates(source_name):
+            if until is not None and day > until.strftime(DATE_FORMAT):
+                continue
+            if since is not None and day < since.strftime(DATE_FORMAT):
+                break
+            directory = os.path.join(self._source_dir(source_name), f"date={day}")
+            try:
+                files = sorted((name for name in os.listdir(directory) if name.endswith('.parquet')), reverse=True)
+            except OSError:
+                continue
+            for name in files:
+                captured_at = datetime.strptime(f"{day} {name[:-len('.parquet')]}", f"{DATE_FORMAT} {TIME_FORMAT}")
+                if until is not None and captured_at > until:
+                    continue
+                if since is not None and captured_at < since:
+                    return
+                yield CatalogVersion(source_name, captured_at, os.path.join(directory, name))
+
+    def versions(self, source_name: str, since: Optional[datetime] = None,
+                 until: Optional[datetime] = None) -> List[CatalogVersion]:
+        """
+        Versiones guardadas de una tienda
+
+        Args:
+            source_name: Nombre de la tienda
+            since: Desde (UTC, incluido)
+            until: Hasta (UTC, incluido)
+
+        Returns:
+            Lista de CatalogVersion en orden cronológico
+        """
+        return list(reversed(list(self._iter_versions(source_name, since, until))))
+
+    def version_at(self, source_name: str, moment: datetime) -> Optional[CatalogVersion]:
+        """Última versión guardada hasta moment (UTC), o None si no hay ninguna"""
+        return next(self._iter_versions(source_name, until=moment), None)
+
+    def latest(self, source_name: str) -> Optional[CatalogVersion]:
+        return next(self._iter_versions(source_name), None)
+
+    def read(self, version: CatalogVersion, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Leer una versión (solo las columnas pedidas)
+
+        El DataFrame se comparte entre llamadas: no debe modificarse.
+
+        Args:
+            version: Versión a leer
+            columns: Columnas a leer (None = todas)
+
+        Returns:
+            DataFrame con el catálogo de la versión
+        """
+        return _read_version(version.path, tuple(columns) if columns is not None else None)
+
+    def scan(self, version: CatalogVersion, columns: Optional[List[str]] = None,
+             filter: Optional[ds.Expression] = None) -> pd.DataFrame:
+        """
+        Leer de una versión solo las filas que cumplen filter (ver catalog_filter)
+
+        El filtro y la proyección se aplican en Arrow por lotes durante la
+        lectura; nunca se arma el catálogo completo en pandas.
+
+        Args:
+            version: Versión a leer
+            columns: Columnas a devolver (None = todas)
+            filter: Expresión de Arrow
+
+        Returns:
+            DataFrame nuevo con las filas filtradas
+        """
+        dataset = ds.dataset(version.path, format='parquet')
+        return _to_frame(dataset.to_table(columns=columns, filter=filter))
+
+    def category_column(self, version: CatalogVersion) -> str:
+        """Columna de categorías para filtrar una versión (las anteriores a category_list solo tienen categories)"""
+        return 'category_list' if 'category_list' in _schema_names(version.path) else 'categories'
+
+    def as_of(self, source_name: str, moment: datetime,
+              columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """
+        Catálogo de una tienda tal como estaba en moment
+
+        Args:
+            source_name: Nombre de la tienda
+            moment: Momento (UTC)
+            columns: Columnas a leer (None = todas)
+
+        Returns:
+            DataFrame compartido (no modificar), o None si no hay versiones hasta moment
+        """
+        version = self.version_at(source_name, moment)
+        return self.read(version, columns) if version is not None else None
+
+    def cached(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Resultado derivado de versiones, calculado una vez por clave
+
+        La clave debe incluir las rutas de las versiones usadas: como son
+        inmutables, el resultado nunca queda desactualizado.
+        """
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                return self._results[key]
+
+        result = compute()
+        with self._lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.cache_size:
+                self._results.popitem(last=False)
+        return result
+
+    def new_products_between(self, supplier: str, retailer: str, until: datetime,
+                             since: Optional[datetime] = None, columns: Optional[List[str]] = None,
+                             **filters) -> Optional[pd.DataFrame]:
+        """
+        Productos nuevos según las versiones guardadas del catálogo
+
+        Compara el proveedor y la tienda tal como estaban en until. Con since,
+        solo devuelve los que además no estaban en el proveedor en since (los que
+        aparecieron entre ambas fechas). Los SKUs nuevos se calculan con
+        CatalogDiff sobre las columnas id, sku, price y stock; las filas a mostrar se
+        leen con los filtros aplicados en Arrow (catalog_filter). Los resultados
+        se cachean por versión y filtros.
+
+        Args:
+            supplier: Tienda del proveedor (OroColmbia)
+            retailer: Tienda propia (GrupoFelmel)
+            until: Momento (UTC) de la comparación
+            since: Momento (UTC) inicial opcional
+            columns: Columnas a devolver (None = todas)
+            **filters: categories (tupla), max_price, min_stock o search (ver catalog_filter)
+
+        Returns:
+            DataFrame con productos nuevos, o None si no hay versiones hasta until
+        """
+        supplier_version = self.version_at(supplier, until)
+        if supplier_version is None:
+            logger.warning(f"No hay versiones de {supplier} hasta {until.isoformat()} UTC")
+            return None
+        retailer_version = self.version_at(retailer, until)
+        since_version = self.version_at(supplier, since) if since else None
+        versions_key = (supplier_version.path,
+                        retailer_version.path if retailer_version else None,
+                        since_version.path if since_version else None)
+
+        def new_skus():
+            retailer_skus = (frozenset(self.read(retailer_version, ['sku'])['sku'])
+                             if retailer_version is not None else frozenset())
+            diff = CatalogDiff()
+            diff.rebuild(self.read(supplier_version, ['id', 'sku', 'price', 'stock']), retailer_skus)
+            skus = diff.skus(NEW)
+            if since_version is not None:
+                skus -= set(self.read(since_version, ['sku'])['sku'])
+            return frozenset(skus)
+
+        def compute():
+            skus = self.cached(('new_skus', *versions_key), new_skus)
+            # Mismas filas que CatalogDiff.frame(NEW): solo las que tienen precio y stock
+            expression = catalog_filter(skus=skus, available=True,
+                                        category_column=self.category_column(supplier_version), **filters)
+            new_products = self.scan(supplier_version, columns, expression)
+            if new_products.empty:
+                return pd.DataFrame()
+            if 'date_modified' in new_products.columns:
+                new_products = new_products.sort_values('date_modified', ascending=False)
+            return new_products
+
+        key = ('new_products', *versions_key, tuple(columns) if columns else None, tuple(sorted(filters.items())))
+        return self.cached(key, compute)
+
+    def append(self, source_name: str, df: pd.DataFrame, captured_at: datetime,
+               min_interval_hours: float = 0) -> Optional[CatalogVersion]:
+        """
+        Guardar una versión del catálogo de una tienda
+
+        Args:
+            source_name: Nombre de la tienda
+            df: Catálogo procesado (esquema compacto)
+            captured_at: Momento (UTC) de la sincronización
+            min_interval_hours: No guardar si la última versión es más reciente que esto
+
+        Returns:
+            La versión guardada, o None si no tocaba guardar
+        """
+        latest = self.latest(source_name)
+        if latest is not None and captured_at - latest.captured_at < timedelta(hours=min_interval_hours):
+            return None
+
+        directory = os.path.join(self._source_dir(source_name), f"date={captured_at.strftime(DATE_FORMAT)}")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{captured_at.strftime(TIME_FORMAT)}.parquet")
+        if os.path.exists(path):
+            # Las versiones son inmutables (las lecturas se cachean por ruta)
+            return None
+
+        # Escribir aparte y renombrar: un lector nunca ve una versión a medias
+        encoded, json_columns = encode_frame(df)
+        table = pa.Table.from_pandas(encoded, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                               JSON_COLUMNS_KEY: json.dumps(json_columns).encode()})
+        tmp_path = f"{path}.tmp"
+        pq.write_table(table, tmp_path, row_group_size=ROW_GROUP_SIZE)
+        os.replace(tmp_path, path)
+
+        logger.info(f"Versión del catálogo de {source_name} guardada: {captured_at.isoformat()} UTC ({len(df)} filas)")
+        return CatalogVersion(source_name, captured_at, path)
+
+    def prune(self, source_name: str, retention_days: float, now: datetime) -> int:
+        """
+        Borrar las particiones de fecha anteriores a la retención
+
+        Returns:
+            Número de particiones borradas
+        """
+        cutoff = (now - timedelta(days=retention_days)).strftime(DATE_FORMAT)
+        removed = 0
+        for day in self._dates(source_name):
+            if day < cutoff:
+                shutil.rmtree(os.path.join(self._source_dir(source_name), f"date={day}"), ignore_errors=True)
+                removed += 1
+        if removed:
+            logger.info(f"Historial de {source_name}: {removed} días anteriores a {cutoff} borrados")
+        return removed
+
+_histories: Dict[str, CatalogHistory] = {}
+_histories_lock = threading.Lock()
+
+def get_catalog_history(data_dir: str) -> CatalogHistory:
+    """Historial compartido por el proceso (una instancia por directorio, con su cache)"""
+    root = os.path.join(data_dir, HISTORY_DIR)
+    with _histories_lock:
+        if root not in _histories:
+            _histories[root] = CatalogHistory(root)
+        return _histories[root]
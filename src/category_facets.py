@@ -0,0 +1,120 @@
+"""
+Índice de categorías (facetas) de un catálogo
+
+La columna category_list guarda los nombres de las categorías de cada
+producto unidos con CATEGORY_LIST_SEPARATOR, un carácter de control que no
+aparece en los nombres (la columna categories, unida con ', ', es solo para
+mostrar: un nombre como "Aretes, Topos" no se puede separar de ella). Aquí se
+separan una vez por versión del catálogo: cada fila queda con el código de su
+combinación de categorías y una matriz booleana indica qué categorías tiene
+cada combinación (categoría ->
+combinaciones -> filas). Filtrar por varias categorías es cruzar filas de esa
+matriz y consultar el código de cada fila; los conteos por categoría salen
+de contar las combinaciones de las filas filtradas. Como no se buscan
+subcadenas, "Anillos" ya no coincide con "Anillos de Compromiso".
+"""
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Separador de la columna categories (texto que se muestra y se exporta)
+CATEGORY_SEPARATOR = ', '
+# Separador de la columna category_list
+CATEGORY_LIST_SEPARATOR = '\x1f'
+
+def join_category_list(names: Iterable[Any]) -> str:
+    """Valor de la columna category_list para una lista de nombres de categorías"""
+    return CATEGORY_LIST_SEPARATOR.join(
+        name for name in (str(name).replace(CATEGORY_LIST_SEPARATOR, ' ').strip() for name in names) if name
+    )
+
+def split_category_list(value: Any) -> List[str]:
+    """Nombres de las categorías de un valor de la columna category_list"""
+    if not isinstance(value, str):
+        return []
+    return [name for name in value.split(CATEGORY_LIST_SEPARATOR) if name]
+
+def split_categories(value: Any) -> List[str]:
+    """
+    Nombres de las categorías de un valor de la columna categories
+
+    Solo para catálogos guardados antes de category_list: los nombres que
+    contienen ', ' quedan partidos.
+    """
+    if not isinstance(value, str):
+        return []
+    return [name.strip() for name in value.split(CATEGORY_SEPARATOR) if name.strip()]
+
+class CategoryFacets:
+    """Categorías de cada fila de un catálogo, como códigos y matriz de pertenencia"""
+
+    def __init__(self, categories: pd.Series,
+                 split: Callable[[Any], List[str]] = split_category_list):
+        """
+        Args:
+            categories: Columna category_list del catálogo
+            split: Función que separa un valor de la columna en nombres
+        """
+        codes, combinations = pd.factorize(categories)
+        # La última combinación (sin categorías) es la de los valores nulos
+        combinations = [split(value) for value in combinations] + [[]]
+        self._codes = np.where(codes < 0, len(combinations) - 1, codes).astype(np.int32)
+
+        self.categories = sorted({name for names in combinations for name in names})
+        self._positions = {name: i for i, name in enumerate(self.categories)}
+        self._membership = np.zeros((len(self.categories), len(combinations)), dtype=bool)
+        for code, names in enumerate(combinations):
+            self._membership[[self._positions[name] for name in names], code] = True
+        logger.info(f"Índice de categorías armado: {len(self.categories)} categorías, "
+                    f"{len(combinations)} combinaciones, {len(self._codes)} filas")
+
+    def __len__(self):
+        return len(self._codes)
+
+    def mask(self, selected: Iterable[str]) -> Optional[np.ndarray]:
+        """
+        Filas que tienen todas las categorías seleccionadas
+
+        Args:
+            selected: Nombres de categorías
+
+        Returns:
+            Array booleano del largo del catálogo, o None si no hay selección
+        """
+        allowed = None
+        for name in selected:
+            position = self._positions.get(name)
+            if position is None:
+                return np.zeros(len(self._codes), dtype=bool)
+            row = self._membership[position]
+            allowed = row.copy() if allowed is None else allowed & row
+        return allowed[self._codes] if allowed is not None else None
+
+    def counts(self, positions: np.ndarray) -> Dict[str, int]:
+        """
+        Filas de cada categoría entre las posiciones dadas
+
+        Args:
+            positions: Posiciones (iloc) de las filas filtradas
+
+        Returns:
+            Diccionario categoría -> número de filas
+        """
+        combination_counts = np.bincount(self._codes[positions], minlength=self._membership.shape[1])
+        counts = self._membership.astype(np.int64) @ combination_counts
+        return dict(zip(self.categories, counts.tolist()))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'CategoryFacets':
+        """
+        Índice de categorías de un catálogo
+
+        Usa category_list; los snapshots y versiones anteriores a esa columna
+        se indexan separando categories.
+        """
+        if 'category_list' in df.columns:
+            return cls(df['category_list'])
+        return cls(df['categories'], split_categories)
@@ -0,0 +1,196 @@
+"""
+Motor de filtros de las páginas de productos
+
+Los DataFrames del catálogo son compartidos por todas las sesiones y no cambian
+dentro de una versión (CatalogCache publica una versión nueva en cada
+recarga). Por eso las opciones de los filtros, el índice de categorías
+(CategoryFacets) y el de búsqueda (SearchIndex) se arman una vez por versión,
+y el resultado de cada combinación de filtros, como posiciones de filas, se
+guarda en una cache LRU del proceso junto con los conteos por categoría.
+Nunca se copia el DataFrame base.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, NamedTuple, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from category_facets import CategoryFacets
+from search_index import SearchIndex
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_PRICE = 1000000.0
+# Combinaciones de filtros guardadas (entre todas las sesiones y catálogos)
+FILTER_CACHE_SIZE = 64
+# Versiones de catálogo con opciones e índice de categorías guardados
+# (sesiones aún en una versión anterior)
+OPTIONS_CACHE_SIZE = 8
+# Índices de búsqueda guardados (ocupan más memoria: los dos catálogos en dos versiones)
+INDEX_CACHE_SIZE = 4
+
+class FilterParams(NamedTuple):
+    """Valores de los filtros de una página de productos"""
+    categories: Tuple[str, ...] = ()  # Vacío = todas; si no, filas con todas ellas
+    max_price: Optional[float] = None
+    min_stock: int = 0
+    search: str = ''
+
+class FilterOptions(NamedTuple):
+    """Opciones de los filtros para una versión del catálogo"""
+    categories: List[str]
+    max_price: float
+
+def filter_mask(df: pd.DataFrame, params: FilterParams) -> np.ndarray:
+    """
+    Filas que cumplen los filtros de precio y stock (máscara booleana)
+
+    Las categorías las resuelve CategoryFacets y la búsqueda SearchIndex.
+
+    Args:
+        df: Catálogo (OroColmbia o productos nuevos)
+        params: Filtros; max_price None = sin límite
+
+    Returns:
+        Array booleano del largo de df
+    """
+    mask = df['stock'] >= params.min_stock
+    if params.max_price is not None:
+        mask &= df['price'] <= params.max_price
+    return mask.to_numpy(dtype=bool)
+
+def filter_options(df: pd.DataFrame, facets: CategoryFacets) -> FilterOptions:
+    """Categorías (ordenadas) y precio máximo de un catálogo"""
+    max_price = float(df['price'].max()) if not df.empty else DEFAULT_MAX_PRICE
+    return FilterOptions(facets.categories, max_price)
+
+class FilterEngine:
+    """Caches de opciones y de resultados de filtros por versión del catálogo"""
+
+    def __init__(self, cache_size: int = FILTER_CACHE_SIZE):
+        """
+        Args:
+            cache_size: Resultados de filtros que se conservan (LRU)
+        """
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._options: 'OrderedDict[Tuple[str, Hashable], FilterOptions]' = OrderedDict()
+        self._facets: 'OrderedDict[Tuple[str, Hashable], CategoryFacets]' = OrderedDict()
+        self._indexes: 'OrderedDict[Tuple[str, Hashable], SearchIndex]' = OrderedDict()
+        self._results: 'OrderedDict[Tuple[str, Hashable, FilterParams], np.ndarray]' = OrderedDict()
+        self._counts: 'OrderedDict[Tuple[str, Hashable, FilterParams], Dict[str, int]]' = OrderedDict()
+        # Aciertos y fallos de la cache de resultados (positions)
+        self.hits = 0
+        self.misses = 0
+
+    def _cached(self, cache: OrderedDict, key: Hashable, size: int, compute: Callable[[], Any]) -> Any:
+        """Valor de una de las caches LRU, calculado fuera del lock si no está"""
+        with self._lock:
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+                return value
+
+        value = compute()
+        with self._lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > size:
+                cache.popitem(last=False)
+        return value
+
+    def options(self, name: str, version: Hashable, df: pd.DataFrame) -> FilterOptions:
+        """
+        Opciones de los filtros de un catálogo, calculadas una vez por versión
+
+        Args:
+            name: Nombre del catálogo ('orocolombia', 'new_products')
+            version: Versión del catálogo (CatalogCache)
+            df: Catálogo de esa versión
+        """
+        return self._cached(self._options, (name, version), OPTIONS_CACHE_SIZE,
+                            lambda: filter_options(df, self.facets(name, version, df)))
+
+    def facets(self, name: str, version: Hashable, df: pd.DataFrame) -> CategoryFacets:
+        """Índice de categorías de un catálogo, armado una vez por versión"""
+        return self._cached(self._facets, (name, version), OPTIONS_CACHE_SIZE,
+                            lambda: CategoryFacets.from_frame(df))
+
+    def search_index(self, name: str, version: Hashable, df: pd.DataFrame) -> SearchIndex:
+        """Índice de búsqueda de un catálogo, armado una vez por versión"""
+        return self._cached(self._indexes, (name, version), INDEX_CACHE_SIZE,
+                            lambda: SearchIndex.from_frame(df))
+
+    def positions(self, name: str, version: Hashable, df: pd.DataFrame, params: FilterParams) -> np.ndarray:
+        """
+        Posiciones (iloc) de las filas que cumplen params
+
+        El resultado es de solo lectura y se comparte entre sesiones.
+
+        Args:
+            name: Nombre del catálogo
+            version: Versión del catálogo (CatalogCache)
+            df: Catálogo de esa versión
+            params: Filtros
+
+        Returns:
+            Array de posiciones: en orden del catálogo, o con los SKUs iguales
+            a la búsqueda primero (ver SearchIndex.search)
+        """
+        key = (name, version, params)
+        with self._lock:
+            hit = key in self._results
+            self.hits += hit
+            self.misses += not hit
+        return self._cached(self._results, key, self.cache_size,
+                            lambda: self._filter(name, version, df, params))
+
+    def _filter(self, name: str, version: Hashable, df: pd.DataFrame, params: FilterParams) -> np.ndarray:
+        mask = filter_mask(df, params)
+        category_mask = self.facets(name, version, df).mask(params.categories)
+        if category_mask is not None:
+            mask &= category_mask
+        matches = self.search_index(name, version, df).search(params.search) if params.search else None
+        positions = np.flatnonzero(mask) if matches is None else matches[mask[matches]]
+        positions.setflags(write=False)
+        return positions
+
+    def category_counts(self, name: str, version: Hashable, df: pd.DataFrame,
+                        params: FilterParams) -> Dict[str, int]:
+        """
+        Filas de cada categoría entre las que cumplen params
+
+        Con la selección de categorías actual, es el número de filas que
+        quedarían al agregar cada categoría (las seleccionadas muestran el total).
+
+        Args:
+            name: Nombre del catálogo
+            version: Versión del catálogo (CatalogCache)
+            df: Catálogo de esa versión
+            params: Filtros
+
+        Returns:
+            Diccionario categoría -> número de filas
+        """
+        return self._cached(self._counts, (name, version, params), self.cache_size,
+                            lambda: self.facets(name, version, df).counts(self.positions(name, version, df, params)))
+
+    def clear(self):
+        with self._lock:
+            self._options.clear()
+            self._facets.clear()
+            self._indexes.clear()
+            self._results.clear()
+            self._counts.clear()
+
+_filter_engine: Optional[FilterEngine] = None
+_filter_engine_lock = threading.Lock()
+
+def get_filter_engine() -> FilterEngine:
+    """Motor de filtros compartido por el proceso"""
+    global _filter_engine
+    with _filter_engine_lock:
+        if _filter_engine is None:
+            _filter_engine = FilterEngine()
+        return _filter_engine
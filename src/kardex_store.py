@@ -0,0 +1,380 @@
+"""
+Kardex: registro histórico de movimientos de precio y stock por SKU (SQLite)
+
+Cada sincronización compara el catálogo recibido con el último estado conocido
+de cada SKU y agrega solo los movimientos (altas, cambios y bajas) a una tabla
+de solo inserción. La base usa WAL para que las lecturas de la vista de
+historial no bloqueen la escritura del hilo de recarga.
+
+El estado de una tienda en cualquier momento pasado se reconstruye con una
+búsqueda indexada por SKU (último movimiento anterior a la fecha), sin recorrer
+todo el historial. La compactación periódica reduce los movimientos más
+antiguos que la retención al último estado de cada SKU.
+"""
+import os
+import sqlite3
+import logging
+from contextlib import closing
+from datetime import datetime, timedelta
+from typing import List, Optional
+import numpy as np
+import pandas as pd
+
+from catalog_diff import real_sku_mask, PRICE_TOLERANCE
+
+logger = logging.getLogger(__name__)
+
+KARDEX_FILE = 'kardex.sqlite'
+
+ADDED = 'added'
+CHANGED = 'changed'
+REMOVED = 'removed'
+
+# Formato de las marcas de tiempo (UTC): ordenable como texto
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+MOVEMENT_COLUMNS = ['source', 'sku', 'recorded_at', 'kind', 'price', 'stock', 'price_delta', 'stock_delta']
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS movements (
+        source TEXT NOT NULL,
+        sku TEXT NOT NULL,
+        recorded_at TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        price REAL NOT NULL,
+        stock INTEGER NOT NULL,
+        price_delta REAL NOT NULL,
+        stock_delta INTEGER NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS movements_by_sku ON movements (source, sku, recorded_at);
+    CREATE INDEX IF NOT EXISTS movements_by_time ON movements (source, recorded_at);
+    CREATE TABLE IF NOT EXISTS sku_state (
+        source TEXT NOT NULL,
+        sku TEXT NOT NULL,
+        price REAL NOT NULL,
+        stock INTEGER NOT NULL,
+        listed INTEGER NOT NULL,
+        recorded_at TEXT NOT NULL,
+        PRIMARY KEY (source, sku)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS kardex_meta (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    );
+"""
+
+def format_timestamp(moment: datetime) -> str:
+    return moment.strftime(TIMESTAMP_FORMAT)
+
+def catalog_state(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Precio y stock por SKU de un catálogo (primera fila de cada SKU real)
+
+    Args:
+        df: Catálogo compacto (OroColmbia o GrupoFelmel)
+
+    Returns:
+        DataFrame con columnas sku, price y stock
+    """
+    if df.empty or 'sku' not in df.columns:
+        return pd.DataFrame({'sku': [], 'price': [], 'stock': []})
+    real = df[real_sku_mask(df['sku'])]
+    state = pd.DataFrame({
+        'sku': real['sku'].astype(str).to_numpy(dtype=object),
+        'price': pd.to_numeric(real['price'], errors='coerce').fillna(0).to_numpy(dtype=float)
+        if 'price' in real.columns else 0.0,
+        'stock': pd.to_numeric(real['stock'], errors='coerce').fillna(0).to_numpy(dtype=np.int64)
+        if 'stock' in real.columns else 0,
+    })
+    return state.drop_duplicates('sku', ignore_index=True)
+
+class KardexStore:
+    """Movimientos de precio y stock por (tienda, SKU) con reconstrucción a una fecha"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Ruta del archivo SQLite (se crea al primer registro)
+        """
+        self.path = path
+
+    def _connect(self) -> sqlite3.Connection:
+        # Una conexión por operación: el registro corre en el hilo de recarga y
+        # las consultas en los hilos de las sesiones
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        return conn
+
+    def record(self, source_name: str, df: pd.DataFrame, recorded_at: datetime, full: bool) -> int:
+        """
+        Registrar los movimientos de una sincronización
+
+        Args:
+            source_name: Nombre de la tienda
+            df: Catálogo completo (full=True) o filas recibidas en una sincronización incremental
+            recorded_at: Momento (UTC) de la sincronización
+            full: Si df es el catálogo completo; solo entonces los SKUs ausentes se dan de baja
+
+        Returns:
+            Número de movimientos registrados
+        """
+        state = catalog_state(df)
+        timestamp = format_timestamp(recorded_at)
+
+        with closing(self._connect()) as conn, conn:
+            previous = self._previous_state(conn, source_name, None if full else state['sku'].tolist())
+            merged = state.merge(previous, on='sku', how='outer', suffixes=('', '_before'), indicator=True)
+            listed_before = merged['listed'].fillna(0).astype(bool)
+
+            added = (merged['_merge'] == 'left_only') | ((merged['_merge'] == 'both') & ~listed_before)
+            changed = ((merged['_merge'] == 'both') & listed_before
+                       & (((merged['price'] - merged['price_before']).abs() > PRICE_TOLERANCE)
+                          | (merged['stock'] != merged['stock_before'])))
+            removed = (merged['_merge'] == 'right_only') & listed_before if full else pd.Series(False, index=merged.index)
+
+            parts = [
+                self._movements(merged[mask], kind, source_name, timestamp)
+                for mask, kind in ((added, ADDED), (changed, CHANGED), (removed, REMOVED)) if mask.any()
+            ]
+            movements = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=MOVEMENT_COLUMNS)
+
+            if not movements.empty:
+                conn.executemany(
+                    f"INSERT INTO movements ({', '.join(MOVEMENT_COLUMNS)}) VALUES ({', '.join('?' * len(MOVEMENT_COLUMNS))})",
+                    movements[MOVEMENT_COLUMNS].itertuples(index=False, name=None)
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO sku_state (source, sku, price, stock, listed, recorded_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    ((source_name, sku, price, stock, int(kind != REMOVED), timestamp)
+                     for sku, price, stock, kind in movements[['sku', 'price', 'stock', 'kind']].itertuples(
+                         index=False, name=None))
+                )
+
+        if len(movements):
+            logger.info(f"Kardex {source_name}: {len(movements)} movimientos registrados")
+        return len(movements)
+
+    def _previous_state(self, conn: sqlite3.Connection, source_name: str,
+                        skus: Optional[List[str]]) -> pd.DataFrame:
+        """Último estado conocido de todos los SKUs de la tienda o solo de skus"""
+        columns = ['sku', 'price', 'stock', 'listed']
+        if skus is None:
+            rows = conn.execute("SELECT sku, price, stock, listed FROM sku_state WHERE source = ?",
+                                (source_name,)).fetchall()
+        else:
+            rows = []
+            # Por lotes para no superar el límite de parámetros de SQLite
+            for start in range(0, len(skus), 500):
+                batch = skus[start:start + 500]
+                rows.extend(conn.execute(
+                    f"SELECT sku, price, stock, listed FROM sku_state "
+                    f"WHERE source = ? AND sku IN ({', '.join('?' * len(batch))})",
+                    [source_name, *batch]
+                ).fetchall())
+        return pd.DataFrame(rows, columns=columns).astype({'price': float, 'stock': np.int64, 'listed': np.int64})
+
+    def _movements(self, rows: pd.DataFrame, kind: str, source_name: str, timestamp: str) -> pd.DataFrame:
+        if kind == REMOVED:
+            price = rows['price_before'].to_numpy(dtype=float)
+            stock = np.zeros(len(rows), dtype=np.int64)
+        else:
+            price = rows['price'].to_numpy(dtype=float)
+            stock = rows['stock'].to_numpy(dtype=np.int64)
+
+        if kind == ADDED:
+            # Reaparición de un SKU dado de baja: delta desde stock 0 y el último precio
+            price_before = rows['price_before'].fillna(0).to_numpy(dtype=float)
+            stock_before = np.zeros(len(rows), dtype=np.int64)
+        else:
+            price_before = rows['price_before'].to_numpy(dtype=float)
+            stock_before = rows['stock_before'].to_numpy(dtype=np.int64)
+
+        return pd.DataFrame({
+            'source': source_name,
+            'sku': rows['sku'].to_numpy(dtype=object),
+            'recorded_at': timestamp,
+            'kind': kind,
+            'price': price,
+            'stock': stock,
+            'price_delta': price - price_before,
+            'stock_delta': stock - stock_before,
+        })
+
+    def history(self, source_name: str, sku: str, since: Optional[datetime] = None,
+                until: Optional[datetime] = None) -> pd.DataFrame:
+        """
+        Movimientos de un SKU en orden cronológico
+
+        Args:
+            source_name: Nombre de la tienda
+            sku: SKU del producto
+            since: Desde (UTC, incluido)
+            until: Hasta (UTC, incluido)
+
+        Returns:
+            DataFrame con MOVEMENT_COLUMNS
+        """
+        return self.movements(source_name, since, until, sku=sku, newest_first=False, limit=None)
+
+    def movements(self, source_name: Optional[str] = None, since: Optional[datetime] = None,
+                  until: Optional[datetime] = None, sku: Optional[str] = None,
+                  kinds: Optional[List[str]] = None, newest_first: bool = True,
+                  limit: Optional[int] = 1000) -> pd.DataFrame:
+        """
+        Consultar movimientos
+
+        Args:
+            source_name: Nombre de la tienda (None = todas)
+            since: Desde (UTC, incluido)
+            until: Hasta (UTC, incluido)
+            sku: Solo este SKU
+            kinds: Solo estos tipos de movimiento (ADDED, CHANGED, REMOVED)
+            newest_first: Orden de los resultados
+            limit: Máximo de movimientos (None = sin límite)
+
+        Returns:
+            DataFrame con MOVEMENT_COLUMNS (recorded_at como datetime UTC)
+        """
+        if not os.path.exists(self.path):
+            return pd.DataFrame(columns=MOVEMENT_COLUMNS)
+
+        conditions, params = [], []
+        for column, operator, value in (
+            ('source', '=', source_name),
+            ('sku', '=', sku),
+            ('recorded_at', '>=', format_timestamp(since) if since else None),
+            ('recorded_at', '<=', format_timestamp(until) if until else None),
+        ):
+            if value is not None:
+                conditions.append(f"{column} {operator} ?")
+                params.append(value)
+        if kinds:
+            conditions.append(f"kind IN ({', '.join('?' * len(kinds))})")
+            params.extend(kinds)
+
+        query = f"SELECT {', '.join(MOVEMENT_COLUMNS)} FROM movements"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += f" ORDER BY recorded_at {'DESC' if newest_first else 'ASC'}, rowid"
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+
+        with closing(self._connect()) as conn:
+            df = pd.read_sql_query(query, conn, params=params)
+        df['recorded_at'] = pd.to_datetime(df['recorded_at'], format=TIMESTAMP_FORMAT)
+        return df
+
+    def inventory_at(self, source_name: str, moment: datetime) -> pd.DataFrame:
+        """
+        Reconstruir el inventario de una tienda en un momento pasado
+
+        Para cada SKU conocido se busca en el índice (source, sku, recorded_at) su
+        último movimiento hasta moment; los SKUs dados de baja en ese momento se
+        omiten.
+
+        Args:
+            source_name: Nombre de la tienda
+            moment: Momento (UTC)
+
+        Returns:
+            DataFrame con columnas sku, price, stock y recorded_at (último movimiento)
+        """
+        columns = ['sku', 'price', 'stock', 'recorded_at']
+        if not os.path.exists(self.path):
+            return pd.DataFrame(columns=columns)
+
+        with closing(self._connect()) as conn:
+            df = pd.read_sql_query(
+                """
+                SELECT m.sku, m.price, m.stock, m.recorded_at
+                FROM sku_state s
+                JOIN movements m ON m.rowid = (
+                    SELECT rowid FROM movements
+                    WHERE source = s.source AND sku = s.sku AND recorded_at <= ?
+                    ORDER BY recorded_at DESC, rowid DESC LIMIT 1
+                )
+                WHERE s.source = ? AND m.kind != ?
+                ORDER BY m.sku
+                """,
+                conn, params=[format_timestamp(moment), source_name, REMOVED]
+            )
+        df['recorded_at'] = pd.to_datetime(df['recorded_at'], format=TIMESTAMP_FORMAT)
+        return df
+
+    def sources(self) -> List[str]:
+        """Tiendas con movimientos registrados"""
+        if not os.path.exists(self.path):
+            return []
+        with closing(self._connect()) as conn:
+            return [row[0] for row in conn.execute("SELECT DISTINCT source FROM sku_state ORDER BY source")]
+
+    def compact(self, retention_days: float, now: datetime) -> int:
+        """
+        Reducir los movimientos anteriores a la retención al último estado de cada SKU
+
+        El inventario sigue siendo exacto desde el inicio de la retención; antes de
+        esa fecha solo queda el último estado de cada SKU. Los SKUs dados de baja
+        antes de la retención se olvidan.
+
+        Args:
+            retention_days: Días de historial completo
+            now: Momento actual (UTC)
+
+        Returns:
+            Número de movimientos borrados
+        """
+        if not os.path.exists(self.path):
+            return 0
+        cutoff = format_timestamp(now - timedelta(days=retention_days))
+
+        with closing(self._connect()) as conn:
+            with conn:
+                deleted = conn.execute(
+                    """
+                    DELETE FROM movements
+                    WHERE recorded_at < ? AND EXISTS (
+                        SELECT 1 FROM movements AS later
+                        WHERE later.source = movements.source AND later.sku = movements.sku
+                          AND later.recorded_at < ?
+                          AND (later.recorded_at > movements.recorded_at
+                               OR (later.recorded_at = movements.recorded_at AND later.rowid > movements.rowid))
+                    )
+                    """,
+                    (cutoff, cutoff)
+                ).rowcount
+                forgotten = conn.execute(
+                    "DELETE FROM sku_state WHERE listed = 0 AND recorded_at < ?", (cutoff,)
+                ).rowcount
+                conn.execute(
+                    "DELETE FROM movements WHERE recorded_at < ? AND NOT EXISTS ("
+                    "SELECT 1 FROM sku_state s WHERE s.source = movements.source AND s.sku = movements.sku)",
+                    (cutoff,)
+                )
+                conn.execute("INSERT OR REPLACE INTO kardex_meta (key, value) VALUES ('last_compaction', ?)",
+                             (format_timestamp(now),))
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+        logger.info(f"Kardex compactado: {deleted} movimientos anteriores a {cutoff} UTC, "
+                    f"{forgotten} SKUs dados de baja olvidados")
+        return deleted
+
+    def compact_if_due(self, retention_days: float, interval_hours: float, now: datetime) -> Optional[int]:
+        """
+        Compactar si pasaron interval_hours desde la última compactación
+
+        Returns:
+            Movimientos borrados, o None si aún no tocaba
+        """
+        if not os.path.exists(self.path):
+            return None
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT value FROM kardex_meta WHERE key = 'last_compaction'").fetchone()
+        if row is not None:
+            last = datetime.strptime(row[0], TIMESTAMP_FORMAT)
+            if now - last < timedelta(hours=interval_hours):
+                return None
+        return self.compact(retention_days, now)
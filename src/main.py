@@ -3,11 +3,11 @@ Dashboard principal de Grupo Felmel
 """
 import streamlit as st
 import pandas as pd
-import time
 from datetime import datetime
 import os
 import sys
 import base64
+import logging
 from PIL import Image, ImageDraw
 import io
 
@@ -16,7 +16,18 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from api_connector import ProductManager
 from config import Config
-from export_utils import create_download_button, show_export_summary
+from streamlit_config import get_config, reload_config
+from snapshot_store import SnapshotStore, CATALOG_FRAMES, save_catalog_snapshot, load_catalog_snapshot
+from catalog_history import get_catalog_history
+from catalog_cache import CatalogCache, CatalogRefresher
+from catalog_diff import NEW
+from sync_state import utc_now
+from kardex_store import KardexStore, KARDEX_FILE, ADDED, CHANGED, REMOVED
+from filter_engine import get_filter_engine, FilterParams
+from category_facets import CategoryFacets
+from export_utils import create_download_button, show_export_summary, export_products_to_csv, get_export_filename
+
+logger = logging.getLogger(__name__)
 
 # Rutas de logos
 logo_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "Logo_circulo_512.webp")
@@ -42,6 +53,9 @@ COLORS = {
     'border': '#7B9E7E'
 }
 
+# Columnas de la vista previa mientras se descarga el catálogo
+PREVIEW_COLUMNS = ['sku', 'name', 'price', 'stock', 'categories', 'material']
+
 @st.cache_data
 def get_logo_base64(logo_path):
     """Convertir logo a base64 para uso en CSS"""
@@ -498,100 +512,398 @@ def show_metrics():
             f"{stock_value:,}"
         )
 
-@st.cache_data(ttl=1800)  # Cache por 30 minutos
-def fetch_products_cached():
-    """Función cacheada para obtener productos"""
+@st.cache_resource
+def get_snapshot_store():
+    """Almacén de snapshots en disco compartido por todas las sesiones"""
+    config = get_config()
+    os.makedirs(config.CACHE_DIR, exist_ok=True)
+    return SnapshotStore(config.CACHE_DIR)
+
+@st.cache_resource
+def get_kardex_store():
+    """Kardex en disco compartido por todas las sesiones (solo lectura desde la interfaz)"""
+    config = get_config()
+    return KardexStore(os.path.join(config.DATA_DIR, KARDEX_FILE))
+
+@st.cache_resource
+def get_history_store():
+    """Historial versionado del catálogo compartido por todas las sesiones (con su cache de resultados)"""
+    config = get_config()
+    return get_catalog_history(config.DATA_DIR)
+
+@st.cache_resource
+def get_catalog_cache():
+    """
+    Catálogo compartido por todas las sesiones del proceso
+    
+    Al crearse intenta publicar el último snapshot de disco si no supera
+    CACHE_DURATION_MINUTES.
+    """
+    cache = CatalogCache()
+    
+    try:
+        config = get_config()
+        snapshot = load_catalog_snapshot(get_snapshot_store(), config.CACHE_DURATION_MINUTES)
+        if snapshot is not None:
+            manifest = get_snapshot_store().read_manifest() or {}
+            loaded_at = datetime.fromisoformat(manifest['created_at']) if manifest.get('created_at') else None
+            cache.publish(*snapshot, loaded_at=loaded_at)
+    except Exception as e:
+        logger.warning(f"No se pudo leer el snapshot guardado: {str(e)}")
+    
+    return cache
+
+@st.cache_resource
+def get_catalog_refresher():
+    """Hilo único por proceso que mantiene el catálogo al día en segundo plano"""
+    config = get_config()
+    return CatalogRefresher(
+        get_catalog_cache(),
+        crawl_catalog,
+        config.REFRESH_INTERVAL_MINUTES
+    ).start()
+
+def format_age(moment):
+    """Antigüedad legible de un momento pasado"""
+    minutes = int((datetime.now() - moment).total_seconds() // 60)
+    if minutes < 1:
+        return "hace menos de 1 min"
+    if minutes < 60:
+        return f"hace {minutes} min"
+    return f"hace {minutes // 60} h {minutes % 60} min"
+
+@st.fragment(run_every=3)
+def show_catalog_status():
+    """Antigüedad del catálogo y estado de la recarga en segundo plano"""
+    cache = get_catalog_cache()
+    refresher = get_catalog_refresher()
+    catalog = cache.current
+    
+    if catalog is not None:
+        st.caption(f"🕒 Datos {format_age(catalog.loaded_at)} (v{catalog.version})")
+    if cache.is_loading:
+        st.caption("🔄 Actualizando en segundo plano...")
+    elif refresher.last_error:
+        st.caption(f"⚠️ Última actualización fallida: {refresher.last_error}")
+    
+    # La primera carga llegó desde otro hilo: mostrarla sin esperar interacción
+    if catalog is not None and not st.session_state.products_loaded:
+        st.rerun(scope="app")
+
+def crawl_catalog(progress=None):
+    """
+    Consultar ambas APIs, detectar productos nuevos y guardar el snapshot en disco
+    
+    Args:
+        progress: LoadProgress que recibe el avance real (páginas y etapas)
+    
+    Returns:
+        Tuple (OroColmbia, GrupoFelmel, productos nuevos)
+    """
     product_manager = ProductManager()
-    df_orocolombia, df_grupofelmel = product_manager.fetch_all_products()
-    df_new_products = product_manager.find_new_products(df_orocolombia, df_grupofelmel)
+    df_orocolombia, df_grupofelmel = product_manager.fetch_all_products(
+        progress_callback=progress.on_page if progress else None,
+        stage_callback=progress.set_stage if progress else None,
+        chunk_callback=progress.on_chunk if progress else None
+    )
+    
+    if progress:
+        progress.set_stage('diff')
+    diff = product_manager.update_catalog_diff(df_orocolombia, df_grupofelmel)
+    if diff is not None:
+        df_new_products = diff.frame(NEW)
+    else:
+        df_new_products = product_manager.find_new_products(df_orocolombia, df_grupofelmel)
+    
+    # Persistir en disco para próximos arranques
+    if progress:
+        progress.set_stage('saving')
+    save_catalog_snapshot(get_snapshot_store(), df_orocolombia, df_grupofelmel, df_new_products)
+    
     return df_orocolombia, df_grupofelmel, df_new_products
 
+def bind_catalog(snapshot):
+    """Apuntar la sesión al snapshot compartido (referencias, sin copiar los DataFrames)"""
+    st.session_state.df_orocolombia = snapshot.df_orocolombia
+    st.session_state.df_grupofelmel = snapshot.df_grupofelmel
+    st.session_state.df_new_products = snapshot.df_new_products
+    st.session_state.catalog_version = snapshot.version
+    st.session_state.products_loaded = True
+
 def load_products():
-    """Cargar productos de ambas APIs con barra de progreso simplificada"""
-    try:
-        # Crear barra de progreso elegante
-        progress_container = st.container()
-        with progress_container:
-            st.markdown("### 🚀 Cargando Productos")
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-        
-        def update_progress(percentage):
-            """Actualizar progreso con porcentaje"""
-            progress_bar.progress(percentage / 100)
-            status_text.markdown(f"**Running... {percentage:.0f}%**")
-        
-        # Progreso inicial
-        update_progress(5)
-        time.sleep(0.1)
-        
-        # Intentar cargar desde cache primero
-        try:
-            # Cargar directamente sin mostrar el nombre de la función
-            product_manager = ProductManager()
-            df_orocolombia, df_grupofelmel = product_manager.fetch_all_products()
-            df_new_products = product_manager.find_new_products(df_orocolombia, df_grupofelmel)
-            
-            # Simular progreso suave desde cache
-            for i in range(10, 100, 3):
-                update_progress(i)
-                time.sleep(0.08)
-            
-        except Exception:
-            # Si falla el cache, cargar desde APIs
-            product_manager = ProductManager()
-            
-            # Progreso para OroColmbia
-            update_progress(20)
-            time.sleep(0.2)
-            
-            # Obtener productos
-            df_orocolombia, df_grupofelmel = product_manager.fetch_all_products()
-            
-            # Progreso para GrupoFelmel
-            update_progress(60)
-            time.sleep(0.2)
-            
-            # Progreso para detección de productos nuevos
-            update_progress(80)
-            time.sleep(0.1)
-            
-            df_new_products = product_manager.find_new_products(df_orocolombia, df_grupofelmel)
-        
-        # Progreso final
-        for i in range(90, 101, 2):
-            update_progress(i)
-            time.sleep(0.05)
-        
-        # Guardar en session state
-        st.session_state.df_orocolombia = df_orocolombia
-        st.session_state.df_grupofelmel = df_grupofelmel
-        st.session_state.df_new_products = df_new_products
-        st.session_state.products_loaded = True
-        
-        time.sleep(0.3)
-        
-        # Mostrar mensaje de éxito elegante
-        st.markdown(f"""
-        <div class="success-message">
-            <strong>🎉 Consulta completada exitosamente</strong><br>
-            🏪 <strong>OroColmbia:</strong> {len(df_orocolombia):,} productos<br>
-            🏬 <strong>GrupoFelmel:</strong> {len(df_grupofelmel):,} productos<br>
-            🆕 <strong>Productos nuevos:</strong> {len(df_new_products):,} productos
-        </div>
-        """, unsafe_allow_html=True)
-        
-        # Limpiar progreso después de 2 segundos
-        time.sleep(2)
-        progress_container.empty()
-        
-    except Exception as e:
+    """
+    Pedir la carga de productos de ambas APIs sin esperarla
+
+    La carga corre en el hilo de recarga (una sola por proceso); show_load_progress
+    sigue su avance mientras la página se sigue dibujando.
+    """
+    cache = get_catalog_cache()
+    joined_load = cache.is_loading
+    st.session_state.load_request = {
+        'started_at': datetime.now(),
+        'previous_version': cache.current.version if cache.current else 0,
+        # Si ya había una carga en curso se sigue esa en lugar de lanzar otra
+        'joined': joined_load,
+    }
+    if not joined_load:
+        get_catalog_refresher().trigger()
+
+@st.fragment(run_every=1)
+def show_load_progress():
+    """Progreso real de la carga pedida con load_products (se actualiza cada segundo)"""
+    request = st.session_state.get('load_request')
+    if request is None:
+        return
+    cache = get_catalog_cache()
+    refresher = get_catalog_refresher()
+    
+    snapshot = cache.current
+    if snapshot is not None and snapshot.version > request['previous_version']:
+        # Guardar en session state (solo referencias al catálogo compartido)
+        bind_catalog(snapshot)
+        st.session_state.load_request = None
+        st.session_state.load_result = {'elapsed': (datetime.now() - request['started_at']).total_seconds()}
+        st.rerun(scope="app")
+    
+    failed = (
+        not cache.is_loading
+        and refresher.last_error
+        and refresher.last_attempt is not None
+        and refresher.last_attempt >= request['started_at']
+    )
+    if failed or not refresher.is_alive:
+        st.session_state.load_request = None
+        st.session_state.load_result = {'error': refresher.last_error or "El hilo de recarga no está activo"}
+        st.rerun(scope="app")
+    
+    st.markdown("### 🚀 Cargando Productos")
+    progress = cache.progress
+    # Ignorar el progreso de una carga anterior ya terminada
+    if progress is None or not (request['joined'] or progress.started_at >= request['started_at']):
+        st.progress(0)
+        st.markdown("**Conectando con las APIs...**")
+        return
+    
+    st.progress(progress.fraction)
+    st.markdown(f"**{progress.describe()}** — {progress.fraction * 100:.0f}%")
+    
+    # Primeras filas ya procesadas mientras sigue la descarga
+    preview = progress.preview
+    if preview is not None:
+        st.dataframe(
+            preview[[column for column in PREVIEW_COLUMNS if column in preview.columns]],
+            use_container_width=True, hide_index=True, height=250
+        )
+
+def show_load_result():
+    """Mensaje con el resultado de la última carga pedida (una sola vez)"""
+    result = st.session_state.pop('load_result', None)
+    if result is None:
+        return
+    
+    if 'error' in result:
         st.markdown(f"""
         <div class="error-message">
             <strong>❌ Error al cargar productos</strong><br>
-            {str(e)}
+            {result['error']}
         </div>
         """, unsafe_allow_html=True)
+        return
+    
+    # Mostrar mensaje de éxito elegante
+    st.markdown(f"""
+    <div class="success-message">
+        <strong>🎉 Consulta completada exitosamente en {result['elapsed']:.1f} s</strong><br>
+        🏪 <strong>OroColmbia:</strong> {len(st.session_state.df_orocolombia):,} productos<br>
+        🏬 <strong>GrupoFelmel:</strong> {len(st.session_state.df_grupofelmel):,} productos<br>
+        🆕 <strong>Productos nuevos:</strong> {len(st.session_state.df_new_products):,} productos
+    </div>
+    """, unsafe_allow_html=True)
+
+def filtered_positions(key, name, df, params):
+    """
+    Posiciones de las filas filtradas (motor de filtros compartido)
+    
+    Si cambian los filtros o la versión del catálogo la paginación vuelve a la
+    primera página; un cambio de selección no vuelve a filtrar.
+    """
+    version = st.session_state.get('catalog_version')
+    signature = (version, params)
+    if st.session_state.get(f"{key}_filters") != signature:
+        st.session_state[f"{key}_filters"] = signature
+        st.session_state[f"{key}_page"] = 1
+    return get_filter_engine().positions(name, version, df, params)
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def filtered_export_csv(name, version, params, export_type, _df, _positions):
+    """
+    CSV de todas las filas filtradas (no solo la página actual)
+    
+    Se genera una vez por versión del catálogo, filtros y tipo de exportación;
+    los reruns de la página reutilizan el archivo.
+    """
+    return export_products_to_csv(_df.iloc[_positions], None, export_type)
+
+def show_filtered_export(name, df, positions, df_page, params, key):
+    """
+    Botones para exportar todas las filas filtradas y, aparte, solo la página actual
+    
+    Args:
+        name: Catálogo en el motor de filtros ('new_products' u 'orocolombia')
+        df: Catálogo completo
+        positions: Posiciones de las filas filtradas
+        df_page: Filas de la página actual
+        params: Filtros aplicados
+        key: Prefijo de las keys de los botones
+    """
+    version = st.session_state.get('catalog_version')
+    total = len(positions)
+    st.markdown(f"**Exportar los {total:,} productos filtrados:**")
+    col_a, col_b = st.columns(2)
+    for column, export_type, label in ((col_a, "productos", f"📋 Todos los Productos ({total:,})"),
+                                       (col_b, "urls", "🖼️ Todas las URLs")):
+        csv_data = filtered_export_csv(name, version, params, export_type, df, positions)
+        with column:
+            if csv_data is None:
+                st.caption("Sin datos para exportar")
+                continue
+            st.download_button(label=label, data=csv_data, file_name=get_export_filename(export_type),
+                               mime='text/csv', key=f"{key}_{export_type}", use_container_width=True)
+    show_export_summary(df.iloc[positions], None)
+    
+    if len(df_page) < total:
+        st.markdown(f"**Exportar solo la página actual ({len(df_page):,} productos):**")
+        col_a, col_b = st.columns(2)
+        with col_a:
+            create_download_button(df_page, None, "productos", f"📋 Productos de la página ({len(df_page):,})",
+                                   f"{key}_page_productos")
+        with col_b:
+            create_download_button(df_page, None, "urls", "🖼️ URLs de la página", f"{key}_page_urls")
+
+def selected_categories(key, categories):
+    """
+    Categorías elegidas en el multiselect key, leídas antes de dibujarlo
+    
+    El multiselect se dibuja después de filtrar para mostrar los conteos. Las
+    categorías que no existen en la versión actual se descartan.
+    """
+    available = set(categories)
+    selected = [category for category in st.session_state.get(key, []) if category in available]
+    # Reasignar siempre: los conteos cambian las etiquetas y con ellas el id del widget
+    st.session_state[key] = selected
+    return tuple(sorted(selected))
+
+def show_category_filter(container, key, categories, counts):
+    """Multiselect de categorías con el número de filas de cada una"""
+    container.multiselect(
+        "📂 Categorías", categories, key=key, placeholder="Todas",
+        format_func=lambda category: f"{category} ({counts.get(category, 0):,})"
+    )
+
+def page_bounds(key, total_rows, page_size):
+    """Primera y última posición (exclusiva) de la página actual, acotando la página guardada"""
+    pages = max(1, -(-total_rows // page_size))
+    page = min(max(1, st.session_state.get(f"{key}_page", 1)), pages)
+    st.session_state[f"{key}_page"] = page
+    start = (page - 1) * page_size
+    return start, min(start + page_size, total_rows)
+
+def show_pagination(key, total_rows, page_size):
+    """Controles de navegación: primera, anterior, ir a página, siguiente y última"""
+    pages = max(1, -(-total_rows // page_size))
+    page_key = f"{key}_page"
+    input_key = f"{key}_page_input"
+    
+    def go_to(page):
+        st.session_state[page_key] = page
+    
+    def go_to_input():
+        st.session_state[page_key] = st.session_state[input_key]
+    
+    start, end = page_bounds(key, total_rows, page_size)
+    page = st.session_state[page_key]
+    # La página vive fuera del widget para conservarse al cambiar de sección
+    st.session_state[input_key] = page
+    col1, col2, col3, col4, col5, col6 = st.columns([0.6, 0.6, 1.2, 0.6, 0.6, 2.4])
+    with col1:
+        st.button("⏮️", key=f"{key}_first", on_click=go_to, args=(1,), disabled=page <= 1, use_container_width=True)
+    with col2:
+        st.button("◀️", key=f"{key}_previous", on_click=go_to, args=(page - 1,), disabled=page <= 1,
+                  use_container_width=True)
+    with col3:
+        st.number_input("Página", min_value=1, max_value=pages, step=1, key=input_key,
+                        on_change=go_to_input, label_visibility="collapsed")
+    with col4:
+        st.button("▶️", key=f"{key}_next", on_click=go_to, args=(page + 1,), disabled=page >= pages,
+                  use_container_width=True)
+    with col5:
+        st.button("⏭️", key=f"{key}_last", on_click=go_to, args=(pages,), disabled=page >= pages,
+                  use_container_width=True)
+    with col6:
+        st.markdown(f"Página **{page:,}** de **{pages:,}** · filas {start + 1:,}–{end:,} de {total_rows:,}")
+
+GRID_HEIGHT = 600
+GRID_ROW_HEIGHT = 60
+
+def reset_product_grid(key):
+    """Volver a crear la grilla tras cambiar la selección fuera de ella (Seleccionar/Deseleccionar Todos)"""
+    st.session_state[f"{key}_version"] = st.session_state.get(f"{key}_version", 0) + 1
+
+def apply_grid_selection(grid_key, skus, selected):
+    """Aplicar a la selección de la sesión las casillas editadas en la grilla (en un solo lote)"""
+    for position, changes in st.session_state[grid_key]['edited_rows'].items():
+        if 'selected' in changes:
+            if changes['selected']:
+                selected.add(skus[position])
+            else:
+                selected.discard(skus[position])
+
+def show_product_grid(df_view, selected, key, show_stock=True):
+    """
+    Grilla de productos con miniaturas y columna de selección (st.data_editor)
+    
+    El navegador solo dibuja las filas visibles y los cambios de selección
+    llegan juntos en un único rerun, en lugar de un checkbox por fila.
+    
+    Args:
+        df_view: Productos a mostrar
+        selected: Conjunto de SKUs seleccionados de la sesión (se modifica)
+        key: Clave base de la grilla
+        show_stock: Mostrar la columna de stock
+    """
+    columns = ['image_url', 'sku', 'name', 'categories', 'material', 'price', 'discount_price']
+    if show_stock:
+        columns.append('stock')
+    
+    skus = df_view['sku'].tolist()
+    grid = df_view[columns].reset_index(drop=True)
+    grid.insert(0, 'selected', df_view['sku'].isin(selected).to_numpy())
+    
+    # La clave cambia con las filas mostradas: las ediciones guardadas por
+    # posición no deben aplicarse a otra vista
+    grid_key = f"{key}_{st.session_state.get(f'{key}_version', 0)}_{hash(tuple(skus))}"
+    st.data_editor(
+        grid,
+        key=grid_key,
+        on_change=apply_grid_selection,
+        args=(grid_key, skus, selected),
+        disabled=columns,
+        hide_index=True,
+        use_container_width=True,
+        height=min(GRID_HEIGHT, (len(grid) + 1) * GRID_ROW_HEIGHT + 3),
+        row_height=GRID_ROW_HEIGHT,
+        column_config={
+            'selected': st.column_config.CheckboxColumn("☑️", width="small"),
+            'image_url': st.column_config.ImageColumn("🖼️ Imagen", width="small"),
+            'sku': "SKU",
+            'name': st.column_config.TextColumn("Nombre", width="large"),
+            'categories': "Categoría",
+            'material': "Material",
+            'price': st.column_config.NumberColumn("Precio", format="$%.0f"),
+            'discount_price': st.column_config.NumberColumn("35% Desc.", format="$%.0f"),
+            'stock': "Stock",
+        },
+    )
 
 @st.fragment
 def show_new_products():
@@ -607,17 +919,20 @@ def show_new_products():
     
     st.markdown("### 🆕 Productos Nuevos Detectados")
     
+    # Opciones de los filtros calculadas una vez por versión del catálogo
+    df_base = st.session_state.df_new_products
+    options = get_filter_engine().options("new_products", st.session_state.get('catalog_version'), df_base)
+    
     # Filtros en una sola fila para mejor UX
     with st.container():
         col1, col2, col3, col4, col5 = st.columns(5)
         
         with col1:
-            categories = ['Todas'] + sorted(st.session_state.df_new_products['categories'].unique().tolist())
-            selected_category = st.selectbox("📂 Categoría", categories)
+            # Se llena después de filtrar, con los conteos de cada categoría
+            category_filter = st.empty()
         
         with col2:
-            # Obtener precio máximo real de los productos
-            max_price_default = st.session_state.df_new_products['price'].max() if not st.session_state.df_new_products.empty else 1000000.0
+            max_price_default = options.max_price
             max_price = st.number_input("💰 Precio máximo", min_value=0.0, value=float(max_price_default), step=100.0)
         
         with col3:
@@ -630,28 +945,19 @@ def show_new_products():
             # Paginación
             page_size_new = st.selectbox("📄 Mostrar", [50, 100, 200, 500, 1000, 2000], index=1, key="page_size_new")
     
-    # Aplicar filtros optimizados
-    df_filtered = st.session_state.df_new_products.copy()
-    
-    # Filtros de rendimiento
-    if selected_category != 'Todas':
-        df_filtered = df_filtered[df_filtered['categories'].str.contains(selected_category, na=False)]
-    
-    if search_term:
-        df_filtered = df_filtered[
-            df_filtered['name'].str.contains(search_term, case=False, na=False) |
-            df_filtered['sku'].str.contains(search_term, case=False, na=False)
-        ]
-    
-    # Aplicar filtros de precio y stock
-    if max_price < max_price_default:  # Solo filtrar si el usuario cambió el precio
-        df_filtered = df_filtered[df_filtered['price'] <= max_price]
-    
-    df_filtered = df_filtered[df_filtered['stock'] >= min_stock]
-    
-    # Paginación para rendimiento
-    total_results_new = len(df_filtered)
-    df_filtered = df_filtered.head(page_size_new)
+    # Filtrar una vez por combinación de filtros y mostrar solo la página actual
+    params = FilterParams(
+        selected_categories("new_products_categories", options.categories),
+        max_price if max_price < max_price_default else None,  # Solo filtrar si el usuario cambió el precio
+        min_stock,
+        search_term
+    )
+    positions = filtered_positions("new_products", "new_products", df_base, params)
+    counts = get_filter_engine().category_counts("new_products", st.session_state.get('catalog_version'), df_base, params)
+    show_category_filter(category_filter, "new_products_categories", options.categories, counts)
+    total_results_new = len(positions)
+    page_start, page_end = page_bounds("new_products", total_results_new, page_size_new)
+    df_filtered = df_base.iloc[positions[page_start:page_end]]
     
     # Controles de selección
     if not df_filtered.empty:
@@ -663,6 +969,7 @@ def show_new_products():
         with col1:
             if st.button("✅ Seleccionar Todos", key="select_all_new"):
                 st.session_state.selected_new_products.update(df_filtered['sku'].tolist())
+                reset_product_grid("new_products_grid")
                 st.rerun()
         
         with col2:
@@ -670,6 +977,7 @@ def show_new_products():
                 # Deseleccionar todos los productos de la vista actual
                 for sku in df_filtered['sku'].tolist():
                     st.session_state.selected_new_products.discard(sku)
+                reset_product_grid("new_products_grid")
                 st.rerun()
         
         with col3:
@@ -700,123 +1008,18 @@ def show_new_products():
                     
                     show_export_summary(df_filtered, list(st.session_state.selected_new_products))
             else:
-                # Botón para exportar todos los productos nuevos
+                # Botón para exportar todos los productos nuevos filtrados
                 with st.expander("📥 Exportar Todos los Productos Nuevos", expanded=False):
-                    st.markdown("**Exportar todos los productos mostrados:**")
-                    
-                    col_a, col_b = st.columns(2)
-                    
-                    with col_a:
-                        create_download_button(
-                            df_filtered,
-                            None,  # Todos los productos
-                            "productos",
-                            f"📋 Todos los Productos ({len(df_filtered)})",
-                            "export_all_products_new"
-                        )
-                    
-                    with col_b:
-                        create_download_button(
-                            df_filtered,
-                            None,
-                            "urls",
-                            f"🖼️ Todas las URLs",
-                            "export_all_urls_new"
-                        )
-                    
-                    show_export_summary(df_filtered, None)
+                    show_filtered_export("new_products", df_base, positions, df_filtered, params,
+                                         "export_all_new")
 
     # Mostrar tabla con checkboxes
     if not df_filtered.empty:
-        # Crear tabla personalizada con checkboxes
         st.markdown("### 📋 Selecciona los productos a exportar:")
+        show_product_grid(df_filtered, st.session_state.selected_new_products, "new_products_grid")
+        show_pagination("new_products", total_results_new, page_size_new)
         
-        # Headers de la tabla
-        col1, col2, col3, col4, col5, col6, col7, col8, col9 = st.columns([0.5, 0.8, 1, 2, 1.2, 1, 1, 0.8, 0.8])
-        
-        with col1:
-            st.markdown("**☑️**")
-        with col2:
-            st.markdown("**🖼️ Imagen**")
-        with col3:
-            st.markdown("**SKU**")
-        with col4:
-            st.markdown("**Nombre**")
-        with col5:
-            st.markdown("**Categoría**")
-        with col6:
-            st.markdown("**Material**")
-        with col7:
-            st.markdown("**Precio**")
-        with col8:
-            st.markdown("**35% Desc.**")
-        with col9:
-            st.markdown("**Stock**")
-        
-        st.markdown("<hr style='margin: 0.5rem 0; border: 1px solid #30363d;'>", unsafe_allow_html=True)
-        
-        # Contenedor para la tabla con scroll
-        with st.container():
-            for idx, row in df_filtered.iterrows():
-                col1, col2, col3, col4, col5, col6, col7, col8, col9 = st.columns([0.5, 0.8, 1, 2, 1.2, 1, 1, 0.8, 0.8])
-                
-                with col1:
-                    # Checkbox para selección
-                    def toggle_selection(sku):
-                        if sku in st.session_state.selected_new_products:
-                            st.session_state.selected_new_products.discard(sku)
-                        else:
-                            st.session_state.selected_new_products.add(sku)
-                    
-                    is_selected = row['sku'] in st.session_state.selected_new_products
-                    checkbox_value = st.checkbox("Seleccionar", value=is_selected, key=f"new_{row['sku']}_{idx}", label_visibility="collapsed", on_change=toggle_selection, args=(row['sku'],))
-                
-                with col2:
-                    # Mostrar imagen del producto clickeable
-                    if row['image_url'] and row['image_url'] != '':
-                        try:
-                            # Mostrar imagen
-                            st.image(
-                                row['image_url'], 
-                                width=50,
-                                caption=None,
-                                use_container_width=False
-                            )
-                        except:
-                            st.text("❌")
-                    else:
-                        st.text("📷❌")
-                
-                with col3:
-                    st.text(row['sku'])
-                
-                with col4:
-                    # Truncar nombre
-                    name = row['name'][:40] + '...' if len(row['name']) > 40 else row['name']
-                    st.text(name)
-                
-                with col5:
-                    category = row['categories'][:20] + '...' if len(row['categories']) > 20 else row['categories']
-                    st.text(category)
-                
-                with col6:
-                    material = row['material'][:15] + '...' if len(row['material']) > 15 else row['material']
-                    st.text(material)
-                
-                with col7:
-                    st.text(f"${row['price']:,.0f}")
-                
-                with col8:
-                    st.text(f"${row['discount_price']:,.0f}")
-                
-                with col9:
-                    st.text(str(row['stock']))
-                
-                # Separador sutil
-                if idx < len(df_filtered) - 1:
-                    st.markdown("<hr style='margin: 0.5rem 0; border: 0.5px solid #30363d;'>", unsafe_allow_html=True)
-        
-        # RECALCULAR después de los checkboxes
+        # Selección actualizada por la grilla
         total_selected = len(st.session_state.selected_new_products)
         
         # Mostrar controles de exportación
@@ -848,29 +1051,8 @@ def show_new_products():
             
             show_export_summary(st.session_state.df_new_products, list(st.session_state.selected_new_products))
         else:
-            st.markdown("**Exportar todos los productos mostrados:**")
-            
-            col_a, col_b = st.columns(2)
-            
-            with col_a:
-                create_download_button(
-                    df_filtered,
-                    None,
-                    "productos",
-                    f"📋 Todos los Productos ({len(df_filtered)})",
-                    "export_all_products_new"
-                )
-            
-            with col_b:
-                create_download_button(
-                    df_filtered,
-                    None,
-                    "urls",
-                    f"🖼️ Todas las URLs ({len(df_filtered)})",
-                    "export_all_urls_new"
-                )
-            
-            show_export_summary(df_filtered, None)
+            show_filtered_export("new_products", df_base, positions, df_filtered, params,
+                                 "export_all_new_updated")
         
         # Estadísticas mejoradas
         total_value = df_filtered['price'].sum()
@@ -882,18 +1064,7 @@ def show_new_products():
         with col2:
             st.metric("📈 Total disponible", f"{total_results_new:,}")
         with col3:
-            if total_results_new > page_size_new:
-                st.markdown(f"""
-                <div style="background: #E7F1F2; padding: 1rem; border-radius: 8px; border: 1px solid #7B9E7E; margin: 0.5rem 0; color: #021A23;">
-                    <strong>⚠️ Solo mostrando primeros {page_size_new} resultados</strong>
-                </div>
-                """, unsafe_allow_html=True)
-            else:
-                st.markdown("""
-                <div style="background: #E7F1F2; padding: 1rem; border-radius: 8px; border: 1px solid #7B9E7E; margin: 0.5rem 0; color: #021A23;">
-                    <strong>✅ Todos los resultados mostrados</strong>
-                </div>
-                """, unsafe_allow_html=True)
+            st.metric("📄 Páginas", f"{max(1, -(-total_results_new // page_size_new)):,}")
             
     else:
         st.warning("⚠️ No hay productos que coincidan con los filtros seleccionados.")
@@ -907,17 +1078,20 @@ def show_all_products():
     
     st.markdown("### 📋 Catálogo Completo - OroColmbia")
     
+    # Opciones de los filtros calculadas una vez por versión del catálogo
+    df_base = st.session_state.df_orocolombia
+    options = get_filter_engine().options("orocolombia", st.session_state.get('catalog_version'), df_base)
+    
     # Filtros optimizados en una fila
     with st.container():
         col1, col2, col3, col4, col5 = st.columns(5)
         
         with col1:
-            categories = ['Todas'] + sorted(st.session_state.df_orocolombia['categories'].unique().tolist())
-            selected_category = st.selectbox("📂 Categoría", categories, key="all_products_category")
+            # Se llena después de filtrar, con los conteos de cada categoría
+            category_filter = st.empty()
         
         with col2:
-            # Obtener precio máximo real de todos los productos
-            max_price_default_all = st.session_state.df_orocolombia['price'].max() if not st.session_state.df_orocolombia.empty else 1000000.0
+            max_price_default_all = options.max_price
             max_price = st.number_input("💰 Precio máximo", min_value=0.0, value=float(max_price_default_all), step=100.0, key="all_products_price")
         
         with col3:
@@ -930,32 +1104,24 @@ def show_all_products():
             # Paginación
             page_size = st.selectbox("📄 Mostrar", [50, 100, 200, 500, 1000, 2000], index=1, key="page_size")
     
-    # Aplicar filtros con mejor rendimiento
-    df_filtered = st.session_state.df_orocolombia.copy()
-    
-    if search_term:
-        df_filtered = df_filtered[
-            df_filtered['name'].str.contains(search_term, case=False, na=False) |
-            df_filtered['sku'].str.contains(search_term, case=False, na=False)
-        ]
-    
-    if selected_category != 'Todas':
-        df_filtered = df_filtered[df_filtered['categories'].str.contains(selected_category, na=False)]
-    
-    if max_price < max_price_default_all:  # Solo filtrar si el usuario cambió el precio
-        df_filtered = df_filtered[df_filtered['price'] <= max_price]
-    
-    df_filtered = df_filtered[df_filtered['stock'] >= min_stock]
-    
-    # Paginación para rendimiento
-    total_results = len(df_filtered)
-    df_filtered = df_filtered.head(page_size)
+    # Filtrar una vez por combinación de filtros y mostrar solo la página actual
+    params = FilterParams(
+        selected_categories("all_products_categories", options.categories),
+        max_price if max_price < max_price_default_all else None,  # Solo filtrar si el usuario cambió el precio
+        min_stock,
+        search_term
+    )
+    positions = filtered_positions("all_products", "orocolombia", df_base, params)
+    counts = get_filter_engine().category_counts("orocolombia", st.session_state.get('catalog_version'), df_base, params)
+    show_category_filter(category_filter, "all_products_categories", options.categories, counts)
+    total_results = len(positions)
+    page_start, page_end = page_bounds("all_products", total_results, page_size)
+    df_filtered = df_base.iloc[positions[page_start:page_end]]
     
     # Controles de selección para todos los productos
     if not df_filtered.empty:
         # Calcular productos seleccionados que están en la vista actual
-        selected_in_view_all = [sku for sku in st.session_state.selected_all_products if sku in df_filtered['sku'].tolist()]
-        selected_count_all = len(selected_in_view_all)
+        selected_count_all = int(df_filtered['sku'].isin(st.session_state.selected_all_products).sum())
         total_selected_all = len(st.session_state.selected_all_products)
         
         col1, col2, col3 = st.columns(3)
@@ -963,6 +1129,7 @@ def show_all_products():
         with col1:
             if st.button("✅ Seleccionar Todos", key="select_all_products"):
                 st.session_state.selected_all_products.update(df_filtered['sku'].tolist())
+                reset_product_grid("all_products_grid")
                 st.rerun()
         
         with col2:
@@ -970,13 +1137,15 @@ def show_all_products():
                 # Deseleccionar todos los productos de la vista actual
                 for sku in df_filtered['sku'].tolist():
                     st.session_state.selected_all_products.discard(sku)
+                reset_product_grid("all_products_grid")
                 st.rerun()
         
         with col3:
             if total_selected_all > 0:
                 # Expandir opciones de exportación
                 with st.expander("📥 Opciones de Exportación", expanded=False):
-                    st.markdown("**Exportar productos seleccionados:**")
+                    st.markdown(f"**Exportar productos seleccionados** "
+                                f"({selected_count_all:,} de ellos en esta página):")
                     
                     col_a, col_b = st.columns(2)
                     
@@ -1000,114 +1169,16 @@ def show_all_products():
                     
                     show_export_summary(df_filtered, list(st.session_state.selected_all_products))
             else:
-                # Botón para exportar todos los productos
+                # Botón para exportar todos los productos filtrados
                 with st.expander("📥 Exportar Todos los Productos", expanded=False):
-                    st.markdown("**Exportar todos los productos mostrados:**")
-                    
-                    col_a, col_b = st.columns(2)
-                    
-                    with col_a:
-                        create_download_button(
-                            df_filtered,
-                            None,
-                            "productos",
-                            f"📋 Todos los Productos ({len(df_filtered)})",
-                            "export_all_products_catalog"
-                        )
-                    
-                    with col_b:
-                        create_download_button(
-                            df_filtered,
-                            None,
-                            "urls",
-                            f"🖼️ Todas las URLs",
-                            "export_all_urls_catalog"
-                        )
-                    
-                    show_export_summary(df_filtered, None)
+                    show_filtered_export("orocolombia", df_base, positions, df_filtered, params,
+                                         "export_all_catalog")
 
     # Mostrar tabla con checkboxes para todos los productos
     if not df_filtered.empty:
         st.markdown("### 📋 Selecciona los productos del catálogo:")
-        
-        # Headers de la tabla
-        col1, col2, col3, col4, col5, col6, col7, col8 = st.columns([0.5, 0.8, 1, 2, 1.2, 1, 1, 0.8])
-        
-        with col1:
-            st.markdown("**☑️**")
-        with col2:
-            st.markdown("**🖼️ Imagen**")
-        with col3:
-            st.markdown("**SKU**")
-        with col4:
-            st.markdown("**Nombre**")
-        with col5:
-            st.markdown("**Categoría**")
-        with col6:
-            st.markdown("**Material**")
-        with col7:
-            st.markdown("**Precio**")
-        with col8:
-            st.markdown("**35% Desc.**")
-        
-        st.markdown("<hr style='margin: 0.5rem 0; border: 1px solid #30363d;'>", unsafe_allow_html=True)
-        
-        # Contenedor para la tabla con scroll
-        with st.container():
-            for idx, row in df_filtered.iterrows():
-                col1, col2, col3, col4, col5, col6, col7, col8 = st.columns([0.5, 0.8, 1, 2, 1.2, 1, 1, 0.8])
-                
-                with col1:
-                    # Checkbox para selección
-                    def toggle_selection_all(sku):
-                        if sku in st.session_state.selected_all_products:
-                            st.session_state.selected_all_products.discard(sku)
-                        else:
-                            st.session_state.selected_all_products.add(sku)
-                    
-                    is_selected = row['sku'] in st.session_state.selected_all_products
-                    checkbox_value = st.checkbox("Seleccionar", value=is_selected, key=f"all_{row['sku']}_{idx}", label_visibility="collapsed", on_change=toggle_selection_all, args=(row['sku'],))
-                
-                with col2:
-                    # Mostrar imagen del producto clickeable
-                    if row['image_url'] and row['image_url'] != '':
-                        try:
-                            # Mostrar imagen
-                            st.image(
-                                row['image_url'], 
-                                width=50,
-                                caption=None,
-                                use_container_width=False
-                            )
-                        except:
-                            st.text("❌")
-                    else:
-                        st.text("📷❌")
-                
-                with col3:
-                    st.text(row['sku'])
-                
-                with col4:
-                    name = row['name'][:40] + '...' if len(row['name']) > 40 else row['name']
-                    st.text(name)
-                
-                with col5:
-                    category = row['categories'][:20] + '...' if len(row['categories']) > 20 else row['categories']
-                    st.text(category)
-                
-                with col6:
-                    material = row['material'][:15] + '...' if len(row['material']) > 15 else row['material']
-                    st.text(material)
-                
-                with col7:
-                    st.text(f"${row['price']:,.0f}")
-                
-                with col8:
-                    st.text(f"${row['discount_price']:,.0f}")
-                
-                # Separador sutil
-                if idx < len(df_filtered) - 1:
-                    st.markdown("<hr style='margin: 0.5rem 0; border: 0.5px solid #30363d;'>", unsafe_allow_html=True)
+        show_product_grid(df_filtered, st.session_state.selected_all_products, "all_products_grid", show_stock=False)
+        show_pagination("all_products", total_results, page_size)
         
         # Estadísticas
         col1, col2, col3 = st.columns(3)
@@ -1116,24 +1187,152 @@ def show_all_products():
         with col2:
             st.metric("📈 Total disponible", f"{total_results:,}")
         with col3:
-            if total_results > page_size:
-                st.markdown(f"""
-                <div style="background: #E7F1F2; padding: 1rem; border-radius: 8px; border: 1px solid #7B9E7E; margin: 0.5rem 0; color: #021A23;">
-                    <strong>⚠️ Solo mostrando primeros {page_size} resultados</strong>
-                </div>
-                """, unsafe_allow_html=True)
-            else:
-                st.markdown("""
-                <div style="background: #E7F1F2; padding: 1rem; border-radius: 8px; border: 1px solid #7B9E7E; margin: 0.5rem 0; color: #021A23;">
-                    <strong>✅ Todos los resultados mostrados</strong>
-                </div>
-                """, unsafe_allow_html=True)
+            st.metric("📄 Páginas", f"{max(1, -(-total_results // page_size)):,}")
             
     else:
         st.warning("⚠️ No hay productos que coincidan con los filtros seleccionados.")
 
+def show_kardex_history():
+    """Historial de movimientos de precio y stock por SKU (kardex)"""
+    kardex = get_kardex_store()
+    sources = kardex.sources()
+    if not sources:
+        st.info("📋 Aún no hay movimientos registrados. Se registran en cada carga del catálogo.")
+        return
+    
+    kind_labels = {ADDED: 'Alta', CHANGED: 'Cambio', REMOVED: 'Baja'}
+    column_config = {
+        'recorded_at': st.column_config.DatetimeColumn("Fecha (UTC)", format="YYYY-MM-DD HH:mm"),
+        'source': "Tienda",
+        'sku': "SKU",
+        'kind': "Movimiento",
+        'price': st.column_config.NumberColumn("Precio", format="$%.0f"),
+        'stock': "Stock",
+        'price_delta': st.column_config.NumberColumn("Δ Precio", format="$%.0f"),
+        'stock_delta': "Δ Stock",
+    }
+    
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        source = st.selectbox("🏪 Tienda", sources, key="kardex_source")
+    with col2:
+        sku = st.text_input("🔍 SKU", placeholder="SKU exacto para ver su kardex...", key="kardex_sku").strip()
+    
+    tab_movements, tab_inventory, tab_new = st.tabs(
+        ["📈 Movimientos", "📦 Inventario a una fecha", "🆕 Productos nuevos a una fecha"]
+    )
+    
+    with tab_movements:
+        if sku:
+            df_movements = kardex.history(source, sku)
+            if df_movements.empty:
+                st.info(f"No hay movimientos del SKU {sku} en {source}.")
+            else:
+                st.markdown(f"### Kardex de {sku}")
+                chart_data = df_movements.set_index('recorded_at')[['price', 'stock']]
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.line_chart(chart_data['price'], height=220)
+                with col2:
+                    st.line_chart(chart_data['stock'], height=220)
+        else:
+            col1, col2 = st.columns(2)
+            with col1:
+                selected_kinds = st.multiselect("Movimiento", list(kind_labels), default=list(kind_labels),
+                                                format_func=kind_labels.get, key="kardex_kinds")
+            with col2:
+                limit = st.selectbox("📄 Mostrar", [100, 500, 1000, 5000], index=1, key="kardex_limit")
+            df_movements = kardex.movements(source, kinds=selected_kinds or None, limit=limit)
+            st.markdown(f"### Últimos {len(df_movements):,} movimientos de {source}")
+        
+        if not df_movements.empty:
+            df_movements['kind'] = df_movements['kind'].map(kind_labels)
+            st.dataframe(df_movements, column_config=column_config, hide_index=True, use_container_width=True)
+    
+    with tab_inventory:
+        now = utc_now()
+        col1, col2 = st.columns(2)
+        with col1:
+            selected_date = st.date_input("📅 Fecha (UTC)", value=now.date(), max_value=now.date(), key="kardex_date")
+        with col2:
+            selected_time = st.time_input("🕒 Hora (UTC)", value=now.time().replace(second=0, microsecond=0),
+                                          key="kardex_time")
+        moment = datetime.combine(selected_date, selected_time).replace(second=59)
+        
+        df_inventory = kardex.inventory_at(source, moment)
+        if sku:
+            df_inventory = df_inventory[df_inventory['sku'] == sku]
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("🏷️ SKUs", f"{len(df_inventory):,}")
+        with col2:
+            st.metric("📦 Unidades", f"{int(df_inventory['stock'].sum()):,}")
+        with col3:
+            st.metric("💰 Valor del inventario", f"${(df_inventory['price'] * df_inventory['stock']).sum():,.0f}")
+        
+        st.dataframe(df_inventory, column_config={**column_config, 'recorded_at': st.column_config.DatetimeColumn(
+            "Último movimiento (UTC)", format="YYYY-MM-DD HH:mm")}, hide_index=True, use_container_width=True)
+    
+    with tab_new:
+        show_new_products_history()
+
+def show_new_products_history():
+    """Productos nuevos según las versiones guardadas del catálogo"""
+    now = utc_now()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        until_date = st.date_input("📅 Fecha (UTC)", value=now.date(), max_value=now.date(), key="history_until")
+    with col2:
+        compare_since = st.checkbox("Solo los aparecidos desde otra fecha", key="history_compare")
+    with col3:
+        since_date = st.date_input("📅 Desde (UTC)", value=now.date(), max_value=now.date(),
+                                   key="history_since", disabled=not compare_since)
+    
+    until = datetime.combine(until_date, datetime.max.time()).replace(microsecond=0)
+    since = datetime.combine(since_date, datetime.min.time()) if compare_since else None
+    history = get_history_store()
+    supplier, retailer = CATALOG_FRAMES['orocolombia'], CATALOG_FRAMES['grupofelmel']
+    version = history.version_at(supplier, until)
+    if version is None:
+        st.info("No hay versiones guardadas del catálogo hasta esa fecha.")
+        return
+    df_categories = history.read(version, [history.category_column(version)])
+    
+    # Filtros aplicados al leer la versión (solo llegan las filas y columnas a mostrar)
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        categories = CategoryFacets.from_frame(df_categories).categories
+        chosen_categories = st.multiselect("📂 Categorías", categories, key="history_categories", placeholder="Todas")
+    with col2:
+        max_price = st.number_input("💰 Precio máximo (0 = sin límite)", min_value=0.0, value=0.0,
+                                    step=100.0, key="history_price")
+    with col3:
+        min_stock = st.number_input("📦 Stock mínimo", min_value=0, value=0, step=1, key="history_stock")
+    with col4:
+        search_term = st.text_input("🔍 Buscar", placeholder="SKU o nombre...", key="history_search")
+    
+    columns = PREVIEW_COLUMNS + ['date_modified']
+    df_new = history.new_products_between(
+        supplier, retailer, until, since, columns,
+        categories=tuple(sorted(chosen_categories)),
+        max_price=max_price or None,
+        min_stock=min_stock,
+        search=search_term or None
+    )
+    
+    st.metric("🆕 Productos nuevos", f"{len(df_new):,}")
+    if not df_new.empty:
+        st.dataframe(df_new.head(1000), hide_index=True, use_container_width=True)
+
 def main():
     """Función principal"""
+    # Usar siempre la última versión del catálogo compartido
+    refresher = get_catalog_refresher()
+    catalog = get_catalog_cache().current
+    if catalog is not None and st.session_state.get('catalog_version') != catalog.version:
+        bind_catalog(catalog)
+    
     show_header()
     
     # Sidebar con logo
@@ -1157,19 +1356,19 @@ def main():
     
     # Botones de acción principales
     if not st.session_state.products_loaded:
-        if st.sidebar.button("Cargar Productos", use_container_width=True, type="primary"):
+        if st.sidebar.button("Cargar Productos", use_container_width=True, type="primary",
+                             disabled=bool(st.session_state.get('load_request'))):
             load_products()
     else:
         if st.sidebar.button("🔄 Actualizar", use_container_width=True, type="primary"):
-            with st.spinner("Limpiando cache..."):
-                st.session_state.products_loaded = False
-                st.session_state.df_orocolombia = pd.DataFrame()
-                st.session_state.df_grupofelmel = pd.DataFrame()
-                st.session_state.df_new_products = pd.DataFrame()
-                # Limpiar selecciones
-                st.session_state.selected_new_products = set()
-                st.session_state.selected_all_products = set()
-                st.rerun()
+            # Releer la configuración y recargar en segundo plano: se sigue mostrando
+            # el catálogo actual hasta que termine
+            reload_config()
+            refresher.trigger()
+            st.toast("🔄 Actualización iniciada en segundo plano")
+    
+    with st.sidebar:
+        show_catalog_status()
     
     # Navegación
     st.sidebar.markdown("---")
@@ -1215,6 +1414,11 @@ def main():
     
     page = st.session_state.current_page
     
+    # Carga en curso: su progreso se redibuja solo, sin bloquear el resto de la página
+    if st.session_state.get('load_request'):
+        show_load_progress()
+    show_load_result()
+    
     # Mostrar métricas si hay datos
     if st.session_state.products_loaded:
         show_metrics()
@@ -1271,13 +1475,8 @@ def main():
             """, unsafe_allow_html=True)
     
     elif page == "📋 Historial":
-        st.subheader("📋 Historial de Exportaciones")
-        st.markdown("""
-        <div style="background: #E7F1F2; padding: 1.5rem; border-radius: 10px; border: 1px solid #7B9E7E; margin: 1rem 0; color: #021A23;">
-            <strong>🚧 Próximamente</strong><br>
-            Historial de exportaciones con calendario.
-        </div>
-        """, unsafe_allow_html=True)
+        st.subheader("📋 Historial de Precios y Stock")
+        show_kardex_history()
     
     elif page == "⚙️ Configuración":
         st.subheader("⚙️ Configuración")
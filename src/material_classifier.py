@@ -0,0 +1,144 @@
+"""
+Clasificador de material de los productos
+
+Prepara una sola vez los términos de atributos y de materiales, recuerda qué
+nombres de atributo son de material y analiza cada texto distinto una sola vez.
+"""
+import re
+import logging
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Términos que identifican un atributo de material
+MATERIAL_ATTRIBUTE_TERMS = ['material', 'composición', 'metal', 'tipo']
+
+# Material detectado en la descripción, en orden de prioridad
+DESCRIPTION_MATERIALS = [
+    ('oro', 'Oro'),
+    ('plata', 'Plata'),
+    ('acero', 'Acero Inoxidable'),
+    ('titanio', 'Titanio'),
+]
+
+NO_MATERIAL = 'N/A'
+
+# Nombres de atributo distintos que se recuerdan (hay pocos: Material, Color, Talla...)
+MAX_CACHED_ATTRIBUTE_NAMES = 10_000
+
+_HTML_TAG = re.compile(r'<[^>]*>')
+
+def parse_extra_materials(value: Optional[str]) -> List[Tuple[str, str]]:
+    """
+    Leer materiales adicionales de la configuración
+
+    Args:
+        value: Texto 'término:Etiqueta' separado por comas, p. ej.
+            'rodio:Rodio, chapa:Chapa de Oro' (sin etiqueta se usa el término capitalizado)
+
+    Returns:
+        Lista de (término, etiqueta)
+    """
+    materials = []
+    for item in (value or '').split(','):
+        term, _, label = item.partition(':')
+        term = term.strip().lower()
+        if term:
+            materials.append((term, label.strip() or term.capitalize()))
+    return materials
+
+class MaterialClassifier:
+    """
+    Detecta el material de un producto a partir de sus atributos o su descripción
+
+    Los atributos cuyo nombre contiene un término de MATERIAL_ATTRIBUTE_TERMS
+    tienen prioridad; si no hay, gana el material de mayor prioridad que aparezca
+    en el texto (los de DESCRIPTION_MATERIALS y luego los adicionales).
+    """
+
+    def __init__(self, extra_materials: Optional[Iterable[Tuple[str, str]]] = None,
+                 strip_html: bool = False):
+        """
+        Args:
+            extra_materials: Materiales adicionales (término, etiqueta), con menor
+                prioridad que los predefinidos
+            strip_html: Ignorar coincidencias dentro de etiquetas HTML (p. ej. en
+                class="oro"); por defecto se busca en el HTML completo
+        """
+        materials: List[Tuple[str, str]] = []
+        seen = set()
+        for term, label in [*DESCRIPTION_MATERIALS, *(extra_materials or [])]:
+            term = term.lower()
+            if term and term not in seen:
+                seen.add(term)
+                materials.append((term, label))
+        self.materials: Tuple[Tuple[str, str], ...] = tuple(materials)
+        self.attribute_terms: Tuple[str, ...] = tuple(MATERIAL_ATTRIBUTE_TERMS)
+        self.strip_html = strip_html
+
+        # Nombre de atributo -> si declara material
+        self._attribute_names: Dict[str, bool] = {}
+
+    def _is_material_attribute(self, name: str) -> bool:
+        is_material = self._attribute_names.get(name)
+        if is_material is None:
+            lowered = name.lower()
+            is_material = any(term in lowered for term in self.attribute_terms)
+            if len(self._attribute_names) < MAX_CACHED_ATTRIBUTE_NAMES:
+                self._attribute_names[name] = is_material
+        return is_material
+
+    def from_attributes(self, attributes: Any) -> Optional[str]:
+        """Material declarado en los atributos (None si ninguno lo declara)"""
+        if attributes and isinstance(attributes, list):
+            for attr in attributes:
+                if self._is_material_attribute(attr.get('name', '')) and attr.get('options'):
+                    return ', '.join(attr['options'])
+        return None
+
+    def from_text(self, text: str) -> str:
+        """Material de mayor prioridad mencionado en un texto (NO_MATERIAL si ninguno)"""
+        text = text.lower()
+        label = self._scan(text)
+        if label is not None and self.strip_html and '<' in text:
+            # Solo se limpia el HTML de los textos con coincidencias
+            label = self._scan(_HTML_TAG.sub(' ', text))
+        return label or NO_MATERIAL
+
+    def _scan(self, text: str) -> Optional[str]:
+        # Búsqueda de subcadena en orden de prioridad: para unos pocos términos
+        # `in` es bastante más rápido que una alternativa de expresión regular
+        for term, label in self.materials:
+            if term in text:
+                return label
+        return None
+
+    def classify(self, attributes: Any, text: str) -> str:
+        """Material de un producto (atributos primero, luego texto)"""
+        material = self.from_attributes(attributes)
+        return material if material is not None else self.from_text(text)
+
+    def classify_texts(self, texts: pd.Series) -> np.ndarray:
+        """
+        Clasificar una columna de textos
+
+        Cada texto distinto se analiza una sola vez (las descripciones se repiten
+        mucho entre variantes de un mismo modelo).
+
+        Args:
+            texts: Textos (descripción + descripción corta)
+
+        Returns:
+            Array de etiquetas alineado con texts
+        """
+        codes, uniques = pd.factorize(texts, use_na_sentinel=False)
+        labels = np.array([self.from_text(text) for text in uniques], dtype=object)
+        return labels[codes]
+
+_default_classifier = MaterialClassifier()
+
+def get_default_classifier() -> MaterialClassifier:
+    """Clasificador sin materiales adicionales"""
+    return _default_classifier
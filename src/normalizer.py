@@ -0,0 +1,345 @@
+"""
+Normalización de productos de WooCommerce
+
+normalize_products convierte una página o el catálogo completo de productos
+raw en el DataFrame del catálogo construyendo cada columna de una vez.
+normalize_product (ProductManager.process_product) es el mismo código para un
+solo producto.
+to_catalog_schema reduce el catálogo al esquema compacto que se guarda en memoria.
+"""
+import logging
+from datetime import datetime
+from typing import List, Dict, Any, Callable, Optional
+import numpy as np
+import pandas as pd
+
+from category_facets import CATEGORY_SEPARATOR, join_category_list
+from material_classifier import MaterialClassifier, get_default_classifier
+
+logger = logging.getLogger(__name__)
+
+# Columnas del catálogo, en el orden en que las produce normalize_products
+PRODUCT_COLUMNS = [
+    'id', 'sku', 'name', 'slug', 'permalink', 'categories', 'category_list', 'material', 'price',
+    'discount_price', 'stock', 'status', 'date_modified', 'image_url', 'description',
+    'short_description', 'weight', 'dimensions', 'tags', 'attributes', 'variations',
+    'type', 'featured', 'catalog_visibility', 'raw_data'
+]
+
+# Campos copiados tal cual del producto (valor por defecto si la clave no existe)
+PASSTHROUGH_FIELDS = {
+    'slug': '',
+    'permalink': '',
+    'status': 'draft',
+    'description': '',
+    'short_description': '',
+    'weight': '',
+    'dimensions': {},
+    'attributes': [],
+    'variations': [],
+    'type': 'simple',
+    'featured': False,
+    'catalog_visibility': 'visible',
+}
+
+# Columnas con listas o dicts del payload
+NESTED_COLUMNS = {'dimensions', 'attributes', 'variations', 'raw_data'}
+
+# SKU PROD-n / ids temp_n / filas ERROR-n numerados por índice del producto
+PLACEHOLDER_PATTERN = r'^(?:PROD-|ERROR-|temp_)([0-9]+)$'
+
+# Zona horaria al final de una fecha ISO 8601 (Z, +02:00, -0300)
+DATE_ZONE = r'(?:Z|[+-][0-9]{2}:?[0-9]{2})$'
+
+# Columnas pesadas que el dashboard no usa: el payload original va a RawProductStore
+RAW_COLUMNS = ['raw_data', 'description', 'short_description', 'attributes', 'variations', 'dimensions']
+
+# Tipos del catálogo en memoria: texto en Arrow, categorías para columnas con pocos valores
+STRING_DTYPE = 'string[pyarrow]'
+CATALOG_DTYPES = {
+    'sku': STRING_DTYPE,
+    'name': STRING_DTYPE,
+    'slug': STRING_DTYPE,
+    'permalink': STRING_DTYPE,
+    'image_url': STRING_DTYPE,
+    'tags': STRING_DTYPE,
+    'weight': STRING_DTYPE,
+    'categories': 'category',
+    'category_list': 'category',
+    'material': 'category',
+    'status': 'category',
+    'type': 'category',
+    'catalog_visibility': 'category',
+    'price': 'float64',
+    'discount_price': 'float64',
+    'stock': 'int64',
+    'featured': 'bool',
+}
+
+def normalize_product(product: Dict[str, Any], index: int, discount_percentage: float,
+                      classifier: Optional[MaterialClassifier] = None) -> Dict[str, Any]:
+    """
+    Procesar un producto individual (una fila de normalize_products)
+
+    Args:
+        product: Producto raw de la API
+        index: Índice del producto (para los SKU PROD-n / ids temp_n)
+        discount_percentage: Porcentaje de descuento (DISCOUNT_PERCENTAGE)
+        classifier: Clasificador de material (por defecto sin materiales adicionales)
+
+    Returns:
+        Producto procesado; si sus datos no son válidos, una fila ERROR-n
+    """
+    return normalize_products([product], discount_percentage, index, classifier).to_dict('records')[0]
+
+def _error_row(index: int, now: datetime) -> Dict[str, Any]:
+    """Fila que reemplaza a un producto con datos no válidos"""
+    return {
+        'id': f'ERROR-{index}',
+        'sku': f'ERROR-{index}',
+        'name': 'Error al procesar',
+        'slug': '',
+        'permalink': '',
+        'categories': 'Error',
+        'category_list': 'Error',
+        'material': 'Error',
+        'price': 0.0,
+        'stock': 0,
+        'status': 'draft',
+        'date_modified': now,
+        'image_url': '',
+        'description': '',
+        'short_description': '',
+        'weight': '',
+        'dimensions': {},
+        'tags': '',
+        'attributes': [],
+        'variations': [],
+        'type': 'simple',
+        'featured': False,
+        'catalog_visibility': 'visible',
+        'raw_data': {}
+    }
+
+def _object_column(values):
+    """
+    Columna de objetos sin que pandas recorra las listas y dicts anidados
+
+    pd.DataFrame trata de interpretar cada lista anidada (atributos, variaciones)
+    como una fila; np.fromiter copia solo las referencias. Las columnas que ya
+    son arrays de numpy (price, stock, date_modified) se usan tal cual.
+    """
+    if not isinstance(values, list):
+        return values
+    return pd.Series(np.fromiter(values, dtype=object, count=len(values))).infer_objects()
+
+def _apply(func: Callable, values: list, errors: Dict[int, str]) -> list:
+    """Aplicar func a cada valor; las filas que lanzan una excepción quedan en errors (valor None)"""
+    results = []
+    for i, value in enumerate(values):
+        try:
+            results.append(func(value))
+        except Exception as e:
+            errors.setdefault(i, str(e))
+            results.append(None)
+    return results
+
+def _numbers(values: list, present: np.ndarray) -> pd.Series:
+    """pd.to_numeric de los valores presentes (NaN si faltan o no son numéricos)"""
+    numbers = pd.Series(np.fromiter(values, dtype=object, count=len(values))).where(present)
+    return pd.to_numeric(numbers, errors='coerce').astype(np.float64)
+
+def _price_column(values: list, errors: Dict[int, str]) -> np.ndarray:
+    """Columna price en float64 (0 si falta); los valores no numéricos marcan la fila como error"""
+    present = np.fromiter((bool(value) for value in values), dtype=bool, count=len(values))
+    prices = _numbers(values, present)
+    for i in np.flatnonzero(present & prices.isna().to_numpy()).tolist():
+        errors.setdefault(i, f'precio no numérico: {values[i]!r}')
+    return prices.fillna(0).to_numpy()
+
+def _stock_column(values: list, errors: Dict[int, str]) -> np.ndarray:
+    """Columna stock en int64 (0 si falta); los valores no enteros marcan la fila como error"""
+    present = np.fromiter((value is not None for value in values), dtype=bool, count=len(values))
+    stock = _numbers(values, present)
+    invalid = present & ~(stock % 1 == 0).to_numpy()
+    for i in np.flatnonzero(invalid).tolist():
+        errors.setdefault(i, f'stock no entero: {values[i]!r}')
+    return stock.mask(invalid, 0).fillna(0).to_numpy(dtype=np.int64)
+
+def _date_column(values: list, now: datetime) -> np.ndarray:
+    """
+    Columna date_modified (now si falta o no se puede leer)
+
+    WooCommerce manda la hora local sin zona; las fechas con zona (Z, +02:00)
+    se pasan a UTC sin zona para que la columna sea datetime64 en un solo tipo.
+    """
+    dates = pd.Series(np.fromiter(values, dtype=object, count=len(values)))
+    texts = dates.where(dates.map(lambda value: isinstance(value, str)))
+    zoned = texts.str.contains(DATE_ZONE, na=False)
+    parsed = pd.to_datetime(texts.where(~zoned), format='ISO8601', errors='coerce')
+    if zoned.any():
+        parsed[zoned] = pd.to_datetime(texts[zoned], format='ISO8601', errors='coerce',
+                                       utc=True).dt.tz_convert(None)
+    return parsed.fillna(pd.Timestamp(now)).to_numpy()
+
+def _first_image(images) -> str:
+    if images and isinstance(images, list) and len(images) > 0:
+        return images[0].get('src', '')
+    return ''
+
+def _join_tags(tags) -> str:
+    return ', '.join([tag.get('name', '') for tag in tags])
+
+def _category_columns(values: list, errors: Dict[int, str]) -> tuple:
+    """
+    Columnas categories y category_list
+
+    Cada combinación de nombres se une una sola vez (se repiten mucho entre productos).
+    """
+    joined = {None: ('Sin categoría', 'Sin categoría')}
+    categories, category_lists = [], []
+    for i, value in enumerate(values):
+        try:
+            key = tuple([cat.get('name', '') for cat in value]) if value and isinstance(value, list) else None
+            pair = joined.get(key)
+            if pair is None:
+                # Para filtrar: los nombres pueden contener ', '
+                pair = joined[key] = (CATEGORY_SEPARATOR.join(key), join_category_list(key))
+        except Exception as e:
+            errors.setdefault(i, str(e))
+            pair = (None, None)
+        categories.append(pair[0])
+        category_lists.append(pair[1])
+    return categories, category_lists
+
+def normalize_products(products: List[Dict[str, Any]], discount_percentage: float,
+                       start_index: int = 0,
+                       classifier: Optional[MaterialClassifier] = None) -> pd.DataFrame:
+    """
+    Normalizar una lista de productos raw de WooCommerce columna por columna
+
+    Args:
+        products: Productos raw de la API
+        discount_percentage: Porcentaje de descuento (DISCOUNT_PERCENTAGE)
+        start_index: Índice del primer producto (para los SKU PROD-n / ids temp_n)
+        classifier: Clasificador de material (por defecto sin materiales adicionales)
+
+    Returns:
+        DataFrame con las columnas PRODUCT_COLUMNS (vacío si no hay productos);
+        los productos con datos no válidos quedan como filas ERROR-n
+    """
+    if not products:
+        return pd.DataFrame()
+    classifier = classifier or get_default_classifier()
+    count = len(products)
+    indices = range(start_index, start_index + count)
+    now = datetime.now()
+
+    # Motivo del error de cada fila no válida
+    errors: Dict[int, str] = {i: 'el producto no es un dict' for i, product in enumerate(products)
+                              if not isinstance(product, dict)}
+    rows = [product if isinstance(product, dict) else {} for product in products] if errors else products
+    columns: Dict[str, Any] = {}
+
+    # id, sku y name con sus valores por defecto por índice
+    columns['id'] = [product['id'] if 'id' in product else f'temp_{i}' for product, i in zip(rows, indices)]
+    columns['sku'] = [str(sku) if sku and sku != 'None' else f'PROD-{i}'
+                      for sku, i in zip([product.get('sku') for product in rows], indices)]
+    columns['name'] = [str(name) if name and name != 'None' else 'Sin nombre'
+                       for name in [product.get('name') for product in rows]]
+
+    for field, default in PASSTHROUGH_FIELDS.items():
+        columns[field] = [product.get(field, default) for product in rows]
+
+    columns['categories'], columns['category_list'] = _category_columns(
+        [product.get('categories') for product in rows], errors)
+    columns['tags'] = _apply(_join_tags, [product.get('tags', []) for product in rows], errors)
+    columns['image_url'] = _apply(_first_image, [product.get('images') for product in rows], errors)
+
+    # Material: atributos primero; si no hay, descripción + descripción corta en un solo lote
+    material = _apply(classifier.from_attributes, columns['attributes'], errors)
+    pending = []
+    texts = []
+    for i, (value, description, short_description) in enumerate(
+            zip(material, columns['description'], columns['short_description'])):
+        if value is None and i not in errors:
+            if isinstance(description, str) and isinstance(short_description, str):
+                pending.append(i)
+                texts.append(description + short_description)
+            else:
+                errors[i] = 'descripción no textual'
+    for i, label in zip(pending, classifier.classify_texts(pd.Series(texts, dtype=object))):
+        material[i] = label
+    columns['material'] = material
+
+    # Precio: price -> regular_price -> sale_price
+    columns['price'] = _price_column([product.get('price') or product.get('regular_price')
+                                      or product.get('sale_price') for product in rows], errors)
+    columns['stock'] = _stock_column([product.get('stock_quantity') for product in rows], errors)
+    columns['date_modified'] = _date_column([product.get('date_modified') for product in rows], now)
+    columns['raw_data'] = list(products)
+
+    for i in sorted(errors):
+        logger.error(f"Error procesando producto {indices[i]}: {errors[i]}")
+        for column, value in _error_row(indices[i], now).items():
+            columns[column][i] = value
+
+    # Descuento en una sola operación sobre la columna final
+    columns['discount_price'] = columns['price'] * (1 - discount_percentage / 100)
+    return pd.DataFrame({column: _object_column(columns[column]) for column in PRODUCT_COLUMNS})
+
+def next_placeholder_index(df: Optional[pd.DataFrame]) -> int:
+    """
+    Primer índice libre para los PROD-n / temp_n / ERROR-n de productos que se fusionan con df
+
+    Una sincronización incremental numera sus productos desde este índice para
+    que sus marcadores no coincidan con los del catálogo existente.
+
+    Args:
+        df: Catálogo existente (puede ser None o vacío)
+
+    Returns:
+        Mayor índice usado en las columnas id y sku más uno (0 si no hay ninguno)
+    """
+    if df is None or df.empty:
+        return 0
+    highest = -1
+    for column in ('id', 'sku'):
+        if column in df.columns:
+            numbers = pd.to_numeric(df[column].astype(str).str.extract(PLACEHOLDER_PATTERN, expand=False))
+            if numbers.notna().any():
+                highest = max(highest, int(numbers.max()))
+    return highest + 1
+
+def to_catalog_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reducir un catálogo normalizado al esquema compacto que se guarda en memoria
+
+    Quita RAW_COLUMNS y convierte las demás columnas a CATALOG_DTYPES (solo las
+    presentes, así sirve también para el catálogo de referencia id/sku). Los
+    textos vacíos o nulos quedan como '' para que la interfaz no reciba pd.NA.
+
+    Args:
+        df: Catálogo normalizado (normalize_products o un snapshot anterior)
+
+    Returns:
+        DataFrame nuevo con el esquema compacto
+    """
+    if df.empty and len(df.columns) == 0:
+        return df
+
+    lean = df.drop(columns=[column for column in RAW_COLUMNS if column in df.columns])
+    dtypes = {column: dtype for column, dtype in CATALOG_DTYPES.items() if column in lean.columns}
+    for column, dtype in dtypes.items():
+        series = lean[column]
+        if series.dtype == dtype:
+            continue
+        if dtype == STRING_DTYPE:
+            lean[column] = series.astype(dtype).fillna('')
+        elif dtype == 'category':
+            lean[column] = series.astype(str).astype(dtype)
+        elif dtype == 'bool':
+            lean[column] = series.map(bool)
+        else:
+            lean[column] = pd.to_numeric(series, errors='coerce').fillna(0).astype(dtype)
+    return lean
@@ -0,0 +1,99 @@
+"""
+Normalización de catálogos grandes en varios procesos
+
+Reparte los productos raw en bloques entre un pool de procesos; cada proceso los
+normaliza, los reduce al esquema compacto y devuelve el bloque ya compacto en
+lugar de una lista de dicts. El proceso principal concatena los bloques en orden.
+"""
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional
+import pandas as pd
+
+from material_classifier import MaterialClassifier
+from normalizer import normalize_products, to_catalog_schema
+
+logger = logging.getLogger(__name__)
+
+# Productos mínimos por bloque: por debajo el envío entre procesos pesa más que el trabajo
+MIN_CHUNK_SIZE = 5_000
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+def get_process_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Pool de procesos compartido, creado al primer uso y reutilizado entre cargas
+
+    Se usa 'spawn': el servidor de Streamlit tiene hilos y hacer fork de un
+    proceso con hilos no es seguro.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = ProcessPoolExecutor(max_workers=workers,
+                                        mp_context=multiprocessing.get_context('spawn'))
+            _pool_workers = workers
+            logger.info(f"Pool de normalización iniciado con {workers} procesos")
+        return _pool
+
+def shutdown_process_pool():
+    """Cerrar el pool de procesos (si existe)"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+        _pool_workers = 0
+
+def _normalize_chunk(products: List[Dict[str, Any]], start_index: int, discount_percentage: float,
+                     classifier: MaterialClassifier) -> pd.DataFrame:
+    """Normalizar un bloque en un proceso del pool y reducirlo al esquema compacto"""
+    return to_catalog_schema(normalize_products(products, discount_percentage, start_index, classifier))
+
+def normalize_products_parallel(products: List[Dict[str, Any]], discount_percentage: float,
+                                workers: int,
+                                classifier: Optional[MaterialClassifier] = None,
+                                chunk_size: Optional[int] = None,
+                                start_index: int = 0) -> pd.DataFrame:
+    """
+    Normalizar un catálogo en varios procesos y devolverlo con el esquema compacto
+
+    Equivale a to_catalog_schema(normalize_products(...)).
+
+    Args:
+        products: Productos raw de la API
+        discount_percentage: Porcentaje de descuento (DISCOUNT_PERCENTAGE)
+        workers: Número de procesos
+        classifier: Clasificador de material
+        chunk_size: Productos por bloque (por defecto dos bloques por proceso)
+        start_index: Índice del primer producto (para los SKU PROD-n / ids temp_n)
+
+    Returns:
+        Catálogo compacto
+    """
+    if not products:
+        return pd.DataFrame()
+
+    classifier = classifier or MaterialClassifier()
+    chunk_size = chunk_size or max(MIN_CHUNK_SIZE, -(-len(products) // (workers * 2)))
+    pool = get_process_pool(workers)
+
+    futures = [
+        pool.submit(_normalize_chunk, products[start:start + chunk_size], start_index + start,
+                    discount_percentage, classifier)
+        for start in range(0, len(products), chunk_size)
+    ]
+
+    frames = [future.result() for future in futures]
+
+    # Las categorías de cada bloque difieren: concat las deja como object y
+    # to_catalog_schema las vuelve a convertir
+    df = pd.concat(frames, ignore_index=True)
+    logger.info(f"{len(products)} productos normalizados en {len(futures)} bloques con {workers} procesos")
+    return to_catalog_schema(df)
@@ -0,0 +1,142 @@
+"""
+Almacén lateral de los productos originales de la API (SQLite)
+
+El catálogo en memoria solo guarda las columnas que usa el dashboard; el JSON
+completo de cada producto queda aquí, por tienda e id, y se lee bajo demanda.
+"""
+import os
+import json
+import sqlite3
+import logging
+from contextlib import closing
+from typing import List, Dict, Any, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+RAW_STORE_FILE = 'raw_products.sqlite'
+
+class RawProductStore:
+    """Payloads originales de WooCommerce indexados por (tienda, id de producto)"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Ruta del archivo SQLite (se crea al primer guardado)
+        """
+        self.path = path
+
+    def _connect(self) -> sqlite3.Connection:
+        # Una conexión por operación: el guardado corre en el hilo de recarga y
+        # las lecturas en los hilos de las sesiones
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS raw_products (
+                source TEXT NOT NULL,
+                product_id TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                PRIMARY KEY (source, product_id)
+            )
+        """)
+        return conn
+
+    def save(self, source_name: str, products: List[Dict[str, Any]], replace: bool = False) -> int:
+        """
+        Guardar los productos de una descarga
+
+        Args:
+            source_name: Nombre de la tienda
+            products: Productos raw de la API
+            replace: Borrar antes los productos guardados de la tienda (descarga completa)
+
+        Returns:
+            Número de productos guardados
+        """
+        rows = [
+            (source_name, str(product['id']), json.dumps(product, ensure_ascii=False))
+            for product in products
+            if product.get('id') is not None
+        ]
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            if replace:
+                conn.execute("DELETE FROM raw_products WHERE source = ?", (source_name,))
+            conn.executemany(
+                "INSERT OR REPLACE INTO raw_products (source, product_id, payload) VALUES (?, ?, ?)",
+                rows
+            )
+
+        logger.debug(f"{source_name}: {len(rows)} productos originales guardados en {self.path}")
+        return len(rows)
+
+    def retain(self, source_name: str, product_ids: Iterable[Any]) -> int:
+        """
+        Borrar los productos guardados de una tienda que no están en product_ids
+
+        Con la descarga por páginas cada página se guarda al llegar; al terminar una
+        descarga completa esto elimina los productos que ya no existen.
+
+        Args:
+            source_name: Nombre de la tienda
+            product_ids: Ids de los productos vigentes
+
+        Returns:
+            Número de productos borrados
+        """
+        if not os.path.exists(self.path):
+            return 0
+
+        with closing(self._connect()) as conn, conn:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS retained_ids (product_id TEXT PRIMARY KEY)")
+            conn.execute("DELETE FROM retained_ids")
+            conn.executemany("INSERT OR IGNORE INTO retained_ids (product_id) VALUES (?)",
+                             ((str(product_id),) for product_id in product_ids))
+            deleted = conn.execute(
+                "DELETE FROM raw_products WHERE source = ? "
+                "AND product_id NOT IN (SELECT product_id FROM retained_ids)",
+                (source_name,)
+            ).rowcount
+
+        if deleted:
+            logger.info(f"{source_name}: {deleted} productos originales eliminados de {self.path}")
+        return deleted
+
+    def get(self, source_name: str, product_id: Any) -> Optional[Dict[str, Any]]:
+        """
+        Producto original de la API (None si no está guardado)
+
+        Args:
+            source_name: Nombre de la tienda
+            product_id: Id del producto en WooCommerce
+        """
+        return self.get_many(source_name, [product_id]).get(str(product_id))
+
+    def get_many(self, source_name: str, product_ids: Iterable[Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        Varios productos originales de una tienda
+
+        Args:
+            source_name: Nombre de la tienda
+            product_ids: Ids de producto
+
+        Returns:
+            Diccionario {id como texto: producto}
+        """
+        ids = [str(product_id) for product_id in product_ids]
+        if not ids or not os.path.exists(self.path):
+            return {}
+
+        found = {}
+        with closing(self._connect()) as conn:
+            # Por lotes para no superar el límite de parámetros de SQLite
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                placeholders = ', '.join('?' * len(batch))
+                cursor = conn.execute(
+                    f"SELECT product_id, payload FROM raw_products "
+                    f"WHERE source = ? AND product_id IN ({placeholders})",
+                    [source_name, *batch]
+                )
+                for product_id, payload in cursor:
+                    found[product_id] = json.loads(payload)
+        return found
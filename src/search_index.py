@@ -0,0 +1,179 @@
+"""
+Índice de búsqueda por SKU y nombre de las páginas de productos
+
+Se arma una vez por versión del catálogo. El SKU y el nombre se normalizan
+(minúsculas, sin tildes, espacios simples) y se indexan por trigramas de
+bytes: cada trigrama apunta a las filas que lo contienen. Una búsqueda
+intersecta las listas de sus trigramas, empezando por la más corta, y solo
+verifica esas filas candidatas en lugar de recorrer todo el catálogo. Los
+SKUs se guardan además ordenados para encontrar por búsqueda binaria las
+coincidencias exactas y por prefijo, que se muestran primero.
+
+El texto buscado es literal: "(" o "*" no se interpretan como expresiones
+regulares.
+"""
+import re
+import logging
+import unicodedata
+from typing import Any, Iterable, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+GRAM_SIZE = 3
+# Separa el SKU del nombre y cierra cada fila: ningún texto buscado lo contiene
+SEPARATOR = '\x00'
+# Mayor que cualquier carácter: límite superior de los SKUs con un prefijo
+MAX_CHAR = '\U0010ffff'
+
+# Marcas diacríticas que quedan separadas de la letra tras la descomposición NFKD
+COMBINING_MARKS = re.compile('[\u0300-\u036f\u1ab0-\u1aff\u1dc0-\u1dff\u20d0-\u20ff\ufe20-\ufe2f]')
+
+def _fold_text(text: str) -> str:
+    """Minúsculas, sin tildes y con los espacios consecutivos unidos en uno"""
+    if not text.isascii():
+        text = COMBINING_MARKS.sub('', unicodedata.normalize('NFKD', text))
+    return ' '.join(text.casefold().split())
+
+def fold(text: Any) -> str:
+    """
+    Normalizar un texto para buscar: minúsculas, sin tildes y espacios simples
+
+    Args:
+        text: Texto (los valores nulos se tratan como texto vacío)
+
+    Returns:
+        Texto normalizado ('Añillo  ORO' -> 'anillo oro')
+    """
+    if not isinstance(text, str):
+        text = '' if pd.isna(text) is True else str(text)
+    return _fold_text(text.replace(SEPARATOR, ' '))
+
+def fold_all(values: Iterable[Any]) -> List[str]:
+    """
+    Normalizar muchos textos (igual que fold)
+
+    Se normalizan todos juntos, unidos por SEPARATOR, para que cada paso sea
+    una sola operación sobre un texto grande en lugar de una por valor.
+    """
+    texts = pd.Series(list(values), dtype=object).fillna('').astype(str)
+    if texts.empty:
+        return []
+    text = _fold_text(SEPARATOR.join(value.replace(SEPARATOR, ' ') for value in texts))
+    # Quitar el espacio que pudo quedar al comienzo o al final de cada texto
+    text = text.replace(f" {SEPARATOR}", SEPARATOR).replace(f"{SEPARATOR} ", SEPARATOR)
+    return text.split(SEPARATOR)
+
+class SearchIndex:
+    """Índice de trigramas sobre el SKU y el nombre de un catálogo"""
+
+    def __init__(self, skus: Sequence[Any], names: Sequence[Any]):
+        """
+        Args:
+            skus: SKU de cada fila, en el orden del catálogo
+            names: Nombre de cada fila
+        """
+        folded_skus = fold_all(skus)
+        # Texto de cada fila: "sku\0nombre\0\0". El cierre hace que todo texto de
+        # 1 o 2 bytes sea el comienzo de algún trigrama de la fila
+        self._texts = [f"{sku}{SEPARATOR}{name}{SEPARATOR * 2}".encode()
+                       for sku, name in zip(folded_skus, fold_all(names))]
+        self._grams, self._offsets, self._rows = self._build_postings(self._texts)
+
+        skus_array = np.array(folded_skus, dtype=str)
+        self._sku_order = np.argsort(skus_array, kind='stable')
+        self._sorted_skus = skus_array[self._sku_order]
+        logger.info(f"Índice de búsqueda armado: {len(self._texts)} filas, {len(self._grams)} trigramas")
+
+    def __len__(self):
+        return len(self._texts)
+
+    @staticmethod
+    def _build_postings(texts: Sequence[bytes]):
+        """Trigramas ordenados y, para cada uno, las filas que lo contienen (en orden)"""
+        if not texts:
+            return np.empty(0, dtype=np.int64), np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.int32)
+
+        lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+        data = np.frombuffer(b''.join(texts), dtype=np.uint8).astype(np.int64)
+        starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+        rows = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+        # Un trigrama es válido si no sale de su fila
+        valid = (np.arange(len(data)) - starts <= np.repeat(lengths, lengths) - GRAM_SIZE)[:-(GRAM_SIZE - 1)]
+        codes = (data[:-2] << 16) | (data[1:-1] << 8) | data[2:]
+
+        # Pares (trigrama, fila) únicos, ordenados por trigrama y luego por fila
+        pairs = np.sort(codes[valid] * len(texts) + rows[:-(GRAM_SIZE - 1)][valid])
+        pairs = pairs[np.concatenate(([True], pairs[1:] != pairs[:-1]))]
+        gram_codes = pairs // len(texts)
+        first = np.flatnonzero(np.concatenate(([True], gram_codes[1:] != gram_codes[:-1])))
+        offsets = np.append(first, len(pairs)).astype(np.int64)
+        return gram_codes[first], offsets, (pairs % len(texts)).astype(np.int32)
+
+    def _posting(self, code: int) -> np.ndarray:
+        """Filas que contienen un trigrama"""
+        i = np.searchsorted(self._grams, code)
+        if i == len(self._grams) or self._grams[i] != code:
+            return self._rows[:0]
+        return self._rows[self._offsets[i]:self._offsets[i + 1]]
+
+    def _matches(self, query: bytes) -> np.ndarray:
+        """Filas (en orden) cuyo SKU o nombre contiene query"""
+        if len(query) < GRAM_SIZE:
+            # Los trigramas que empiezan por query forman un rango contiguo
+            shift = 8 * (GRAM_SIZE - len(query))
+            low = int.from_bytes(query, 'big') << shift
+            first, last = np.searchsorted(self._grams, [low, low + (1 << shift)])
+            return np.unique(self._rows[self._offsets[first]:self._offsets[last]])
+
+        postings = sorted((self._posting(int.from_bytes(query[i:i + GRAM_SIZE], 'big'))
+                           for i in range(len(query) - GRAM_SIZE + 1)), key=len)
+        candidates = postings[0]
+        for posting in postings[1:]:
+            if not len(candidates):
+                break
+            candidates = np.intersect1d(candidates, posting, assume_unique=True)
+        if len(query) == GRAM_SIZE:
+            return candidates
+        # Tener todos los trigramas no garantiza la subcadena completa: verificar
+        texts = self._texts
+        return np.array([row for row in candidates.tolist() if query in texts[row]], dtype=np.int32)
+
+    def _sku_matches(self, query: str):
+        """Filas con el SKU igual a query y con el SKU que empieza por query (búsqueda binaria)"""
+        equal_first = np.searchsorted(self._sorted_skus, query, side='left')
+        equal_last = np.searchsorted(self._sorted_skus, query, side='right')
+        prefix_last = np.searchsorted(self._sorted_skus, query + MAX_CHAR, side='left')
+        order = self._sku_order
+        return np.sort(order[equal_first:equal_last]), np.sort(order[equal_last:prefix_last])
+
+    def search(self, term: str) -> Optional[np.ndarray]:
+        """
+        Filas cuyo SKU o nombre contiene term (sin distinguir mayúsculas ni tildes)
+
+        Args:
+            term: Texto buscado (literal)
+
+        Returns:
+            Posiciones de las filas: primero los SKUs iguales a term, luego los
+            que empiezan por term y después el resto en el orden del catálogo.
+            None si term está vacío (sin filtro)
+        """
+        query = fold(term)
+        if not query:
+            return None
+        matches = self._matches(query.encode())
+        if not len(matches):
+            return matches.astype(np.int64)
+
+        exact, prefix = self._sku_matches(query)
+        first = np.concatenate([exact, prefix]).astype(np.int64)
+        if not len(first):
+            return matches.astype(np.int64)
+        return np.concatenate([first, np.setdiff1d(matches, first, assume_unique=True)])
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'SearchIndex':
+        """Índice de un catálogo (columnas sku y name)"""
+        return cls(df['sku'].tolist(), df['name'].tolist())
@@ -0,0 +1,250 @@
+"""
+Persistencia de snapshots del catálogo en disco (Parquet + manifiesto)
+"""
+import os
+import json
+import shutil
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Tuple
+import pandas as pd
+
+from sync_state import get_sync_state
+from normalizer import to_catalog_schema
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = 'manifest.json'
+SNAPSHOTS_DIR = 'snapshots'
+
+# Nombres de los DataFrames del catálogo dentro del snapshot
+CATALOG_FRAMES = {
+    'orocolombia': 'OroColmbia',
+    'grupofelmel': 'GrupoFelmel',
+}
+NEW_PRODUCTS_FRAME = 'new_products'
+
+def _needs_json(series: pd.Series) -> bool:
+    """Una columna object que no sea solo texto (dicts, listas, tipos mezclados) se guarda como JSON"""
+    if series.dtype != object:
+        return False
+    return any(value is not None and not isinstance(value, str) for value in series)
+
+def encode_frame(df: pd.DataFrame) -> Tuple[pd.DataFrame, list]:
+    """
+    Serializar a JSON las columnas que Parquet no puede guardar tal cual
+
+    Lo usan los snapshots y el historial del catálogo (catalog_history).
+
+    Returns:
+        Tuple (DataFrame para Parquet, columnas guardadas como JSON)
+    """
+    json_columns = [column for column in df.columns if _needs_json(df[column])]
+    if not json_columns:
+        return df, []
+
+    encoded = df.copy()
+    for column in json_columns:
+        encoded[column] = [json.dumps(value, ensure_ascii=False, default=str) for value in df[column]]
+    return encoded, json_columns
+
+def decode_frame(df: pd.DataFrame, json_columns: list) -> pd.DataFrame:
+    """Revertir encode_frame"""
+    for column in json_columns:
+        if column in df.columns:
+            df[column] = [json.loads(value) if value is not None else None for value in df[column]]
+    return df
+
+class SnapshotStore:
+    """Almacén de snapshots del catálogo bajo CACHE_DIR"""
+
+    def __init__(self, cache_dir: str, keep_snapshots: int = 3):
+        """
+        Args:
+            cache_dir: Directorio de cache (StreamlitConfig.CACHE_DIR)
+            keep_snapshots: Número de snapshots anteriores que se conservan
+        """
+        self.cache_dir = cache_dir
+        self.snapshots_dir = os.path.join(cache_dir, SNAPSHOTS_DIR)
+        self.manifest_path = os.path.join(cache_dir, MANIFEST_FILE)
+        self.keep_snapshots = keep_snapshots
+
+    def read_manifest(self) -> Optional[Dict[str, Any]]:
+        """Leer el manifiesto del último snapshot (None si no existe o está dañado)"""
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Manifiesto de snapshot ilegible: {str(e)}")
+            return None
+
+    def save(self, frames: Dict[str, pd.DataFrame], metadata: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Guardar un snapshot y publicarlo como el más reciente
+
+        Los archivos se escriben en un directorio nuevo y el manifiesto se reemplaza
+        de forma atómica al final, así un lector nunca ve un snapshot a medias.
+
+        Args:
+            frames: DataFrames a guardar {nombre: DataFrame}
+            metadata: Datos adicionales para el manifiesto
+
+        Returns:
+            Identificador del snapshot
+        """
+        created_at = datetime.now()
+        snapshot_id = created_at.strftime('%Y%m%d-%H%M%S-%f')
+        snapshot_dir = os.path.join(self.snapshots_dir, snapshot_id)
+        os.makedirs(snapshot_dir, exist_ok=True)
+
+        manifest = {
+            'snapshot_id': snapshot_id,
+            'created_at': created_at.isoformat(),
+            'frames': {},
+            'metadata': metadata or {}
+        }
+
+        for name, df in frames.items():
+            file_name = f"{name}.parquet"
+            encoded, json_columns = encode_frame(df)
+            encoded.to_parquet(os.path.join(snapshot_dir, file_name), index=False)
+            manifest['frames'][name] = {
+                'file': file_name,
+                'rows': len(df),
+                'json_columns': json_columns
+            }
+
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+        logger.info(f"Snapshot {snapshot_id} guardado en {snapshot_dir}")
+        self._prune(snapshot_id)
+        return snapshot_id
+
+    def load_latest(self, max_age_minutes: Optional[float] = None
+                    ) -> Optional[Tuple[Dict[str, pd.DataFrame], Dict[str, Any]]]:
+        """
+        Cargar el snapshot más reciente
+
+        Args:
+            max_age_minutes: Antigüedad máxima aceptada (None = cualquiera)
+
+        Returns:
+            Tuple ({nombre: DataFrame}, manifiesto) o None si no hay snapshot válido
+        """
+        manifest = self.read_manifest()
+        if not manifest:
+            return None
+
+        created_at = datetime.fromisoformat(manifest['created_at'])
+        if max_age_minutes is not None and datetime.now() - created_at > timedelta(minutes=max_age_minutes):
+            logger.info(f"Snapshot {manifest['snapshot_id']} expirado (más de {max_age_minutes} min)")
+            return None
+
+        snapshot_dir = os.path.join(self.snapshots_dir, manifest['snapshot_id'])
+        frames = {}
+        try:
+            for name, info in manifest['frames'].items():
+                df = pd.read_parquet(os.path.join(snapshot_dir, info['file']))
+                frames[name] = decode_frame(df, info.get('json_columns', []))
+        except Exception as e:
+            logger.warning(f"No se pudo leer el snapshot {manifest['snapshot_id']}: {str(e)}")
+            return None
+
+        return frames, manifest
+
+    def _prune(self, current_id: str):
+        """Borrar snapshots antiguos conservando los keep_snapshots más recientes"""
+        try:
+            snapshot_ids = sorted(os.listdir(self.snapshots_dir), reverse=True)
+        except OSError:
+            return
+
+        for snapshot_id in snapshot_ids[self.keep_snapshots:]:
+            if snapshot_id != current_id:
+                shutil.rmtree(os.path.join(self.snapshots_dir, snapshot_id), ignore_errors=True)
+
+def save_catalog_snapshot(store: SnapshotStore, df_orocolombia: pd.DataFrame,
+                          df_grupofelmel: pd.DataFrame, df_new_products: pd.DataFrame) -> Optional[str]:
+    """
+    Guardar el catálogo procesado junto con el estado de sincronización de cada tienda
+
+    Args:
+        store: Almacén de snapshots
+        df_orocolombia: Catálogo de OroColmbia
+        df_grupofelmel: Catálogo de referencia de GrupoFelmel
+        df_new_products: Productos nuevos calculados
+
+    Returns:
+        Identificador del snapshot, o None si no se pudo guardar
+    """
+    sync = {}
+    for source_name in CATALOG_FRAMES.values():
+        state = get_sync_state(source_name)
+        sync[source_name] = {
+            'last_sync': state.last_sync.isoformat() if state.last_sync else None,
+            'last_full_sync': state.last_full_sync.isoformat() if state.last_full_sync else None
+        }
+
+    try:
+        return store.save(
+            {
+                'orocolombia': df_orocolombia,
+                'grupofelmel': df_grupofelmel,
+                NEW_PRODUCTS_FRAME: df_new_products
+            },
+            metadata={'sync': sync}
+        )
+    except Exception as e:
+        logger.error(f"Error guardando snapshot: {str(e)}")
+        return None
+
+def load_catalog_snapshot(store: SnapshotStore, max_age_minutes: Optional[float] = None
+                          ) -> Optional[Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]]:
+    """
+    Cargar el último snapshot del catálogo
+
+    Cualquier snapshot existente (aunque haya expirado) restaura el estado de
+    sincronización de las tiendas, para que la próxima consulta sea incremental;
+    solo se devuelve si no supera max_age_minutes.
+
+    Args:
+        store: Almacén de snapshots
+        max_age_minutes: Antigüedad máxima para servir el snapshot (CACHE_DURATION_MINUTES)
+
+    Returns:
+        Tuple (OroColmbia, GrupoFelmel, productos nuevos) o None
+    """
+    loaded = store.load_latest()
+    if loaded is None:
+        return None
+
+    frames, manifest = loaded
+    # Snapshots anteriores guardaban el producto completo; todos se cargan con el esquema compacto
+    frames = {name: to_catalog_schema(df) for name, df in frames.items()}
+    sync = manifest.get('metadata', {}).get('sync', {})
+    for name, source_name in CATALOG_FRAMES.items():
+        if name not in frames:
+            continue
+        info = sync.get(source_name, {})
+        get_sync_state(source_name).restore(
+            frames[name],
+            datetime.fromisoformat(info['last_sync']) if info.get('last_sync') else None,
+            datetime.fromisoformat(info['last_full_sync']) if info.get('last_full_sync') else None
+        )
+
+    created_at = datetime.fromisoformat(manifest['created_at'])
+    if max_age_minutes is not None and datetime.now() - created_at > timedelta(minutes=max_age_minutes):
+        logger.info(f"Snapshot {manifest['snapshot_id']} expirado, se usará solo para sincronizar")
+        return None
+
+    logger.info(f"Snapshot {manifest['snapshot_id']} cargado desde disco")
+    return (
+        frames.get('orocolombia', pd.DataFrame()),
+        frames.get('grupofelmel', pd.DataFrame()),
+        frames.get(NEW_PRODUCTS_FRAME, pd.DataFrame())
+    )
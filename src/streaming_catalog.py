@@ -0,0 +1,134 @@
+"""
+Construcción del catálogo a medida que llegan las páginas de la API
+
+En lugar de juntar todo el JSON de una tienda y normalizarlo al final, cada
+página (o lote de páginas consecutivas) se normaliza en cuanto llega, se guarda
+como un bloque compacto y su JSON se suelta. Así el pico de memoria queda en el
+tamaño de un lote y las primeras filas están disponibles antes de que termine la
+descarga.
+"""
+import logging
+from typing import List, Dict, Any, Callable, Optional
+import pandas as pd
+
+from normalizer import to_catalog_schema
+
+logger = logging.getLogger(__name__)
+
+# Productos por lote: normalizar menos de unas mil filas a la vez cuesta más en
+# sobrecarga de pandas de lo que se gana (una página de 100 tarda casi lo mismo que 1000)
+DEFAULT_BATCH_SIZE = 2_000
+
+class StreamingCatalogBuilder:
+    """Catálogo compacto de una tienda armado página a página"""
+
+    def __init__(self, source_name: str, per_page: int,
+                 normalize: Callable[[List[Dict[str, Any]], int], pd.DataFrame],
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 page_callback: Optional[Callable[[str, List[Dict[str, Any]]], None]] = None,
+                 chunk_callback: Optional[Callable[[str, pd.DataFrame], None]] = None,
+                 start_index: int = 0):
+        """
+        Args:
+            source_name: Nombre de la tienda
+            per_page: Productos por página (para el índice del primer producto de cada página)
+            normalize: Función (productos, índice del primero) que devuelve el bloque compacto
+            batch_size: Productos a juntar antes de normalizar (0 normaliza cada página
+                al llegar). Los lotes solo unen páginas consecutivas, así que una página
+                que llega antes de tiempo espera a las anteriores. La primera página se
+                normaliza sola, para tener filas cuanto antes.
+            page_callback: Función (source_name, productos) llamada con el JSON de cada
+                página antes de soltarlo (p. ej. para el almacén de productos originales)
+            chunk_callback: Función (source_name, bloque) llamada con cada bloque normalizado
+            start_index: Índice del primer producto de la página 1 (una sincronización
+                incremental empieza después de los índices del catálogo existente)
+        """
+        self.source_name = source_name
+        self.per_page = per_page
+        self.normalize = normalize
+        self.batch_size = batch_size
+        self.page_callback = page_callback
+        self.chunk_callback = chunk_callback
+        self.start_index = start_index
+
+        self.error: Optional[Exception] = None
+        self.rows = 0
+        self._chunks: Dict[int, pd.DataFrame] = {}
+        self._pending: Dict[int, List[Dict[str, Any]]] = {}
+        self._next_page = 1
+
+    def add_page(self, page: int, products: List[Dict[str, Any]]):
+        """
+        Incorporar una página descargada
+
+        Un error al procesar la deja registrada en self.error (build() la lanza) y
+        las páginas siguientes se ignoran, sin interrumpir la descarga de otras tiendas.
+
+        Args:
+            page: Número de página
+            products: Productos raw de la página
+        """
+        if self.error is not None:
+            return
+        try:
+            if self.page_callback:
+                self.page_callback(self.source_name, products)
+            if self.batch_size <= 0:
+                self._add_chunk(page, products)
+            else:
+                self._pending[page] = products
+                self._flush()
+        except Exception as e:
+            logger.error(f"Error procesando la página {page} de {self.source_name}: {str(e)}")
+            self.error = e
+            self._pending.clear()
+
+    def _flush(self, final: bool = False):
+        """Normalizar los lotes de páginas consecutivas pendientes"""
+        while self._pending:
+            if self._next_page not in self._pending:
+                if not final:
+                    return
+                # Al terminar, saltar las páginas que no llegaron
+                self._next_page = min(self._pending)
+
+            first = page = self._next_page
+            count = 0
+            while page in self._pending:
+                count += len(self._pending[page])
+                page += 1
+            if count < self.batch_size and not final and self._chunks:
+                return
+
+            products = [product for batch_page in range(first, page) for product in self._pending.pop(batch_page)]
+            self._add_chunk(first, products)
+            self._next_page = page
+
+    def _add_chunk(self, page: int, products: List[Dict[str, Any]]):
+        if not products:
+            return
+        chunk = self.normalize(products, self.start_index + (page - 1) * self.per_page)
+        self._chunks[page] = chunk
+        self.rows += len(chunk)
+        if self.chunk_callback:
+            self.chunk_callback(self.source_name, chunk)
+
+    def build(self) -> pd.DataFrame:
+        """
+        Catálogo completo con los bloques en orden de página
+
+        Returns:
+            Catálogo compacto (vacío si no llegó ninguna página)
+        """
+        self._flush(final=True)
+        if self.error is not None:
+            raise self.error
+        if not self._chunks:
+            return self.normalize([], 0)
+
+        # Las categorías de cada bloque difieren: concat las deja como object y
+        # to_catalog_schema las vuelve a convertir
+        df = pd.concat([self._chunks[page] for page in sorted(self._chunks)], ignore_index=True)
+        self._chunks.clear()
+        logger.info(f"{self.source_name}: catálogo armado con {len(df)} filas")
+        return to_catalog_schema(df)
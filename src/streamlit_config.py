@@ -2,6 +2,7 @@
 Configuración específica para Streamlit Cloud
 """
 import os
+import threading
 import streamlit as st
 from dotenv import load_dotenv
 
@@ -24,8 +25,19 @@ def get_secret(key, default=None):
         # Si todo falla, usar variables de entorno
         return os.getenv(key, default)
 
+def get_bool_secret(key, default=False):
+    """
+    Obtener un secreto booleano ('true'/'false', '1'/'0', 'sí'/'no')
+    """
+    return str(get_secret(key, default)).strip().lower() in ('1', 'true', 'yes', 'si', 'sí')
+
 class StreamlitConfig:
-    """Configuración optimizada para Streamlit Cloud"""
+    """
+    Configuración optimizada para Streamlit Cloud
+    
+    Los valores se resuelven una vez al construirla y luego es de solo lectura;
+    usar get_config() para obtener la instancia compartida del proceso.
+    """
     
     def __init__(self):
         # APIs
@@ -40,12 +52,52 @@ class StreamlitConfig:
         # Configuración general
         self.PRODUCTS_PER_PAGE = int(get_secret('PRODUCTS_PER_PAGE', 100))
         self.CACHE_DURATION_MINUTES = int(get_secret('CACHE_DURATION_MINUTES', 30))
+        # Recarga del catálogo en segundo plano (0 = solo al pulsar Actualizar)
+        self.REFRESH_INTERVAL_MINUTES = float(get_secret('REFRESH_INTERVAL_MINUTES', self.CACHE_DURATION_MINUTES))
         self.DISCOUNT_PERCENTAGE = int(get_secret('DISCOUNT_PERCENTAGE', 35))
+        # Materiales adicionales para la clasificación ('rodio:Rodio,chapa:Chapa')
+        self.EXTRA_MATERIALS = str(get_secret('EXTRA_MATERIALS', '') or '')
+        
+        # Normalización en varios procesos (0 o 1 = en el proceso del servidor)
+        self.NORMALIZE_WORKERS = int(get_secret('NORMALIZE_WORKERS', 0))
+        self.NORMALIZE_PROCESS_THRESHOLD = int(get_secret('NORMALIZE_PROCESS_THRESHOLD', 50000))
+        
+        # Páginas descargadas en paralelo por tienda (1 = secuencial)
+        self.OROCOLOMBIA_MAX_WORKERS = int(get_secret('OROCOLOMBIA_MAX_WORKERS', 4))
+        self.GRUPOFELMEL_MAX_WORKERS = int(get_secret('GRUPOFELMEL_MAX_WORKERS', 2))
+        
+        # Cliente HTTP: 'sync' (requests + hilos) o 'async' (httpx + asyncio)
+        self.API_CLIENT = str(get_secret('API_CLIENT', 'sync')).lower()
+        self.OROCOLOMBIA_REQUESTS_PER_SECOND = float(get_secret('OROCOLOMBIA_REQUESTS_PER_SECOND', 2))
+        self.GRUPOFELMEL_REQUESTS_PER_SECOND = float(get_secret('GRUPOFELMEL_REQUESTS_PER_SECOND', 1))
+        self.CRAWL_TIMEOUT_SECONDS = int(get_secret('CRAWL_TIMEOUT_SECONDS', 600))
+        
+        # Sincronización incremental (modified_after) con reconciliación completa periódica
+        self.INCREMENTAL_SYNC = get_bool_secret('INCREMENTAL_SYNC', True)
+        self.FULL_SYNC_INTERVAL_HOURS = float(get_secret('FULL_SYNC_INTERVAL_HOURS', 24))
+        
+        # Pedir a la API solo los campos que usa el dashboard (_fields)
+        self.FIELD_PROJECTION = get_bool_secret('FIELD_PROJECTION', True)
+        
+        # Kardex: días de historial completo y frecuencia de compactación
+        self.KARDEX_RETENTION_DAYS = float(get_secret('KARDEX_RETENTION_DAYS', 180))
+        self.KARDEX_COMPACT_INTERVAL_HOURS = float(get_secret('KARDEX_COMPACT_INTERVAL_HOURS', 24))
+        
+        # Historial versionado del catálogo: horas entre versiones y días que se conservan
+        self.HISTORY_INTERVAL_HOURS = float(get_secret('HISTORY_INTERVAL_HOURS', 6))
+        self.HISTORY_RETENTION_DAYS = float(get_secret('HISTORY_RETENTION_DAYS', 90))
         
         # Rutas
         self.EXPORTS_DIR = 'exports'
         self.DATA_DIR = 'data'
         self.CACHE_DIR = 'data/cache'
+        
+        self._frozen = True
+    
+    def __setattr__(self, name, value):
+        if getattr(self, '_frozen', False):
+            raise AttributeError(f"La configuración es de solo lectura ({name}); usa reload_config()")
+        super().__setattr__(name, value)
     
     def validate(self):
         """Validar que todas las variables requeridas estén configuradas"""
@@ -85,4 +137,30 @@ class StreamlitConfig:
             """)
             raise ValueError(f"Variables de entorno faltantes: {', '.join(missing)}")
         
-        return True
\ No newline at end of file
+        return True
+
+_config = None
+_config_lock = threading.Lock()
+
+def get_config() -> StreamlitConfig:
+    """
+    Configuración compartida del proceso, leída de los secretos una sola vez
+    """
+    global _config
+    if _config is None:
+        with _config_lock:
+            if _config is None:
+                _config = StreamlitConfig()
+    return _config
+
+def reload_config() -> StreamlitConfig:
+    """
+    Volver a leer los secretos y reemplazar la configuración compartida
+    
+    Los objetos ya creados conservan la configuración con la que se construyeron.
+    """
+    global _config
+    config = StreamlitConfig()
+    with _config_lock:
+        _config = config
+    return config
@@ -0,0 +1,140 @@
+"""
+Estado de sincronización incremental por tienda
+"""
+import threading
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Margen para no perder productos modificados mientras corría la sincronización anterior
+SYNC_OVERLAP = timedelta(minutes=1)
+
+class StoreSyncState:
+    """Último catálogo procesado de una tienda y marcas de tiempo de sincronización"""
+
+    def __init__(self, source_name: str):
+        self.source_name = source_name
+        self.products: Optional[pd.DataFrame] = None
+        self.last_sync: Optional[datetime] = None
+        self.last_full_sync: Optional[datetime] = None
+        self.lock = threading.Lock()
+
+    def needs_full_sync(self, now: datetime, full_sync_interval_hours: float) -> bool:
+        """
+        Determinar si toca una reconciliación completa
+
+        Args:
+            now: Momento actual (UTC)
+            full_sync_interval_hours: Horas máximas entre descargas completas
+
+        Returns:
+            True si no hay snapshot o la última descarga completa es muy antigua
+        """
+        if self.products is None or self.last_sync is None or self.last_full_sync is None:
+            return True
+        return now - self.last_full_sync >= timedelta(hours=full_sync_interval_hours)
+
+    def incremental_params(self) -> Dict[str, Any]:
+        """Parámetros de WooCommerce para pedir solo lo modificado desde la última sincronización"""
+        since = self.last_sync - SYNC_OVERLAP
+        return {
+            'modified_after': since.strftime('%Y-%m-%dT%H:%M:%S'),
+            'dates_are_gmt': 'true'
+        }
+
+    def restore(self, products: pd.DataFrame, last_sync: Optional[datetime],
+                last_full_sync: Optional[datetime]) -> bool:
+        """
+        Sembrar el estado desde un snapshot persistido (solo si aún no hay datos en memoria)
+
+        Returns:
+            True si se restauró el estado
+        """
+        with self.lock:
+            if self.products is not None:
+                return False
+            self.products = products
+            self.last_sync = last_sync
+            self.last_full_sync = last_full_sync
+            return True
+
+    def apply(self, df: pd.DataFrame, full_sync: bool, complete: bool, started_at: datetime) -> pd.DataFrame:
+        """
+        Incorporar el resultado de una sincronización al snapshot
+
+        Una descarga completa reemplaza el snapshot (así desaparecen los productos
+        eliminados); una incremental, o una completa que perdió páginas, se fusiona
+        por id de producto. Las marcas de tiempo solo avanzan si la descarga terminó
+        sin errores.
+
+        Args:
+            df: Productos procesados recibidos
+            full_sync: Si fue una descarga completa
+            complete: Si la descarga terminó sin perder páginas
+            started_at: Momento (UTC) en que empezó la descarga
+
+        Returns:
+            Snapshot actualizado de la tienda
+        """
+        with self.lock:
+            if full_sync and (complete or self.products is None):
+                self.products = df
+            else:
+                self.products = merge_products(self.products, df)
+
+            if complete:
+                self.last_sync = started_at
+                if full_sync:
+                    self.last_full_sync = started_at
+
+            return self.products
+
+def merge_products(snapshot: Optional[pd.DataFrame], updates: pd.DataFrame) -> pd.DataFrame:
+    """
+    Fusionar productos actualizados en un snapshot usando el id de producto
+
+    Args:
+        snapshot: Catálogo anterior (puede ser None o vacío)
+        updates: Productos nuevos o modificados
+
+    Returns:
+        Catálogo fusionado, ordenado por fecha de modificación descendente
+    """
+    if snapshot is None or snapshot.empty:
+        return updates.reset_index(drop=True)
+    if updates.empty:
+        return snapshot
+
+    kept = snapshot[~snapshot['id'].isin(updates['id'])]
+    merged = pd.concat([updates, kept], ignore_index=True)
+    
+    # concat convierte a object las categorías que no coinciden: recuperarlas
+    for column, dtype in snapshot.dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype) and column in merged.columns and merged[column].dtype != dtype:
+            merged[column] = merged[column].astype('category')
+
+    if 'date_modified' in merged.columns:
+        try:
+            merged = merged.sort_values('date_modified', ascending=False, kind='stable', ignore_index=True)
+        except TypeError:
+            # Fechas con y sin zona horaria mezcladas: conservar el orden de llegada
+            logger.warning("No se pudo ordenar el catálogo fusionado por fecha")
+
+    return merged
+
+_states: Dict[str, StoreSyncState] = {}
+_states_lock = threading.Lock()
+
+def get_sync_state(source_name: str) -> StoreSyncState:
+    """Obtener (o crear) el estado de sincronización compartido de una tienda"""
+    with _states_lock:
+        if source_name not in _states:
+            _states[source_name] = StoreSyncState(source_name)
+        return _states[source_name]
+
+def utc_now() -> datetime:
+    """Momento actual en UTC, sin zona horaria (como lo espera WooCommerce con dates_are_gmt)"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
@@ -0,0 +1,39 @@
+"""
+Configuración compartida de las pruebas
+
+Los módulos de src se importan por nombre (como lo hace la app al correr
+desde src/). streamlit_config lee st.secrets al importarse, así que se apunta
+Streamlit a un secrets.toml vacío: la configuración sale de las variables de
+entorno de cada prueba.
+"""
+import os
+import sys
+import atexit
+import shutil
+import tempfile
+
+import pytest
+from streamlit import config as streamlit_config
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+_secrets_dir = tempfile.mkdtemp(prefix='tests-secrets-')
+_secrets_file = os.path.join(_secrets_dir, 'secrets.toml')
+open(_secrets_file, 'w').close()
+streamlit_config.set_option('secrets.files', [_secrets_file])
+atexit.register(shutil.rmtree, _secrets_dir, ignore_errors=True)
+
+from streamlit_config import StreamlitConfig
+
+PRODUCTS_PER_PAGE = 10
+
+@pytest.fixture
+def config(monkeypatch, tmp_path):
+    """Configuración con dos tiendas ficticias; los datos quedan en tmp_path"""
+    for name in ('OROCOLOMBIA', 'GRUPOFELMEL'):
+        monkeypatch.setenv(f'{name}_URL', f'https://{name.lower()}.test/wp-json/wc/v3/products')
+        monkeypatch.setenv(f'{name}_CONSUMER_KEY', 'ck')
+        monkeypatch.setenv(f'{name}_CONSUMER_SECRET', 'cs')
+    monkeypatch.setenv('PRODUCTS_PER_PAGE', str(PRODUCTS_PER_PAGE))
+    monkeypatch.chdir(tmp_path)
+    return StreamlitConfig()
@@ -0,0 +1,288 @@
+"""
+Pruebas del cliente asyncio de WooCommerce contra una tienda simulada
+
+Las pruebas del cliente usan un httpx.MockTransport; la comparación con el
+camino sync levanta un servidor http.server en un hilo porque ProductManager
+arma sus propios clientes a partir de las URLs de la configuración.
+"""
+import asyncio
+import functools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+import pandas as pd
+import pytest
+
+from async_api_connector import AsyncTokenBucket, AsyncWooCommerceAPI
+from streamlit_config import StreamlitConfig
+from conftest import PRODUCTS_PER_PAGE as PER_PAGE
+
+CATEGORIES = ['Anillos', 'Aretes', 'Anillos de Compromiso', 'Cadenas']
+
+def make_products(size: int, prefix: str = 'SKU') -> list:
+    """Productos con la forma de la API de WooCommerce"""
+    return [
+        {
+            'id': i + 1,
+            'sku': f'{prefix}{i:05d}',
+            'name': f'Anillo {i}',
+            'slug': f'anillo-{i}',
+            'permalink': f'https://tienda.test/p/{i}',
+            'price': str(1000 + i) if i % 7 else '',
+            'regular_price': str(1200 + i),
+            'sale_price': '',
+            'stock_quantity': i % 5,
+            'status': 'publish',
+            'date_modified': f'2025-05-{i % 28 + 1:02d}T10:{i % 60:02d}:00',
+            'categories': [{'id': i % 4, 'name': CATEGORIES[i % 4]}],
+            'attributes': [{'name': 'Material', 'options': ['Oro 18k']}] if i % 3 == 0 else [],
+            'description': '<p>Pieza en plata</p>' if i % 2 else '<p>acero</p>',
+            'short_description': '',
+            'images': [{'src': f'https://tienda.test/img/{i}.jpg'}] if i % 4 else [],
+            'tags': [{'name': 'oferta'}],
+            'type': 'simple',
+            'featured': False,
+        }
+        for i in range(size)
+    ]
+
+def page_of(products: list, params) -> tuple:
+    """Cuerpo y cabeceras de paginación de una página, como los envía WooCommerce"""
+    page = int(params.get('page', 1))
+    per_page = int(params.get('per_page', 10))
+    chunk = products[(page - 1) * per_page:page * per_page]
+    if params.get('_fields'):
+        fields = params['_fields'].split(',')
+        chunk = [{key: value for key, value in product.items() if key in fields} for product in chunk]
+    headers = {
+        'X-WP-Total': str(len(products)),
+        'X-WP-TotalPages': str(-(-len(products) // per_page)),
+    }
+    return json.dumps(chunk).encode(), headers
+
+class MockStore:
+    """Tienda simulada para httpx.MockTransport, con páginas lentas o con error"""
+
+    def __init__(self, products: list, delay: float = 0.0, slow_pages=(), failing_pages=(),
+                 slow_delay: float = 5.0):
+        self.products = products
+        self.delay = delay
+        self.slow_pages = set(slow_pages)
+        self.failing_pages = set(failing_pages)
+        self.slow_delay = slow_delay
+        self.requested = []
+        self.cancelled = []
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        params = dict(request.url.params)
+        page = int(params.get('page', 1))
+        self.requested.append((page, time.monotonic()))
+        try:
+            await asyncio.sleep(self.slow_delay if page in self.slow_pages else self.delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(page)
+            raise
+        if page in self.failing_pages:
+            return httpx.Response(500, json={'code': 'error'})
+        body, headers = page_of(self.products, params)
+        return httpx.Response(200, content=body, headers=headers)
+
+def make_api(config, store: MockStore, **kwargs) -> AsyncWooCommerceAPI:
+    api = AsyncWooCommerceAPI(config.OROCOLOMBIA_URL, 'ck', 'cs', 'OroColmbia', config=config, **kwargs)
+    # Reemplazar el cliente (aún sin usar) por uno sobre la tienda simulada
+    asyncio.run(api.session.aclose())
+    api.session = httpx.AsyncClient(transport=httpx.MockTransport(store))
+    return api
+
+def without_retries(monkeypatch):
+    """Un solo intento por página (evita las esperas de 2 y 4 s entre reintentos)"""
+    monkeypatch.setattr(AsyncWooCommerceAPI, '_get_page_with_retries',
+                        functools.partialmethod(AsyncWooCommerceAPI._get_page_with_retries, max_attempts=1))
+
+async def crawl(api: AsyncWooCommerceAPI, progress_callback=None, max_pages=None) -> list:
+    async with api:
+        return await api.get_all_products(progress_callback, max_pages)
+
+def test_follows_total_pages_header(config):
+    products = make_products(95)
+    store = MockStore(products)
+    api = make_api(config, store, max_workers=4, requests_per_second=1000)
+    progress = []
+
+    result = asyncio.run(crawl(api, lambda *args: progress.append(args)))
+
+    assert [product['id'] for product in result] == [product['id'] for product in products]
+    assert sorted(page for page, _ in store.requested) == list(range(1, 11))
+    assert api.last_crawl_complete
+    assert {args[4] for args in progress} == {10}
+    assert max(args[2] for args in progress) == 95
+
+def test_max_pages_limits_the_crawl(config):
+    store = MockStore(make_products(95))
+    api = make_api(config, store, max_workers=4, requests_per_second=1000)
+
+    result = asyncio.run(crawl(api, max_pages=3))
+
+    assert len(result) == 3 * PER_PAGE
+    assert sorted(page for page, _ in store.requested) == [1, 2, 3]
+
+def test_token_bucket_paces_acquisitions():
+    async def acquire_all(bucket: AsyncTokenBucket, times: int) -> float:
+        start = time.monotonic()
+        for _ in range(times):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    # La primera petición usa la ráfaga; las otras cuatro esperan 1/20 s cada una
+    elapsed = asyncio.run(acquire_all(AsyncTokenBucket(20, capacity=1), 5))
+
+    assert elapsed >= 4 / 20 * 0.9
+
+def test_requests_are_paced_per_store(config):
+    store = MockStore(make_products(80))
+    api = make_api(config, store, max_workers=4, requests_per_second=20)
+
+    asyncio.run(crawl(api))
+
+    # Ráfaga de max_workers peticiones y luego a lo sumo requests_per_second
+    times = sorted(moment for _, moment in store.requested)
+    assert len(times) == 8
+    assert times[-1] - times[0] >= (len(times) - api.max_workers) / 20 * 0.9
+
+def test_request_timeout_drops_the_page(config, monkeypatch):
+    without_retries(monkeypatch)
+    store = MockStore(make_products(50), slow_pages={3})
+    api = make_api(config, store, max_workers=4, requests_per_second=1000, timeout=0.2)
+
+    result = asyncio.run(crawl(api))
+
+    assert len(result) == 40
+    assert 3 in store.cancelled
+    assert not api.last_crawl_complete
+
+def test_crawl_timeout_cancels_pending_pages(config):
+    store = MockStore(make_products(50), slow_pages={4, 5}, slow_delay=30)
+    api = make_api(config, store, max_workers=4, requests_per_second=1000)
+    received = []
+
+    async def consume():
+        async for page, products in api.iter_pages():
+            received.append(page)
+
+    async def run():
+        async with api:
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(consume(), 0.5)
+            # No deben quedar peticiones huérfanas después del timeout
+            return [task for task in asyncio.all_tasks()
+                    if task is not asyncio.current_task() and not task.done()]
+
+    start = time.monotonic()
+    leftover = asyncio.run(run())
+
+    assert time.monotonic() - start < 5
+    assert sorted(received) == [1, 2, 3]
+    assert sorted(store.cancelled) == [4, 5]
+    assert leftover == []
+
+def test_failed_page_reports_partial_crawl(config, monkeypatch):
+    without_retries(monkeypatch)
+    store = MockStore(make_products(50), failing_pages={2})
+    api = make_api(config, store, max_workers=2, requests_per_second=1000)
+    progress = []
+
+    result = asyncio.run(crawl(api, lambda *args: progress.append(args)))
+
+    assert len(result) == 40
+    assert not api.last_crawl_complete
+    assert sorted(args[1] for args in progress) == [1, 3, 4, 5]
+
+def test_failed_first_page_reports_partial_crawl(config, monkeypatch):
+    without_retries(monkeypatch)
+    api = make_api(config, MockStore(make_products(50), failing_pages={1}), requests_per_second=1000)
+
+    assert asyncio.run(crawl(api)) == []
+    assert not api.last_crawl_complete
+
+class StoreHandler(BaseHTTPRequestHandler):
+    """Handler de http.server para una tienda (products se define por servidor)"""
+    products: list = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        params = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+        body, headers = page_of(self.products, params)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+@pytest.fixture
+def stores(monkeypatch, tmp_path):
+    """Dos tiendas en http.server y la configuración que apunta a ellas"""
+    catalogs = {
+        'OROCOLOMBIA': make_products(45, prefix='ORO'),
+        # GrupoFelmel comparte parte de los SKUs con OroColmbia
+        'GRUPOFELMEL': make_products(20, prefix='ORO') + make_products(15, prefix='FEL'),
+    }
+    servers = []
+    for name, products in catalogs.items():
+        server = ThreadingHTTPServer(('127.0.0.1', 0), type('Handler', (StoreHandler,), {'products': products}))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        monkeypatch.setenv(f'{name}_URL', f'http://127.0.0.1:{server.server_address[1]}/wp-json/wc/v3/products')
+        monkeypatch.setenv(f'{name}_CONSUMER_KEY', 'ck')
+        monkeypatch.setenv(f'{name}_CONSUMER_SECRET', 'cs')
+        monkeypatch.setenv(f'{name}_REQUESTS_PER_SECOND', '1000')
+    monkeypatch.setenv('PRODUCTS_PER_PAGE', str(PER_PAGE))
+    monkeypatch.chdir(tmp_path)
+    yield StreamlitConfig()
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+def test_product_manager_async_matches_sync(stores):
+    from api_connector import ProductManager
+
+    frames = {}
+    for client in ('sync', 'async'):
+        manager = ProductManager(api_client=client, config=stores)
+        frames[client] = manager.fetch_all_products(incremental=False)
+
+    for sync_frame, async_frame in zip(frames['sync'], frames['async']):
+        assert len(sync_frame) > 0
+        pd.testing.assert_frame_equal(async_frame.sort_values('id').reset_index(drop=True),
+                                      sync_frame.sort_values('id').reset_index(drop=True))
+
+class RecordingBuilder:
+    """Builder que solo registra en qué hilo recibe cada página"""
+
+    def __init__(self):
+        self.pages = []
+        self.threads = []
+
+    def add_page(self, page, products):
+        self.pages.append(page)
+        self.threads.append(threading.get_ident())
+
+def test_pages_are_normalized_off_the_event_loop(stores):
+    from api_connector import ProductManager
+
+    manager = ProductManager(api_client='async', config=stores)
+    builders = {api.source_name: RecordingBuilder() for api in (manager.orocolombia_api, manager.grupofelmel_api)}
+
+    completed = asyncio.run(manager._fetch_stores_async(builders))
+
+    assert all(completed.values())
+    for builder in builders.values():
+        assert builder.pages
+        assert threading.get_ident() not in builder.threads
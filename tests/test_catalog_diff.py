@@ -0,0 +1,275 @@
+"""
+Pruebas del índice de diferencias entre catálogos
+
+Los productos nuevos deben ser exactamente los de find_new_products antes del
+índice (legacy_find_new_products, copiada de esa versión), y una sincronización
+incremental debe dejar las mismas clases que una descarga completa. Los cambios
+de precio y stock son de cada tienda respecto de la sincronización anterior.
+"""
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from catalog_diff import (CatalogDiff, COMPACT_RATIO, DIFF_CLASSES, MISSING, NEW,
+                          PRICE_CHANGED, STOCK_CHANGED, UNCHANGED)
+from normalizer import to_catalog_schema
+from sync_state import merge_products
+
+def legacy_find_new_products(df_orocolombia: pd.DataFrame, df_grupofelmel) -> pd.DataFrame:
+    """find_new_products tal como estaba antes del índice de diferencias"""
+    if df_orocolombia.empty:
+        return pd.DataFrame()
+    if isinstance(df_grupofelmel, (set, frozenset)):
+        grupofelmel_skus = df_grupofelmel
+    elif df_grupofelmel.empty:
+        grupofelmel_skus = set()
+    else:
+        grupofelmel_skus = set(df_grupofelmel['sku'].dropna().unique())
+
+    valid_orocolombia = df_orocolombia[
+        (df_orocolombia['sku'].notna()) &
+        (df_orocolombia['sku'] != '') &
+        (~df_orocolombia['sku'].str.startswith('PROD-')) &
+        (~df_orocolombia['sku'].str.startswith('ERROR-')) &
+        (df_orocolombia['price'] > 0) &
+        (df_orocolombia['stock'] > 0)
+    ].copy()
+    new_products = valid_orocolombia[~valid_orocolombia['sku'].isin(grupofelmel_skus)].copy()
+    if not new_products.empty:
+        return new_products.sort_values('date_modified', ascending=False)
+    return pd.DataFrame()
+
+def supplier(rows: list) -> pd.DataFrame:
+    """Catálogo del proveedor en el esquema compacto: (id, sku, precio, stock, fecha)"""
+    df = pd.DataFrame(rows, columns=['id', 'sku', 'price', 'stock', 'date_modified'])
+    df['date_modified'] = pd.to_datetime(df['date_modified'])
+    df['name'] = 'Producto ' + df['id']
+    df['categories'] = 'Anillos'
+    return to_catalog_schema(df)
+
+def retailer(rows: list) -> pd.DataFrame:
+    """Catálogo propio con precio y stock (id, sku, precio, stock)"""
+    return pd.DataFrame(rows, columns=['id', 'sku', 'price', 'stock'])
+
+EDGE_CASES = supplier([
+    ('1', 'A-1', 100.0, 3, '2025-01-03'),
+    ('2', '', 100.0, 3, '2025-01-04'),
+    ('3', 'PROD-3', 100.0, 3, '2025-01-05'),
+    ('4', 'ERROR-4', 0.0, 0, '2025-01-06'),
+    ('5', 'A-5', 0.0, 3, '2025-01-07'),
+    ('6', 'A-6', 100.0, 0, '2025-01-08'),
+    ('7', 'A-7', 100.0, 2, '2025-01-02'),
+    ('8', 'A-7', 100.0, 0, '2025-01-09'),
+    ('9', 'A-9', 50.0, 1, '2025-01-03'),
+    ('10', 'A-10', 75.0, 4, '2025-01-01'),
+    ('11', 'A-11', 60.0, 1, '2025-01-10'),
+    ('12', 'A-11', 65.0, 2, '2025-01-11'),
+])
+
+def synthetic_catalogs(size: int, seed: int = 3) -> tuple:
+    """Proveedor con SKUs repetidos y vacíos y catálogo propio con parte de sus SKUs"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(size):
+        sku = rng.choice([f'S-{i}', f'S-{i}', f'S-{i}', f'S-{i // 2}', '', 'PROD-x'])
+        rows.append((str(i), sku, rng.choice([0.0, 10.0, 99.5]), rng.choice([0, 1, 7]),
+                     f'2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}'))
+    listed = [(str(100_000 + i), sku, price, stock + (rng.random() < 0.1))
+              for i, (_, sku, price, stock, _) in enumerate(rows) if sku and rng.random() < 0.6]
+    listed += [(str(200_000 + i), f'RETIRADO-{i}', 5.0, 1) for i in range(size // 50)]
+    # Como lo entrega la API (orderby=modified, order=desc)
+    rows.sort(key=lambda row: row[4], reverse=True)
+    return supplier(rows), retailer(listed)
+
+def class_rows(diff: CatalogDiff) -> dict:
+    """Clases comparables entre índices (ids de las filas, sin depender del orden)"""
+    result = {}
+    for kind in DIFF_CLASSES:
+        frame = diff.frame(kind)
+        result[kind] = sorted(map(str, frame['id'])) if not frame.empty else []
+    return result
+
+def full_syncs(*catalogs: tuple) -> CatalogDiff:
+    """Índice tras una descarga completa por cada (proveedor, propio)"""
+    diff = CatalogDiff()
+    for supplier_df, retailer_df in catalogs:
+        diff.rebuild(supplier_df, retailer_df)
+    return diff
+
+def by_id(df: pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values('id').reset_index(drop=True)
+
+REFERENCES = {
+    'dataframe': retailer([(1, 'A-9', 50.0, 1), (2, 'Z-1', 10.0, 1)]),
+    'empty_dataframe': pd.DataFrame(),
+    'sku_set': frozenset({'A-1', 'A-7'}),
+    'empty_set': frozenset(),
+    'nan_and_blank_skus': retailer([(1, None, 1.0, 1), (2, '', 1.0, 1), (3, np.nan, 1.0, 1), (4, 'A-1', 100.0, 3)]),
+}
+
+@pytest.mark.parametrize('reference', REFERENCES.values(), ids=REFERENCES.keys())
+def test_new_products_match_baseline(reference):
+    diff = CatalogDiff()
+    diff.rebuild(EDGE_CASES, reference)
+
+    pd.testing.assert_frame_equal(diff.frame(NEW), legacy_find_new_products(EDGE_CASES, reference))
+
+def test_empty_supplier_has_no_new_products():
+    diff = CatalogDiff()
+    diff.rebuild(EDGE_CASES.iloc[:0], REFERENCES['dataframe'])
+
+    assert diff.frame(NEW).empty
+    assert diff.skus(MISSING) == {'A-9', 'Z-1'}
+
+def test_duplicate_skus_keep_every_row_with_stock():
+    diff = CatalogDiff()
+    diff.rebuild(EDGE_CASES, frozenset())
+
+    new = diff.frame(NEW)
+    # A-7 solo con la fila que tiene stock; A-11 con sus dos filas
+    assert sorted(new.loc[new['sku'] == 'A-7', 'id']) == ['7']
+    assert sorted(new.loc[new['sku'] == 'A-11', 'id']) == ['11', '12']
+
+def test_blank_and_placeholder_skus_are_never_classified():
+    df = supplier([('1', '', 10.0, 1, '2025-01-01'), ('2', 'PROD-2', 10.0, 1, '2025-01-01'),
+                   ('3', 'ERROR-3', 10.0, 1, '2025-01-01'), ('4', None, 10.0, 1, '2025-01-01')])
+    diff = CatalogDiff()
+    diff.rebuild(df, REFERENCES['nan_and_blank_skus'])
+
+    assert diff.frame(NEW).empty
+    assert diff.skus(MISSING) == {'A-1'}
+    assert sum(diff.counts().values()) == 1
+
+def test_synthetic_catalog_matches_baseline():
+    supplier_df, retailer_df = synthetic_catalogs(5_000)
+    diff = CatalogDiff()
+    diff.rebuild(supplier_df, retailer_df)
+
+    pd.testing.assert_frame_equal(diff.frame(NEW), legacy_find_new_products(supplier_df, retailer_df))
+
+def test_product_manager_find_new_products_matches_baseline(config):
+    from api_connector import ProductManager
+
+    manager = ProductManager(config=config)
+    for reference in REFERENCES.values():
+        pd.testing.assert_frame_equal(manager.find_new_products(EDGE_CASES, reference),
+                                      legacy_find_new_products(EDGE_CASES, reference))
+
+def test_different_prices_between_stores_are_not_changes():
+    df = supplier([('1', 'P-1', 100.0, 3, '2025-01-01')])
+    # GrupoFelmel vende el mismo SKU a su propio precio y con su propio stock
+    listed = retailer([(10, 'P-1', 180.0, 1)])
+
+    diff = full_syncs((df, listed), (df, listed))
+
+    assert diff.status('P-1') == UNCHANGED
+
+def test_price_only_and_stock_only_changes():
+    before = supplier([('1', 'P-1', 100.0, 3, '2025-01-01'), ('2', 'S-2', 50.0, 4, '2025-01-02'),
+                       ('3', 'U-3', 20.0, 1, '2025-01-03'), ('4', 'B-4', 30.0, 2, '2025-01-04'),
+                       ('5', 'R-5', 40.0, 2, '2025-01-05')])
+    listed = retailer([(10, 'P-1', 150.0, 3), (11, 'S-2', 70.0, 9), (12, 'U-3', 25.0, 1),
+                       (13, 'B-4', 31.0, 5), (14, 'R-5', 60.0, 2)])
+    after = supplier([('1', 'P-1', 120.0, 3, '2025-01-01'), ('2', 'S-2', 50.0, 5, '2025-01-02'),
+                      ('3', 'U-3', 20.0, 1, '2025-01-03'), ('4', 'B-4', 35.0, 1, '2025-01-04'),
+                      ('5', 'R-5', 40.0, 2, '2025-01-05')])
+    listed_after = retailer([(10, 'P-1', 150.0, 3), (11, 'S-2', 70.0, 9), (12, 'U-3', 25.0, 1),
+                             (13, 'B-4', 31.0, 5), (14, 'R-5', 65.0, 2)])
+
+    first = full_syncs((before, listed))
+    assert {first.status(sku) for sku in ('P-1', 'S-2', 'U-3', 'B-4', 'R-5')} == {UNCHANGED}
+
+    diff = full_syncs((before, listed), (after, listed_after))
+    assert diff.status('P-1') == PRICE_CHANGED
+    assert diff.status('S-2') == STOCK_CHANGED
+    assert diff.status('U-3') == UNCHANGED
+    # Si cambian ambos cuenta como cambio de precio
+    assert diff.status('B-4') == PRICE_CHANGED
+    # También cuenta el cambio de precio de la tienda propia
+    assert diff.status('R-5') == PRICE_CHANGED
+    changed = diff.frame(PRICE_CHANGED).set_index('sku')
+    assert changed.loc['P-1', 'retailer_price'] == 150.0
+
+    # Sin cambios en la siguiente sincronización vuelven a UNCHANGED
+    diff.rebuild(after, listed_after)
+    assert diff.counts()[PRICE_CHANGED] == diff.counts()[STOCK_CHANGED] == 0
+
+def test_sku_only_reference_compares_only_the_supplier():
+    before = supplier([('1', 'P-1', 100.0, 3, '2025-01-01'), ('2', 'U-2', 50.0, 4, '2025-01-02')])
+    after = supplier([('1', 'P-1', 110.0, 3, '2025-01-01'), ('2', 'U-2', 50.0, 4, '2025-01-02')])
+
+    diff = full_syncs((before, frozenset({'P-1', 'U-2'})), (after, frozenset({'P-1', 'U-2'})))
+
+    assert diff.status('P-1') == PRICE_CHANGED
+    assert diff.status('U-2') == UNCHANGED
+
+def test_incremental_price_and_stock_changes_match_rebuild():
+    df = supplier([('1', 'P-1', 100.0, 3, '2025-01-01'), ('2', 'S-2', 50.0, 4, '2025-01-02'),
+                   ('3', 'U-3', 20.0, 1, '2025-01-03')] +
+                  [(str(i), f'X-{i}', 10.0, 1, '2025-01-01') for i in range(4, 40)])
+    listed = retailer([(10, 'P-1', 100.0, 3), (11, 'S-2', 50.0, 4), (12, 'U-3', 20.0, 1)])
+    diff = CatalogDiff()
+    diff.rebuild(df, listed)
+    assert diff.status('P-1') == diff.status('S-2') == UNCHANGED
+
+    supplier_changes = supplier([('1', 'P-1', 110.0, 3, '2025-02-01'), ('2', 'S-2', 50.0, 8, '2025-02-01')])
+    retailer_changes = retailer([(12, 'U-3', 20.0, 0)])
+    supplier_after = merge_products(df, supplier_changes)
+    retailer_after = merge_products(listed, retailer_changes)
+    diff.update(supplier_after, retailer_after, supplier_changes, retailer_changes)
+
+    assert len(diff._parts) == 2
+    assert diff.status('P-1') == PRICE_CHANGED
+    assert diff.status('S-2') == STOCK_CHANGED
+    assert diff.status('U-3') == STOCK_CHANGED
+    assert class_rows(diff) == class_rows(full_syncs((df, listed), (supplier_after, retailer_after)))
+
+    # Una sincronización que no los toca los deja sin cambios
+    unrelated = supplier([('4', 'X-4', 10.0, 1, '2025-03-01')])
+    diff.update(merge_products(supplier_after, unrelated), retailer_after, unrelated, retailer_after.iloc[:0])
+    assert diff.status('P-1') == diff.status('S-2') == diff.status('U-3') == UNCHANGED
+
+def test_patches_compact_after_ratio():
+    supplier_df, retailer_df = synthetic_catalogs(400)
+    diff = CatalogDiff()
+    diff.rebuild(supplier_df, retailer_df)
+    rng = random.Random(11)
+    step = int(COMPACT_RATIO * len(supplier_df)) // 3
+
+    current = supplier_df
+    previous = supplier_df
+    parts = []
+    for round_number in range(4):
+        ids = rng.sample(list(current['id']), step)
+        changes = current[current['id'].isin(ids)].copy()
+        changes['stock'] = (changes['stock'] + 1 + round_number).astype(changes['stock'].dtype)
+        changes['date_modified'] = pd.Timestamp('2026-01-01') + pd.Timedelta(days=round_number)
+        changes = changes.reset_index(drop=True)
+        current = merge_products(current, changes)
+        diff.update(current, retailer_df, changes, retailer_df.iloc[:0])
+        parts.append(len(diff._parts))
+
+        rebuilt = full_syncs((previous, retailer_df), (current, retailer_df))
+        previous = current
+        assert diff.counts()[STOCK_CHANGED] > 0
+        assert diff.counts() == rebuilt.counts()
+        assert class_rows(diff) == class_rows(rebuilt)
+        # Las filas recibidas en una ronda comparten fecha: comparar sin el orden de los empates
+        pd.testing.assert_frame_equal(by_id(diff.frame(NEW)), by_id(legacy_find_new_products(current, retailer_df)),
+                                      check_categorical=False)
+
+    # Tres parches caben en COMPACT_RATIO del base; el cuarto reconstruye el índice
+    assert parts == [2, 3, 4, 1]
+
+def test_full_sync_always_rebuilds():
+    supplier_df, retailer_df = synthetic_catalogs(200)
+    diff = CatalogDiff()
+    diff.rebuild(supplier_df, retailer_df)
+    diff.update(supplier_df.iloc[:100], retailer_df)
+
+    rebuilt = CatalogDiff()
+    rebuilt.rebuild(supplier_df.iloc[:100], retailer_df)
+    assert len(diff._parts) == 1
+    assert class_rows(diff) == class_rows(rebuilt)
@@ -0,0 +1,189 @@
+"""
+Pruebas del historial versionado del catálogo
+
+Guarda varias versiones diarias de un catálogo sintético y comprueba que as_of
+devuelve la versión vigente en cada momento, que scan con filtros (aplicados en
+Arrow) devuelve las mismas filas que filtrar en pandas y que los productos
+nuevos entre fechas coinciden con find_new_products sobre los catálogos de
+esas fechas.
+"""
+import random
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from api_connector import ProductManager, build_reference_frame
+from catalog_history import CatalogHistory, catalog_filter, get_catalog_history
+from category_facets import split_category_list
+from normalizer import normalize_products, to_catalog_schema
+
+ORO = 'OroColmbia'
+FELMEL = 'GrupoFelmel'
+DAYS = 4
+START_AT = datetime(2026, 3, 1, 8)
+CATEGORIES = [['Anillos'], ['Anillos de Compromiso'], ['Anillos', 'Oferta'], ['Aretes'], [],
+              ['Aretes, Topos', 'Oferta']]
+FILTERS = {'categories': ('Anillos',), 'max_price': 60_000.0, 'min_stock': 2, 'search': 'producto 1'}
+
+def make_product(i: int, rng: random.Random) -> dict:
+    return {
+        'id': i + 1,
+        'sku': f'SKU-{i}' if i % 13 else '',
+        'name': f'Producto {i}',
+        'price': str(rng.randint(1, 100) * 1000),
+        'stock_quantity': rng.choice([0, 1, 3, 8]),
+        'date_modified': f'2026-02-{i % 28 + 1:02d}T10:{i % 60:02d}:00',
+        'categories': [{'id': n, 'name': name} for n, name in enumerate(CATEGORIES[i % len(CATEGORIES)])],
+        'description': rng.choice(['oro', 'plata']),
+    }
+
+def pandas_filter(df: pd.DataFrame, categories=(), max_price=None, min_stock=0, search=None) -> pd.DataFrame:
+    """Los filtros de las páginas de productos, en pandas"""
+    df = df[df['category_list'].map(lambda value: set(categories) <= set(split_category_list(value))).astype(bool)]
+    if max_price is not None:
+        df = df[df['price'] <= max_price]
+    df = df[df['stock'] >= min_stock]
+    if search:
+        df = df[df['name'].str.contains(search, case=False, regex=False)
+                | df['sku'].str.contains(search, case=False, regex=False)]
+    return df
+
+def comparable(df: pd.DataFrame) -> pd.DataFrame:
+    """Mismas filas sin depender del orden entre fechas iguales, del índice ni del tipo de id"""
+    df = df.assign(id=df['id'].astype(str), categories=df['categories'].astype(str))
+    if 'category_list' in df.columns:
+        df = df.assign(category_list=df['category_list'].astype(str))
+    return df.sort_values(['sku', 'id']).reset_index(drop=True)
+
+@pytest.fixture
+def versions(tmp_path):
+    """Historial con DAYS versiones por tienda y los catálogos de cada día"""
+    rng = random.Random(13)
+    history = CatalogHistory(str(tmp_path / 'history'))
+    products = [make_product(i, rng) for i in range(400)]
+    catalogs = []
+    for day in range(DAYS):
+        moment = START_AT + timedelta(days=day)
+        # Cada día el proveedor publica productos nuevos y la tienda lista algunos
+        products = products + [dict(make_product(len(products) + i, rng), sku=f'DIA{day}-{i}') for i in range(30)]
+        oro = to_catalog_schema(normalize_products(products, 35))
+        felmel = build_reference_frame([product for product in products if rng.random() < 0.5])
+        history.append(ORO, oro, moment)
+        history.append(FELMEL, felmel, moment)
+        catalogs.append((moment, oro, felmel))
+    return history, catalogs
+
+def test_as_of_returns_the_version_in_force(versions):
+    history, catalogs = versions
+
+    for moment, oro, _ in catalogs:
+        pd.testing.assert_frame_equal(history.as_of(ORO, moment + timedelta(hours=3)), oro)
+        assert history.version_at(ORO, moment - timedelta(seconds=1)) != history.version_at(ORO, moment)
+    assert history.as_of(ORO, START_AT - timedelta(days=1)) is None
+    assert [version.captured_at for version in history.versions(ORO)] == [moment for moment, _, _ in catalogs]
+    assert history.as_of(ORO, catalogs[-1][0], ['sku'])['sku'].tolist() == catalogs[-1][1]['sku'].tolist()
+
+@pytest.mark.parametrize('filters', [
+    FILTERS,
+    {'categories': ('Anillos', 'Oferta')},
+    {'categories': ('Anillos de Compromiso',)},
+    {'categories': ('Aretes',)},
+    {'categories': ('Aretes, Topos', 'Oferta')},
+    {'search': 'sku-1'},
+    {},
+])
+def test_scan_filters_match_pandas(versions, filters):
+    history, catalogs = versions
+    until, oro, _ = catalogs[-1]
+
+    filtered = history.scan(history.version_at(ORO, until), filter=catalog_filter(**filters))
+
+    pd.testing.assert_frame_equal(comparable(filtered), comparable(pandas_filter(oro, **filters)))
+
+def test_new_products_between_match_find_new_products(versions, config):
+    history, catalogs = versions
+    (since, oro_since, _), (until, oro, felmel) = catalogs[1], catalogs[-1]
+    manager = ProductManager(config=config)
+
+    expected = manager.find_new_products(oro, felmel)
+    pd.testing.assert_frame_equal(comparable(history.new_products_between(ORO, FELMEL, until)),
+                                  comparable(expected))
+
+    expected_since = expected[~expected['sku'].isin(oro_since['sku'])]
+    assert not expected_since.empty
+    pd.testing.assert_frame_equal(comparable(history.new_products_between(ORO, FELMEL, until, since)),
+                                  comparable(expected_since))
+    filters = {'categories': ('Anillos',), 'max_price': 80_000.0, 'min_stock': 3, 'search': 'dia'}
+    expected_filtered = pandas_filter(expected_since, **filters)
+    assert 0 < len(expected_filtered) < len(expected_since)
+    pd.testing.assert_frame_equal(comparable(history.new_products_between(ORO, FELMEL, until, since, **filters)),
+                                  comparable(expected_filtered))
+
+    assert history.new_products_between(ORO, FELMEL, START_AT - timedelta(days=1)) is None
+
+def test_versions_without_category_list_filter_categories(versions, config):
+    history, catalogs = versions
+    until, oro, felmel = catalogs[-1]
+    # Versión guardada antes de category_list, sin nombres que contengan ', '
+    oro = oro[~oro['category_list'].str.contains('Topos')]
+    moment = until + timedelta(days=1)
+    history.append(ORO, oro.drop(columns='category_list'), moment)
+    history.append(FELMEL, felmel, moment)
+    version = history.version_at(ORO, moment)
+
+    assert history.category_column(version) == 'categories'
+    assert history.category_column(history.version_at(ORO, until)) == 'category_list'
+    filters = {'categories': ('Anillos',), 'min_stock': 3}
+    expected = pandas_filter(ProductManager(config=config).find_new_products(oro, felmel), **filters)
+    assert not expected.empty
+    pd.testing.assert_frame_equal(comparable(history.new_products_between(ORO, FELMEL, moment, **filters)),
+                                  comparable(expected.drop(columns='category_list')))
+
+def test_new_products_between_is_cached_per_version(versions):
+    history, catalogs = versions
+    until = catalogs[-1][0]
+
+    first = history.new_products_between(ORO, FELMEL, until, columns=['sku', 'price'])
+    assert history.new_products_between(ORO, FELMEL, until, columns=['sku', 'price']) is first
+
+    history.append(ORO, catalogs[0][1], until + timedelta(minutes=5))
+    assert history.new_products_between(ORO, FELMEL, until + timedelta(hours=1), columns=['sku', 'price']) is not first
+
+def test_product_manager_reads_the_shared_history(versions, config):
+    history, catalogs = versions
+    until = catalogs[-1][0]
+    manager = ProductManager(config=config)
+    manager.catalog_history = history
+
+    pd.testing.assert_frame_equal(manager.find_new_products_between(until),
+                                  history.new_products_between(ORO, FELMEL, until))
+    assert get_catalog_history(config.DATA_DIR) is get_catalog_history(config.DATA_DIR)
+
+def test_append_respects_interval_and_immutability(tmp_path):
+    history = CatalogHistory(str(tmp_path))
+    df = to_catalog_schema(normalize_products([make_product(i, random.Random(i)) for i in range(5)], 35))
+
+    assert history.append(ORO, df, START_AT) is not None
+    assert history.append(ORO, df.iloc[:2], START_AT) is None
+    assert history.append(ORO, df, START_AT + timedelta(hours=1), min_interval_hours=6) is None
+    assert history.append(ORO, df, START_AT + timedelta(hours=7), min_interval_hours=6) is not None
+    assert len(history.as_of(ORO, START_AT)) == 5
+
+def test_object_columns_round_trip_as_json(tmp_path):
+    history = CatalogHistory(str(tmp_path))
+    df = pd.DataFrame({'id': [1, 2], 'sku': ['A', 'B'], 'extra': [{'color': 'oro'}, ['x', 1]]})
+
+    history.append(ORO, df, START_AT)
+
+    assert history.as_of(ORO, START_AT)['extra'].tolist() == [{'color': 'oro'}, ['x', 1]]
+
+def test_prune_drops_days_before_retention(versions):
+    history, catalogs = versions
+    now = catalogs[-1][0]
+
+    assert history.prune(ORO, 1, now) == DAYS - 2
+
+    assert history.as_of(ORO, catalogs[1][0]) is None
+    assert len(history.versions(ORO)) == 2
+    assert len(history.versions(FELMEL)) == DAYS
@@ -0,0 +1,83 @@
+"""
+Pruebas del índice de categorías (facetas)
+
+Filtrar por categorías es pertenencia exacta a todas las elegidas, también con
+nombres que contienen el de otra ("Anillos" y "Anillos de Compromiso") o que
+contienen ', ' ("Aretes, Topos").
+"""
+import random
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from category_facets import (CATEGORY_SEPARATOR, CategoryFacets, join_category_list, split_categories,
+                             split_category_list)
+
+CATEGORIES = ['Anillos', 'Anillos de Compromiso', 'Aretes', 'Aretes, Topos', 'Novedades', 'Plata 925']
+
+def make_category_list(size: int, seed: int = 23) -> list:
+    rng = random.Random(seed)
+    values = [join_category_list(rng.sample(CATEGORIES, rng.randint(1, 3))) if rng.random() > 0.05
+              else 'Sin categoría' for _ in range(size)]
+    values[:3] = [None, '', 'Anillos de Compromiso']
+    return values
+
+def row_by_row(values: list, selected: tuple) -> np.ndarray:
+    return np.array([set(selected) <= set(split_category_list(value)) for value in values])
+
+@pytest.fixture(scope='module')
+def values():
+    return make_category_list(5_000)
+
+@pytest.mark.parametrize('selected', [
+    ('Anillos',),
+    ('Aretes',),
+    ('Aretes, Topos',),
+    ('Anillos', 'Novedades'),
+    ('Aretes, Topos', 'Plata 925'),
+    ('Inexistente',),
+])
+def test_mask_is_exact_membership(values, selected):
+    facets = CategoryFacets(pd.Series(values, dtype='category'))
+
+    np.testing.assert_array_equal(facets.mask(selected), row_by_row(values, selected))
+
+def test_no_selection_has_no_mask(values):
+    assert CategoryFacets(pd.Series(values, dtype='category')).mask(()) is None
+
+def test_counts_match_row_by_row(values):
+    facets = CategoryFacets(pd.Series(values, dtype='category'))
+    positions = np.flatnonzero(facets.mask(('Novedades',)))
+
+    expected = Counter(name for i in positions.tolist() for name in split_category_list(values[i]))
+    assert facets.counts(positions) == {name: expected.get(name, 0) for name in facets.categories}
+    assert facets.categories == sorted(CATEGORIES + ['Sin categoría'])
+
+def test_substring_search_gave_false_positives(values):
+    categories = pd.Series(values, dtype='category')
+    facets = CategoryFacets(categories)
+
+    assert (categories.str.contains('Anillos', na=False) & ~facets.mask(('Anillos',))).any()
+    assert (categories.str.contains('Aretes', na=False) & ~facets.mask(('Aretes',))).any()
+
+def test_join_category_list_drops_empty_names_and_separators():
+    value = join_category_list([' Oro ', '', 'Aretes, Topos', 'A\x1fB'])
+
+    assert split_category_list(value) == ['Oro', 'Aretes, Topos', 'A B']
+    assert split_category_list(None) == []
+
+def test_frames_without_category_list_split_categories():
+    df = pd.DataFrame({'categories': ['Anillos, Novedades', 'Anillos de Compromiso', None]})
+    facets = CategoryFacets.from_frame(df)
+
+    assert facets.categories == ['Anillos', 'Anillos de Compromiso', 'Novedades']
+    np.testing.assert_array_equal(facets.mask(('Anillos',)), [True, False, False])
+    assert split_categories(CATEGORY_SEPARATOR.join(['Aretes', 'Oro'])) == ['Aretes', 'Oro']
+
+def test_frames_with_category_list_use_it():
+    df = pd.DataFrame({'categories': ['Aretes, Topos, Oro'],
+                       'category_list': [join_category_list(['Aretes, Topos', 'Oro'])]})
+
+    assert CategoryFacets.from_frame(df).categories == ['Aretes, Topos', 'Oro']
@@ -0,0 +1,118 @@
+"""
+Pruebas del motor de filtros de las páginas de productos
+
+Las posiciones deben ser las mismas filas que filtrar el catálogo en pandas y
+cada combinación de filtros se calcula una vez por versión.
+"""
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from category_facets import split_category_list
+from filter_engine import DEFAULT_MAX_PRICE, FilterEngine, FilterParams
+from normalizer import normalize_products, to_catalog_schema
+
+CATEGORIES = [['Anillos'], ['Anillos de Compromiso'], ['Anillos', 'Oferta'], ['Aretes'], [],
+              ['Aretes, Topos', 'Oferta']]
+
+def make_catalog(size: int, seed: int = 5) -> pd.DataFrame:
+    rng = random.Random(seed)
+    products = [{
+        'id': i + 1,
+        'sku': f'SKU-{i:05d}',
+        'name': f"Producto {i} {rng.choice(['Solitario', 'Corazón', 'Argolla'])}",
+        'price': str(rng.randint(1, 100) * 1000),
+        'stock_quantity': rng.choice([0, 1, 3, 8]),
+        'date_modified': '2026-02-01T10:00:00',
+        'categories': [{'id': n, 'name': name} for n, name in enumerate(CATEGORIES[i % len(CATEGORIES)])],
+    } for i in range(size)]
+    return to_catalog_schema(normalize_products(products, 35))
+
+def pandas_filter(df: pd.DataFrame, params: FilterParams) -> pd.DataFrame:
+    """Los filtros de la página recorriendo el catálogo en pandas"""
+    df = df[df['category_list'].map(lambda value: set(params.categories) <= set(split_category_list(value)))
+            .astype(bool)]
+    if params.max_price is not None:
+        df = df[df['price'] <= params.max_price]
+    df = df[df['stock'] >= params.min_stock]
+    if params.search:
+        df = df[df['name'].str.contains(params.search, case=False, regex=False)
+                | df['sku'].str.contains(params.search, case=False, regex=False)]
+    return df
+
+@pytest.fixture(scope='module')
+def catalog():
+    return make_catalog(2_000)
+
+@pytest.mark.parametrize('params', [
+    FilterParams(),
+    FilterParams(('Anillos',), 40_000.0, 3, 'producto 1'),
+    FilterParams(('Anillos', 'Oferta')),
+    FilterParams(('Anillos de Compromiso',), min_stock=1),
+    FilterParams(('Aretes',)),
+    FilterParams(('Aretes, Topos',), 50_000.0),
+    FilterParams(max_price=0.0),
+    FilterParams(search='argolla'),
+])
+def test_positions_match_pandas(catalog, params):
+    positions = FilterEngine().positions('orocolombia', 1, catalog, params)
+
+    pd.testing.assert_frame_equal(catalog.iloc[np.sort(positions)], pandas_filter(catalog, params))
+    assert not positions.flags.writeable
+
+def test_exact_sku_comes_first(catalog):
+    # Otra fila menciona el SKU en el nombre
+    catalog = catalog.assign(name=catalog['name'].astype(object))
+    catalog.loc[3, 'name'] = 'Combo con SKU-00120'
+    positions = FilterEngine().positions('orocolombia', 1, catalog, FilterParams(search='SKU-00120'))
+
+    assert catalog['sku'].iloc[positions].tolist() == ['SKU-00120', 'SKU-00003']
+
+def test_search_ignores_accents(catalog):
+    engine = FilterEngine()
+    assert np.array_equal(engine.positions('orocolombia', 1, catalog, FilterParams(search='corazon')),
+                          engine.positions('orocolombia', 1, catalog, FilterParams(search='Corazón')))
+
+def test_options_are_split_category_names(catalog):
+    options = FilterEngine().options('orocolombia', 1, catalog)
+
+    assert options.categories == ['Anillos', 'Anillos de Compromiso', 'Aretes', 'Aretes, Topos', 'Oferta',
+                                  'Sin categoría']
+    assert options.max_price == catalog['price'].max()
+    assert FilterEngine().options('vacío', 1, catalog.iloc[:0]).max_price == DEFAULT_MAX_PRICE
+
+def test_snapshots_without_category_list_split_categories(catalog):
+    # Snapshots guardados antes de category_list, sin nombres que contengan ', '
+    old = catalog[~catalog['category_list'].str.contains('Topos')].drop(columns='category_list')
+    params = FilterParams(('Anillos',), min_stock=3)
+
+    assert FilterEngine().options('orocolombia', 1, old).categories == [
+        'Anillos', 'Anillos de Compromiso', 'Aretes', 'Oferta', 'Sin categoría']
+    assert np.array_equal(FilterEngine().positions('orocolombia', 1, old, params),
+                          FilterEngine().positions('orocolombia', 1, old.assign(category_list=catalog['category_list']),
+                                                   params))
+
+def test_category_counts_follow_the_filters(catalog):
+    params = FilterParams(('Anillos',), min_stock=3)
+    counts = FilterEngine().category_counts('orocolombia', 1, catalog, params)
+
+    rows = pandas_filter(catalog, params)
+    expected = pd.Series([name for value in rows['category_list'] for name in split_category_list(value)])
+    expected = expected.value_counts()
+    assert {name: count for name, count in counts.items() if count} == expected.to_dict()
+
+def test_results_are_cached_per_version(catalog):
+    engine = FilterEngine(cache_size=2)
+    params = FilterParams(('Anillos',))
+
+    first = engine.positions('orocolombia', 1, catalog, params)
+    assert engine.positions('orocolombia', 1, catalog, params) is first
+    assert (engine.hits, engine.misses) == (1, 1)
+
+    changed = catalog.iloc[:100]
+    assert len(engine.positions('orocolombia', 2, changed, params)) < len(first)
+    # La cache LRU descarta la combinación más antigua
+    engine.positions('orocolombia', 2, changed, FilterParams())
+    assert engine.positions('orocolombia', 1, catalog, params) is not first
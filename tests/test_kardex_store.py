@@ -0,0 +1,128 @@
+"""
+Pruebas del kardex (historial de precio y stock por SKU)
+
+Simula días de sincronizaciones (incrementales y una completa por día) y
+comprueba que inventory_at reconstruye el catálogo de cada momento, también
+después de compactar, y que una descarga con páginas perdidas no da de baja
+productos.
+"""
+import os
+import random
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+import sync_state
+from kardex_store import REMOVED, KardexStore, catalog_state
+
+SOURCE = 'OroColmbia'
+SYNCS_PER_DAY = 4
+
+def make_catalog(size: int, rng: random.Random) -> pd.DataFrame:
+    return pd.DataFrame({
+        'id': [str(i) for i in range(size)],
+        'sku': [f"SKU-{i:06d}" for i in range(size)],
+        'price': [round(rng.uniform(10_000, 900_000), 2) for _ in range(size)],
+        'stock': [rng.choice([0, 3, 12]) for _ in range(size)],
+    })
+
+def mutate(catalog: pd.DataFrame, rng: random.Random, next_id: int, changes: int = 20):
+    """Cambios de una sincronización incremental: precios, stock y productos nuevos"""
+    rows = rng.sample(range(len(catalog)), changes)
+    changed = catalog.iloc[rows].copy()
+    changed['stock'] = [rng.choice([0, 1, 5, 20]) for _ in rows]
+    changed.loc[changed.index[::3], 'price'] = [round(rng.uniform(10_000, 900_000), 2)
+                                                  for _ in changed.index[::3]]
+    added = pd.DataFrame({
+        'id': [str(next_id + i) for i in range(3)],
+        'sku': [f"NUEVO-{next_id + i}" for i in range(3)],
+        'price': 1000.0,
+        'stock': 2,
+    })
+    received = pd.concat([changed, added], ignore_index=True)
+    catalog = pd.concat([catalog[~catalog['id'].isin(received['id'])], received], ignore_index=True)
+    return catalog, received
+
+def assert_inventory(kardex: KardexStore, moment: datetime, catalog: pd.DataFrame):
+    actual = kardex.inventory_at(SOURCE, moment)[['sku', 'price', 'stock']]
+    expected = catalog_state(catalog).sort_values('sku', ignore_index=True)
+    pd.testing.assert_frame_equal(actual.reset_index(drop=True), expected, check_dtype=False)
+
+@pytest.fixture
+def simulated(tmp_path):
+    """Kardex con 6 días de sincronizaciones y el catálogo esperado en cada momento"""
+    rng = random.Random(11)
+    kardex = KardexStore(os.path.join(tmp_path, 'kardex.sqlite'))
+    catalog = make_catalog(500, rng)
+    moment = datetime(2026, 1, 1)
+    kardex.record(SOURCE, catalog, moment, full=True)
+    checkpoints = [(moment, catalog)]
+    next_id = len(catalog)
+    for day in range(6):
+        for sync in range(SYNCS_PER_DAY):
+            moment += timedelta(hours=24 / SYNCS_PER_DAY)
+            catalog, received = mutate(catalog, rng, next_id)
+            next_id += len(received)
+            if sync == SYNCS_PER_DAY - 1:
+                # Descarga completa diaria: detecta también los productos retirados
+                catalog = catalog.drop(index=rng.sample(range(len(catalog)), 5)).reset_index(drop=True)
+                kardex.record(SOURCE, catalog, moment, full=True)
+            else:
+                kardex.record(SOURCE, received, moment, full=False)
+            checkpoints.append((moment, catalog))
+    return kardex, checkpoints
+
+def test_inventory_matches_catalog_at_every_sync(simulated):
+    kardex, checkpoints = simulated
+    for moment, catalog in checkpoints:
+        assert_inventory(kardex, moment, catalog)
+
+def test_inventory_is_exact_within_retention_after_compaction(simulated):
+    kardex, checkpoints = simulated
+    now = checkpoints[-1][0]
+    total = len(kardex.movements(limit=None))
+
+    deleted = kardex.compact(3, now)
+
+    assert 0 < deleted < total
+    for moment, catalog in checkpoints:
+        if moment >= now - timedelta(days=3):
+            assert_inventory(kardex, moment, catalog)
+
+def test_incremental_record_never_removes(tmp_path):
+    kardex = KardexStore(os.path.join(tmp_path, 'kardex.sqlite'))
+    catalog = make_catalog(10, random.Random(1))
+    kardex.record(SOURCE, catalog, datetime(2026, 1, 1), full=True)
+
+    kardex.record(SOURCE, catalog.iloc[:3], datetime(2026, 1, 2), full=False)
+
+    assert kardex.movements(SOURCE, kinds=[REMOVED]).empty
+    assert len(kardex.inventory_at(SOURCE, datetime(2026, 1, 2))) == 10
+
+def raw_product(i: int) -> dict:
+    return {'id': i, 'sku': f'SKU-{i:06d}', 'name': f'Producto {i}', 'price': '1000',
+            'regular_price': '1000', 'stock_quantity': 3, 'status': 'publish',
+            'date_modified': '2026-01-02T10:00:00', 'categories': []}
+
+@pytest.mark.parametrize('complete, removed', [(False, 0), (True, 2)])
+def test_first_sync_removes_only_when_crawl_is_complete(config, monkeypatch, complete, removed):
+    from api_connector import ProductManager
+
+    # Primera sincronización del proceso: sin snapshot en memoria
+    monkeypatch.setattr(sync_state, '_states', {})
+    manager = ProductManager(config=config)
+    known = pd.DataFrame({'id': ['1', '2', '3'], 'sku': [raw_product(i)['sku'] for i in (1, 2, 3)],
+                          'price': 1000.0, 'stock': 3})
+    manager.kardex.record(SOURCE, known, datetime(2026, 1, 1), full=True)
+
+    def fetch(apis, builders, *args):
+        # Solo llegó la página con el producto 1
+        builders[SOURCE].add_page(1, [raw_product(1)])
+        return {api.source_name: complete for api in apis}
+    monkeypatch.setattr(manager, '_fetch_stores_parallel', fetch)
+
+    manager.fetch_all_products(incremental=False)
+
+    movements = manager.kardex.movements(SOURCE, limit=None)
+    assert (movements['kind'] == REMOVED).sum() == removed
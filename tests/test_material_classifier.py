@@ -0,0 +1,98 @@
+"""
+Pruebas del clasificador de material
+
+Los casos de referencia deben dar lo mismo que la detección original de
+process_product (legacy_material, copiada de esa versión).
+"""
+import pandas as pd
+import pytest
+
+from material_classifier import MaterialClassifier, parse_extra_materials
+
+def legacy_material(product: dict) -> str:
+    """Detección de material tal como la hacía process_product"""
+    material = 'N/A'
+    if product.get('attributes') and isinstance(product['attributes'], list):
+        for attr in product['attributes']:
+            name = attr.get('name', '').lower()
+            if any(term in name for term in ['material', 'composición', 'metal', 'tipo']):
+                if attr.get('options'):
+                    material = ', '.join(attr['options'])
+                    break
+
+    if material == 'N/A':
+        description = (product.get('description', '') + product.get('short_description', '')).lower()
+        if 'oro' in description:
+            material = 'Oro'
+        elif 'plata' in description:
+            material = 'Plata'
+        elif 'acero' in description:
+            material = 'Acero Inoxidable'
+        elif 'titanio' in description:
+            material = 'Titanio'
+    return material
+
+# (producto, material esperado)
+GOLDEN_CASES = [
+    ({'attributes': [{'name': 'Material', 'options': ['Oro 18k']}]}, 'Oro 18k'),
+    ({'attributes': [{'name': 'Tipo de metal', 'options': ['Plata 925', 'Rodio']}]}, 'Plata 925, Rodio'),
+    ({'attributes': [{'name': 'COMPOSICIÓN', 'options': ['Acero']}]}, 'Acero'),
+    ({'attributes': [{'name': 'Color', 'options': ['Dorado']}], 'description': 'Cadena en plata'}, 'Plata'),
+    ({'attributes': [{'name': 'Material', 'options': []}], 'description': 'Aretes de titanio'}, 'Titanio'),
+    ({'attributes': [{'name': 'Material', 'options': ['']}], 'description': 'oro'}, ''),
+    ({'attributes': [{'options': ['x']}], 'description': 'acero quirúrgico'}, 'Acero Inoxidable'),
+    ({'description': '<p>Plata con baño de ORO</p>'}, 'Oro'),
+    ({'description': 'Plata y acero'}, 'Plata'),
+    ({'description': 'aceroro'}, 'Oro'),
+    ({'description': 'Un tesoro'}, 'Oro'),
+    ({'description': '<span class="oro">Pulsera</span>'}, 'Oro'),
+    ({'description': '', 'short_description': 'Titanio grado 5'}, 'Titanio'),
+    ({'description': 'Anillo de rodio'}, 'N/A'),
+    ({}, 'N/A'),
+    ({'attributes': 'Material: oro', 'description': 'plata'}, 'Plata'),
+]
+
+CLASSIFIERS = {
+    'extra': MaterialClassifier(parse_extra_materials('rodio:Rodio, chapa')),
+    'html': MaterialClassifier(strip_html=True),
+}
+
+# Casos con materiales adicionales o limpieza de HTML: (producto, esperado, clasificador)
+EXTRA_CASES = [
+    ({'description': 'Anillo de rodio'}, 'Rodio', 'extra'),
+    ({'description': 'Chapa de oro y rodio'}, 'Oro', 'extra'),
+    ({'description': 'Dije en chapa'}, 'Chapa', 'extra'),
+    ({'description': '<span class="oro">Plata</span>'}, 'Plata', 'html'),
+    ({'description': '<span class="oro">Pulsera</span>'}, 'N/A', 'html'),
+]
+
+def classify(classifier: MaterialClassifier, product: dict) -> str:
+    return classifier.classify(product.get('attributes'),
+                               product.get('description', '') + product.get('short_description', ''))
+
+@pytest.mark.parametrize('product, expected', GOLDEN_CASES)
+def test_golden_cases_match_legacy_detection(product, expected):
+    assert legacy_material(product) == expected
+    assert classify(MaterialClassifier(), product) == expected
+
+@pytest.mark.parametrize('product, expected, name', EXTRA_CASES)
+def test_extra_materials_and_html(product, expected, name):
+    assert classify(CLASSIFIERS[name], product) == expected
+
+@pytest.mark.parametrize('value, expected', [
+    ('rodio:Rodio, chapa', [('rodio', 'Rodio'), ('chapa', 'Chapa')]),
+    (' Chapa : Chapa de Oro ,, ', [('chapa', 'Chapa de Oro')]),
+    ('', []),
+    (None, []),
+])
+def test_parse_extra_materials(value, expected):
+    assert parse_extra_materials(value) == expected
+
+def test_classify_texts_matches_per_row_detection():
+    classifier = MaterialClassifier()
+    # Cada caso dos veces: los textos repetidos se analizan una vez
+    texts = pd.Series([product.get('description', '') + product.get('short_description', '')
+                       for product, _ in GOLDEN_CASES * 2], dtype=object)
+
+    assert classifier.classify_texts(texts).tolist() == [classifier.from_text(text) for text in texts]
+    assert classifier.classify_texts(pd.Series([], dtype=object)).tolist() == []
@@ -0,0 +1,183 @@
+"""
+Pruebas de la normalización de productos (normalize_product, normalize_products y to_catalog_schema)
+"""
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from category_facets import split_category_list
+from material_classifier import MaterialClassifier
+from normalizer import (CATALOG_DTYPES, PRODUCT_COLUMNS, RAW_COLUMNS, next_placeholder_index, normalize_product,
+                        normalize_products, to_catalog_schema)
+
+DISCOUNT_PERCENTAGE = 35
+
+def product(**fields) -> dict:
+    base = {
+        'id': 7,
+        'sku': 'SKU-7',
+        'name': 'Anillo',
+        'price': '100000',
+        'stock_quantity': 3,
+        'date_modified': '2025-05-01T10:30:00',
+        'categories': [{'id': 1, 'name': 'Anillos'}, {'id': 2, 'name': 'Novedades'}],
+        'description': '<p>Anillo en oro 18k</p>',
+        'short_description': '',
+        'images': [{'src': 'https://tienda.test/7.jpg'}, {'src': 'https://tienda.test/7b.jpg'}],
+        'tags': [{'name': 'oferta'}, {'name': 'nuevo'}],
+    }
+    base.update(fields)
+    return base
+
+def test_normalizes_a_product():
+    row = normalize_product(product(), 0, DISCOUNT_PERCENTAGE)
+
+    assert row['id'] == 7
+    assert row['sku'] == 'SKU-7'
+    assert row['price'] == 100000.0
+    assert row['discount_price'] == pytest.approx(65000.0)
+    assert row['stock'] == 3
+    assert row['categories'] == 'Anillos, Novedades'
+    assert split_category_list(row['category_list']) == ['Anillos', 'Novedades']
+    assert row['material'] == 'Oro'
+    assert row['date_modified'] == datetime(2025, 5, 1, 10, 30)
+    assert row['image_url'] == 'https://tienda.test/7.jpg'
+    assert row['tags'] == 'oferta, nuevo'
+    assert row['raw_data']['id'] == 7
+
+@pytest.mark.parametrize('fields, expected', [
+    ({'price': '', 'regular_price': '120'}, 120.0),
+    ({'price': '', 'regular_price': '', 'sale_price': '90.5'}, 90.5),
+    ({'price': None}, 0),
+])
+def test_price_falls_back_to_regular_and_sale_price(fields, expected):
+    assert normalize_product(product(**fields), 0, DISCOUNT_PERCENTAGE)['price'] == expected
+
+@pytest.mark.parametrize('fields, column, expected', [
+    ({'sku': ''}, 'sku', 'PROD-4'),
+    ({'sku': None}, 'sku', 'PROD-4'),
+    ({'sku': 'None'}, 'sku', 'PROD-4'),
+    ({'name': None}, 'name', 'Sin nombre'),
+    ({'categories': []}, 'categories', 'Sin categoría'),
+    ({'categories': []}, 'category_list', 'Sin categoría'),
+    ({'stock_quantity': None}, 'stock', 0),
+    ({'images': []}, 'image_url', ''),
+    ({'attributes': [{'name': 'Material', 'options': ['Plata 925']}]}, 'material', 'Plata 925'),
+    ({'description': '', 'short_description': 'acero'}, 'material', 'Acero Inoxidable'),
+    ])
+def test_defaults_and_fallbacks(fields, column, expected):
+    assert normalize_product(product(**fields), 4, DISCOUNT_PERCENTAGE)[column] == expected
+
+def test_missing_id_uses_the_index():
+    raw = product()
+    del raw['id']
+    assert normalize_product(raw, 4, DISCOUNT_PERCENTAGE)['id'] == 'temp_4'
+
+@pytest.mark.parametrize('fields', [
+    {'price': 'no-es-precio'},
+    {'stock_quantity': '4.5'},
+    {'stock_quantity': 2.7},
+    {'tags': None},
+    {'categories': ['Anillos']},
+    {'images': ['x']},
+    {'description': None},
+])
+def test_invalid_product_becomes_an_error_row(fields):
+    row = normalize_product(product(**fields), 4, DISCOUNT_PERCENTAGE)
+
+    assert row['id'] == 'ERROR-4'
+    assert row['sku'] == 'ERROR-4'
+    assert row['categories'] == 'Error'
+    assert row['category_list'] == 'Error'
+    assert row['price'] == 0
+
+def test_category_names_may_contain_the_display_separator():
+    categories = [{'id': 1, 'name': 'Aretes, Topos'}, {'id': 2, 'name': 'Oro'}]
+    row = normalize_product(product(categories=categories), 0, DISCOUNT_PERCENTAGE)
+
+    assert row['categories'] == 'Aretes, Topos, Oro'
+    assert split_category_list(row['category_list']) == ['Aretes, Topos', 'Oro']
+
+def test_extra_materials_come_from_the_classifier():
+    classifier = MaterialClassifier([('rodio', 'Rodio')])
+    row = normalize_product(product(description='Dije de rodio'), 0, DISCOUNT_PERCENTAGE, classifier)
+    assert row['material'] == 'Rodio'
+
+    products = [product(description='Dije de rodio'), product(description='Dije de rodio'),
+                product(attributes=[{'name': 'Material', 'options': ['Plata']}])]
+    df = normalize_products(products, DISCOUNT_PERCENTAGE, classifier=classifier)
+    assert df['material'].tolist() == ['Rodio', 'Rodio', 'Plata']
+
+@pytest.mark.parametrize('value, expected', [
+    ('2025-05-01T10:30:00Z', datetime(2025, 5, 1, 10, 30)),
+    ('2025-05-01T10:30:00+02:00', datetime(2025, 5, 1, 8, 30)),
+    ('2025-05-01T10:30:00.250000', datetime(2025, 5, 1, 10, 30, 0, 250000)),
+])
+def test_dates_with_a_zone_are_stored_in_utc(value, expected):
+    df = normalize_products([product(date_modified=value), product(id=8)], DISCOUNT_PERCENTAGE)
+
+    assert df['date_modified'].tolist() == [expected, datetime(2025, 5, 1, 10, 30)]
+    assert df['date_modified'].dtype == 'datetime64[ns]'
+
+@pytest.mark.parametrize('value', ['no-es-fecha', None, 5, '2025-02-30T10:00:00'])
+def test_unreadable_dates_use_now(value):
+    before = datetime.now()
+    row = normalize_product(product(date_modified=value), 0, DISCOUNT_PERCENTAGE)
+    assert before <= row['date_modified'] <= datetime.now()
+
+def test_columns_keep_their_dtypes_with_missing_and_invalid_values():
+    products = [product(price=None, stock_quantity=None), product(id=8, price='x'), 'no-es-producto']
+    df = normalize_products(products, DISCOUNT_PERCENTAGE)
+
+    assert list(df.columns) == PRODUCT_COLUMNS
+    assert df['id'].tolist() == [7, 'ERROR-1', 'ERROR-2']
+    assert df['price'].dtype == 'float64'
+    assert df['discount_price'].dtype == 'float64'
+    assert df['stock'].dtype == 'int64'
+    assert df['date_modified'].dtype == 'datetime64[ns]'
+    assert normalize_products([product(price=None)], DISCOUNT_PERCENTAGE)['price'].dtype == 'float64'
+
+def test_normalize_product_is_a_row_of_normalize_products():
+    products = [product(), product(id=8, sku='', stock_quantity='12'), product(id=9, tags=None)]
+    df = normalize_products(products, DISCOUNT_PERCENTAGE, start_index=10)
+
+    for position, raw in enumerate(products[:2]):
+        assert normalize_product(raw, 10 + position, DISCOUNT_PERCENTAGE) == df.to_dict('records')[position]
+
+def test_normalize_products_indexes_from_start_index():
+    df = normalize_products([product(sku=''), product(sku='A'), product(price='x')], DISCOUNT_PERCENTAGE,
+                            start_index=100)
+
+    assert df['sku'].tolist() == ['PROD-100', 'A', 'ERROR-102']
+    assert normalize_products([], DISCOUNT_PERCENTAGE).empty
+
+def test_next_placeholder_index_follows_the_highest_placeholder():
+    df = pd.DataFrame({'id': [7, 'temp_12', 'ERROR-3', 9], 'sku': ['A', 'PROD-12', 'ERROR-3', 'PROD-40']})
+
+    assert next_placeholder_index(df) == 41
+    assert next_placeholder_index(df.iloc[[0]]) == 0
+    assert next_placeholder_index(None) == 0
+
+def test_product_manager_uses_the_same_normalizer(config):
+    from api_connector import ProductManager
+
+    manager = ProductManager(config=config)
+    products = [product(id=i, sku=f'S-{i}') for i in range(5)] + [product(id=9, price='x')]
+
+    rows = [manager.process_product(raw, i) for i, raw in enumerate(products)]
+    expected = [normalize_product(raw, i, config.DISCOUNT_PERCENTAGE) for i, raw in enumerate(products)]
+    # Las filas de error llevan datetime.now()
+    assert [dict(row, date_modified=None) for row in rows] == [dict(row, date_modified=None) for row in expected]
+
+    valid = products[:-1]
+    pd.testing.assert_frame_equal(manager.normalize_catalog(valid),
+                                  to_catalog_schema(normalize_products(valid, config.DISCOUNT_PERCENTAGE)))
+
+def test_catalog_schema_drops_raw_columns_and_sets_dtypes():
+    df = to_catalog_schema(normalize_products([product(), product(id=8, sku=None)], DISCOUNT_PERCENTAGE))
+
+    assert not set(RAW_COLUMNS) & set(df.columns)
+    for column, dtype in CATALOG_DTYPES.items():
+        assert df[column].dtype == dtype, column
+    assert df['sku'].tolist() == ['SKU-7', 'PROD-1']
@@ -0,0 +1,93 @@
+"""
+Pruebas de la normalización en un pool de procesos
+
+El catálogo compacto debe ser igual al de normalizar en un solo proceso,
+también con bloques pequeños, filas con error y start_index.
+"""
+import pandas as pd
+import pytest
+
+import api_connector
+from material_classifier import MaterialClassifier, parse_extra_materials
+from normalizer import normalize_products, to_catalog_schema
+from parallel_normalizer import normalize_products_parallel, shutdown_process_pool
+from streamlit_config import StreamlitConfig
+
+DISCOUNT_PERCENTAGE = 35
+CATEGORIES = ['Anillos', 'Aretes', 'Cadenas', 'Dijes']
+
+def make_products(size: int) -> list:
+    products = []
+    for i in range(size):
+        product = {
+            'id': i + 1,
+            'sku': f'SKU-{i}' if i % 11 else '',
+            'name': f'Anillo {i}',
+            'price': str(1000 + i),
+            'stock_quantity': i % 4,
+            'date_modified': f'2025-05-{i % 28 + 1:02d}T10:00:00',
+            # Cada bloque ve un subconjunto distinto de categorías
+            'categories': [{'id': i // 60, 'name': CATEGORIES[i // 60 % 4]}],
+            'description': 'Dije de rodio' if i % 5 == 0 else 'oro laminado',
+            'tags': [{'name': 'oferta'}],
+        }
+        if i % 37 == 5:
+            product['price'] = 'no-es-precio'
+        products.append(product)
+    return products
+
+@pytest.fixture(scope='module', autouse=True)
+def process_pool():
+    yield
+    shutdown_process_pool()
+
+def without_error_dates(df: pd.DataFrame) -> pd.DataFrame:
+    # Las filas de error llevan datetime.now()
+    return df.assign(date_modified=df['date_modified'].where(~df['id'].astype(str).str.startswith('ERROR-')))
+
+@pytest.mark.parametrize('chunk_size, start_index', [(50, 0), (64, 1000), (None, 0)])
+def test_parallel_matches_single_process(chunk_size, start_index):
+    products = make_products(230)
+    classifier = MaterialClassifier(parse_extra_materials('rodio'))
+
+    expected = to_catalog_schema(normalize_products(products, DISCOUNT_PERCENTAGE, start_index, classifier))
+    result = normalize_products_parallel(products, DISCOUNT_PERCENTAGE, 2, classifier=classifier,
+                                         chunk_size=chunk_size, start_index=start_index)
+
+    assert (result['sku'] == 'PROD-1000').any() == (start_index == 1000)
+    pd.testing.assert_frame_equal(without_error_dates(result), without_error_dates(expected))
+
+def test_empty_catalog():
+    assert normalize_products_parallel([], DISCOUNT_PERCENTAGE, 2).empty
+
+def test_normalize_catalog_uses_the_pool_above_the_threshold(config, monkeypatch):
+    monkeypatch.setenv('NORMALIZE_WORKERS', '2')
+    monkeypatch.setenv('NORMALIZE_PROCESS_THRESHOLD', '100')
+    manager = api_connector.ProductManager(config=StreamlitConfig())
+    calls = []
+
+    def small_chunks(products, *args, **kwargs):
+        calls.append(len(products))
+        return normalize_products_parallel(products, *args, chunk_size=40, **kwargs)
+    monkeypatch.setattr(api_connector, 'normalize_products_parallel', small_chunks)
+
+    small = manager.normalize_catalog(make_products(99))
+    large = manager.normalize_catalog(make_products(120))
+
+    assert calls == [120]
+    assert len(small) == 99 and len(large) == 120
+
+def test_normalize_catalog_falls_back_to_one_process(config, monkeypatch):
+    monkeypatch.setenv('NORMALIZE_WORKERS', '2')
+    monkeypatch.setenv('NORMALIZE_PROCESS_THRESHOLD', '10')
+    manager = api_connector.ProductManager(config=StreamlitConfig())
+
+    def broken_pool(*args, **kwargs):
+        raise OSError('sin procesos')
+    monkeypatch.setattr(api_connector, 'normalize_products_parallel', broken_pool)
+
+    products = make_products(30)
+    pd.testing.assert_frame_equal(
+        without_error_dates(manager.normalize_catalog(products)),
+        without_error_dates(to_catalog_schema(normalize_products(products, DISCOUNT_PERCENTAGE,
+                                                                 classifier=manager.material_classifier))))
@@ -0,0 +1,69 @@
+"""
+Pruebas del almacén lateral de productos originales y del esquema compacto
+"""
+import os
+
+import pandas as pd
+
+from normalizer import RAW_COLUMNS, normalize_products, to_catalog_schema
+from raw_store import RawProductStore
+
+SOURCE = 'OroColmbia'
+
+def payload(product_id, **fields) -> dict:
+    return {'id': product_id, 'sku': f'SKU-{product_id}', 'name': f'Anillo {product_id}',
+            'price': '1000', 'description': '<p>Anillo en oro 18k, ñandú</p>',
+            'attributes': [{'name': 'Material', 'options': ['Oro']}], **fields}
+
+def test_get_missing_store_returns_nothing(tmp_path):
+    store = RawProductStore(os.path.join(tmp_path, 'cache', 'raw.sqlite'))
+
+    assert store.get(SOURCE, 1) is None
+    assert store.get_many(SOURCE, [1, 2]) == {}
+    assert store.retain(SOURCE, [1]) == 0
+
+def test_save_and_read_payloads(tmp_path):
+    store = RawProductStore(os.path.join(tmp_path, 'cache', 'raw.sqlite'))
+    products = [payload(i) for i in range(1200)] + [{'sku': 'sin-id'}]
+
+    assert store.save(SOURCE, products) == 1200
+    store.save('GrupoFelmel', [payload(1, name='Otra tienda')])
+
+    assert store.get(SOURCE, 7) == payload(7)
+    assert store.get(SOURCE, '7') == payload(7)
+    assert store.get('GrupoFelmel', 1)['name'] == 'Otra tienda'
+    # Más ids que el lote de parámetros de SQLite
+    found = store.get_many(SOURCE, range(1300))
+    assert len(found) == 1200 and found['1199'] == payload(1199)
+
+def test_incremental_save_upserts_and_full_save_replaces(tmp_path):
+    store = RawProductStore(os.path.join(tmp_path, 'raw.sqlite'))
+    store.save(SOURCE, [payload(1), payload(2)])
+    store.save('GrupoFelmel', [payload(1)])
+
+    store.save(SOURCE, [payload(2, price='2000'), payload(3)])
+    assert store.get(SOURCE, 2)['price'] == '2000'
+    assert set(store.get_many(SOURCE, [1, 2, 3])) == {'1', '2', '3'}
+
+    store.save(SOURCE, [payload(3)], replace=True)
+    assert set(store.get_many(SOURCE, [1, 2, 3])) == {'3'}
+    assert store.get('GrupoFelmel', 1) is not None
+
+def test_retain_drops_products_no_longer_listed(tmp_path):
+    store = RawProductStore(os.path.join(tmp_path, 'raw.sqlite'))
+    store.save(SOURCE, [payload(i) for i in range(5)])
+    store.save('GrupoFelmel', [payload(9)])
+
+    assert store.retain(SOURCE, [0, '2', 4]) == 2
+
+    assert set(store.get_many(SOURCE, range(5))) == {'0', '2', '4'}
+    assert store.get('GrupoFelmel', 9) is not None
+
+def test_catalog_schema_keeps_raw_payloads_out_of_memory():
+    full = normalize_products([payload(i) for i in range(200)], 35)
+    lean = to_catalog_schema(full)
+
+    assert set(RAW_COLUMNS) & set(full.columns)
+    assert not set(RAW_COLUMNS) & set(lean.columns)
+    pd.testing.assert_series_equal(lean['sku'].astype(object), full['sku'])
+    assert lean.memory_usage(deep=True).sum() < full.memory_usage(deep=True).sum()
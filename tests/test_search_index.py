@@ -0,0 +1,75 @@
+"""
+Pruebas del índice de búsqueda por SKU y nombre
+
+SearchIndex.search debe devolver las mismas filas que recorrer todo el
+catálogo buscando el texto normalizado, con los SKUs iguales y por prefijo
+primero.
+"""
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from search_index import SearchIndex, fold, fold_all
+
+PIECES = ['Anillo Solitario', 'Cadena Eslabón', 'Pulsera Tenis', 'Aretes Argolla', 'Dije Corazón',
+          'Reloj Clásico', 'Tobillera', 'Candongas']
+DETAILS = ['Pequeña', 'Mediana', 'Grande', 'Niña', 'Caballero', '']
+MATERIALS = ['Oro Laminado 18k', 'Plata 925', 'Acero Quirúrgico', 'Rodio', 'Oro Rosa']
+QUERIES = ['ANI-000123', 'ani-0001', 'corazon', 'CORAZÓN', 'Pequeña', 'oro laminado', 'oro  laminado',
+           '18', 'a', '(', '.*', 'zzzz']
+
+def make_catalog(size: int, seed: int = 17) -> pd.DataFrame:
+    rng = random.Random(seed)
+    names, skus = [], []
+    for i in range(size):
+        piece = rng.choice(PIECES)
+        names.append(f"{piece} {rng.choice(DETAILS)} {rng.choice(MATERIALS)} ref {rng.randint(1, 9999)}")
+        skus.append(f"{piece[:3].upper()}-{i:06d}" if rng.random() > 0.02 else '')
+    # Un nombre que menciona el SKU de otra fila: el SKU exacto va primero igual
+    skus[123] = 'ANI-000123'
+    names[7] = f"Combo con {skus[123]}"
+    names[8] = None
+    return pd.DataFrame({'sku': skus, 'name': names})
+
+def brute_force(df: pd.DataFrame, term: str) -> np.ndarray:
+    """Recorrer todas las filas (SKU y nombre normalizados uno por uno con fold)"""
+    query = fold(term)
+    return np.array([i for i, (sku, name) in enumerate(zip(df['sku'], df['name']))
+                     if query in fold(sku) or query in fold(name)], dtype=np.int64)
+
+@pytest.fixture(scope='module')
+def catalog():
+    df = make_catalog(5_000)
+    return df, SearchIndex.from_frame(df)
+
+@pytest.mark.parametrize('term', QUERIES)
+def test_search_matches_brute_force(catalog, term):
+    df, index = catalog
+    found = index.search(term)
+
+    np.testing.assert_array_equal(np.sort(found), brute_force(df, term))
+    assert len(np.unique(found)) == len(found)
+
+def test_exact_and_prefix_skus_come_first(catalog):
+    df, index = catalog
+
+    found = index.search('ANI-000123')
+    assert found[0] == 123 and 7 in found
+
+    found = index.search('ani-0001')
+    prefixed = df['sku'].iloc[found].str.startswith('ANI-0001').to_numpy()
+    # Primero todos los SKUs con el prefijo, en orden del catálogo
+    assert prefixed[:prefixed.sum()].all()
+    assert (np.diff(found[:prefixed.sum()]) > 0).all()
+
+@pytest.mark.parametrize('term', ['', '  ', None])
+def test_empty_search_means_no_filter(catalog, term):
+    _, index = catalog
+    assert index.search(term or '') is None
+
+def test_fold():
+    assert fold('Añillo  ORO') == 'anillo oro'
+    assert fold(None) == '' and fold(float('nan')) == ''
+    assert fold_all(['Corazón', None, 'A\x00B']) == ['corazon', '', 'a b']
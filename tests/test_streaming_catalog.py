@@ -0,0 +1,169 @@
+"""
+Pruebas del catálogo armado página a página (StreamingCatalogBuilder)
+
+Normalizar por página debe dar el mismo catálogo que descargar todo y
+normalizar al final, aunque las páginas lleguen en desorden.
+"""
+import random
+
+import pandas as pd
+import pytest
+
+from api_connector import WooCommerceAPI
+from normalizer import normalize_products, to_catalog_schema
+from streaming_catalog import StreamingCatalogBuilder
+
+DISCOUNT_PERCENTAGE = 35
+PER_PAGE = 10
+
+def make_product(i: int, rng: random.Random) -> dict:
+    return {
+        'id': i + 1,
+        'sku': f'SKU-{i}' if i % 9 else '',
+        'name': f'Anillo {i}',
+        'price': str(rng.randint(1000, 90000)),
+        'stock_quantity': rng.choice([0, 2, 7]),
+        'date_modified': f'2025-05-{i % 28 + 1:02d}T10:00:00',
+        'categories': [{'id': i // 25, 'name': f'Categoría {i // 25}'}],
+        'description': rng.choice(['oro 18k', 'plata 925', 'acero']),
+    }
+
+def normalize(products: list, start_index: int) -> pd.DataFrame:
+    return to_catalog_schema(normalize_products(products, DISCOUNT_PERCENTAGE, start_index))
+
+def pages_of(size: int) -> dict:
+    products = [make_product(i, random.Random(i)) for i in range(size)]
+    return {page: products[(page - 1) * PER_PAGE:page * PER_PAGE]
+            for page in range(1, -(-size // PER_PAGE) + 1)}
+
+class SyntheticAPI(WooCommerceAPI):
+    """Tienda sintética: genera cada página al pedirla, sin red"""
+
+    def __init__(self, size: int, config):
+        super().__init__('https://tienda.test/wp-json/wc/v3/products', 'ck', 'cs', 'OroColmbia',
+                         max_workers=4, per_page=PER_PAGE, config=config)
+        self.pages = pages_of(size)
+
+    def get_page(self, page: int = 1, per_page: int = 100, extra_params=None):
+        return self.pages.get(page, []), len(self.pages)
+
+def test_streamed_catalog_matches_collected(config):
+    from api_connector import ProductManager
+
+    manager = ProductManager(config=config)
+    api = SyntheticAPI(235, config)
+
+    collected = manager.normalize_catalog(api.get_all_products(max_pages=100))
+    builder = StreamingCatalogBuilder(api.source_name, PER_PAGE, manager.normalize_catalog, batch_size=30)
+    for page, products in api.iter_pages(max_pages=100):
+        builder.add_page(page, products)
+    streamed = builder.build()
+
+    assert len(streamed) == 235
+    pd.testing.assert_frame_equal(streamed, collected)
+
+@pytest.mark.parametrize('batch_size', [0, 25, 1000])
+def test_pages_out_of_order_keep_page_order(batch_size):
+    pages = pages_of(95)
+    order = [3, 1, 2, 7, 5, 4, 10, 6, 9, 8]
+    builder = StreamingCatalogBuilder('OroColmbia', PER_PAGE, normalize, batch_size=batch_size)
+
+    for page in order:
+        builder.add_page(page, pages[page])
+
+    expected = normalize([product for page in sorted(pages) for product in pages[page]], 0)
+    pd.testing.assert_frame_equal(builder.build(), expected)
+
+def test_batches_only_join_consecutive_pages():
+    pages = pages_of(100)
+    chunks = []
+    builder = StreamingCatalogBuilder('OroColmbia', PER_PAGE, normalize, batch_size=30,
+                                      chunk_callback=lambda source, chunk: chunks.append(len(chunk)))
+
+    for page in [1, 3, 4, 5, 2, 6, 7, 8, 9, 10]:
+        builder.add_page(page, pages[page])
+    # La primera página sola; la 3 espera a la 2
+    assert chunks == [10, 40, 30]
+    builder.build()
+    assert chunks == [10, 40, 30, 20]
+    assert builder.rows == 100
+
+def test_missing_page_is_skipped_and_indexes_follow_the_page():
+    pages = pages_of(50)
+    builder = StreamingCatalogBuilder('OroColmbia', PER_PAGE, normalize, batch_size=1000)
+    for page in (1, 2, 4, 5):
+        builder.add_page(page, pages[page])
+
+    df = builder.build()
+
+    assert len(df) == 40
+    # SKU vacío del producto 36 (página 4): PROD-n con su índice en el catálogo
+    assert 'PROD-36' in set(df['sku'])
+
+def test_start_index_offsets_the_placeholders():
+    pages = pages_of(20)
+    builder = StreamingCatalogBuilder('OroColmbia', PER_PAGE, normalize, start_index=100)
+    for page in sorted(pages):
+        builder.add_page(page, pages[page])
+
+    # SKU vacío de los productos 0, 9 y 18
+    assert {'PROD-100', 'PROD-109', 'PROD-118'} <= set(builder.build()['sku'])
+
+def test_incremental_sync_numbers_placeholders_after_the_snapshot(config, monkeypatch):
+    import sync_state
+    from api_connector import ProductManager
+
+    monkeypatch.setattr(sync_state, '_states', {})
+    manager = ProductManager(config=config)
+    pages = pages_of(20)
+    changed = dict(make_product(0, random.Random(0)), id=500)
+
+    def fetch(apis, builders, progress_callback, max_pages, extra_params):
+        # La incremental (modified_after) solo trae el producto modificado
+        received = {1: [changed]} if extra_params.get('OroColmbia') else pages
+        for page, products in received.items():
+            builders['OroColmbia'].add_page(page, products)
+        return {api.source_name: True for api in apis}
+    monkeypatch.setattr(manager, '_fetch_stores_parallel', fetch)
+
+    manager.fetch_all_products(incremental=False)
+    df, _ = manager.fetch_all_products(incremental=True)
+
+    # El producto nuevo sin SKU no reemplaza ni repite el PROD-0 del snapshot
+    assert len(df) == 21
+    assert df['sku'].is_unique
+    assert df.loc[df['id'] == 500, 'sku'].tolist() == ['PROD-19']
+
+def test_page_callback_receives_raw_pages():
+    pages = pages_of(30)
+    received = []
+    builder = StreamingCatalogBuilder('OroColmbia', PER_PAGE, normalize,
+                                      page_callback=lambda source, products: received.append((source, len(products))))
+    for page in sorted(pages):
+        builder.add_page(page, pages[page])
+    builder.build()
+
+    assert received == [('OroColmbia', 10)] * 3
+
+def test_error_stops_the_builder_and_is_raised_by_build():
+    pages = pages_of(30)
+    calls = []
+
+    def failing(products, start_index):
+        calls.append(start_index)
+        if start_index == 10:
+            raise ValueError('bloque inválido')
+        return normalize(products, start_index)
+
+    builder = StreamingCatalogBuilder('OroColmbia', PER_PAGE, failing, batch_size=0)
+    for page in sorted(pages):
+        builder.add_page(page, pages[page])
+
+    assert isinstance(builder.error, ValueError)
+    assert calls == [0, 10]
+    with pytest.raises(ValueError):
+        builder.build()
+
+def test_empty_build():
+    builder = StreamingCatalogBuilder('OroColmbia', PER_PAGE, normalize)
+    assert builder.build().empty
@@ -0,0 +1,63 @@
+"""
+Pruebas de la configuración compartida (StreamlitConfig y get_config)
+"""
+import pytest
+
+import streamlit_config
+from streamlit_config import StreamlitConfig, get_config, reload_config
+
+class SecretCounter:
+    """Envoltorio de get_secret que cuenta las llamadas"""
+
+    def __init__(self, get_secret):
+        self.get_secret = get_secret
+        self.calls = 0
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        return self.get_secret(*args, **kwargs)
+
+def raw_products(size: int) -> list:
+    return [{'id': i, 'sku': f'SKU-{i}', 'name': f'Anillo {i}', 'price': str(1000 + i),
+             'stock_quantity': i % 3, 'date_modified': '2025-05-01T10:00:00',
+             'categories': [{'id': 1, 'name': 'Anillos'}], 'description': 'oro 18k'}
+            for i in range(size)]
+
+def test_normalizing_reads_no_secrets(config, monkeypatch):
+    from api_connector import ProductManager
+
+    manager = ProductManager(config=config)
+    counter = SecretCounter(streamlit_config.get_secret)
+    monkeypatch.setattr(streamlit_config, 'get_secret', counter)
+    products = raw_products(50)
+
+    [manager.process_product(product, i) for i, product in enumerate(products)]
+    manager.normalize_catalog(products)
+
+    assert counter.calls == 0
+
+def test_config_is_read_only(config):
+    with pytest.raises(AttributeError):
+        config.DISCOUNT_PERCENTAGE = 10
+    assert config.DISCOUNT_PERCENTAGE == 35
+
+def test_get_config_is_shared_until_reload(monkeypatch):
+    monkeypatch.setattr(streamlit_config, '_config', None)
+    monkeypatch.setenv('DISCOUNT_PERCENTAGE', '20')
+    shared = get_config()
+    assert get_config() is shared
+    assert shared.DISCOUNT_PERCENTAGE == 20
+
+    monkeypatch.setenv('DISCOUNT_PERCENTAGE', '25')
+    reloaded = reload_config()
+
+    assert get_config() is reloaded
+    assert reloaded.DISCOUNT_PERCENTAGE == 25
+    # Los objetos ya creados conservan su configuración
+    assert shared.DISCOUNT_PERCENTAGE == 20
+
+@pytest.mark.parametrize('value, expected', [('true', True), ('1', True), ('sí', True),
+                                             ('false', False), ('no', False), ('0', False)])
+def test_boolean_secrets(monkeypatch, value, expected):
+    monkeypatch.setenv('INCREMENTAL_SYNC', value)
+    assert StreamlitConfig().INCREMENTAL_SYNC is expected